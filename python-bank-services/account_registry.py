@@ -0,0 +1,430 @@
+import logging
+import sys
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from bank import Bank
+from repository.bank_repository import BankRepository
+from repository.ledger_repository import LedgerRepository
+from shard_coordinator import ShardCoordinator
+
+logger = logging.getLogger(__name__)
+
+# Stripes of the registry, each with its own lock; an account belongs to the
+# one its name hashes to
+DEFAULT_LOCK_STRIPES = 1024
+
+# Idempotency keys remembered across all accounts
+DEFAULT_IDEMPOTENCY_CACHE_SIZE = 100000
+
+# Size of an int object above the range CPython caches
+INT_OBJECT_BYTES = sys.getsizeof(2 ** 20)
+
+class RegistryStripe:
+    """
+    One stripe of the account registry.
+    
+    The lock guards the stripe's accounts: their registration and their
+    balances. The accounts whose names hash to the stripe share it, so two of
+    them may occasionally wait for each other, but the number of locks does
+    not grow with the number of accounts.
+    
+    Attributes:
+        lock: The lock of the stripe
+        slots: The slot of each account in the stripe, by name
+        balances: The balance of each account, by slot
+        name_bytes: The memory used by the names of the accounts
+    """
+    
+    __slots__ = ("lock", "slots", "balances", "name_bytes")
+    
+    def __init__(self):
+        """Initialize an empty stripe."""
+        self.lock = threading.Lock()
+        self.slots: Dict[str, int] = {}
+        self.balances = array("q")
+        self.name_bytes = 0
+
+class IdempotencyCache:
+    """
+    The transaction IDs of recent requests, by account and idempotency key.
+    
+    One bounded cache serves every account. When it is full, the least
+    recently used key is forgotten.
+    """
+    
+    def __init__(self, max_size: int = DEFAULT_IDEMPOTENCY_CACHE_SIZE):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_size: The maximum number of keys remembered
+        """
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def memory_bytes(self) -> int:
+        """
+        Get the size of the cache's table, without the keys and IDs it holds.
+        
+        Returns:
+            The size in bytes
+        """
+        return sys.getsizeof(self._entries)
+    
+    def get(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        """
+        Get the transaction ID of an earlier request.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+        
+        Returns:
+            The transaction ID, or None if the key is not known
+        """
+        key = (bank_name, idempotency_key)
+        with self._lock:
+            tx_id = self._entries.get(key)
+            if tx_id is not None:
+                self._entries.move_to_end(key)
+            return tx_id
+    
+    def put(self, bank_name: str, idempotency_key: str, tx_id: str) -> None:
+        """
+        Remember the transaction ID of a request.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+            tx_id: The transaction ID
+        """
+        with self._lock:
+            self._entries[(bank_name, idempotency_key)] = tx_id
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def pop_accounts(self, bank_names: Set[str]) -> Dict[str, Dict[str, str]]:
+        """
+        Forget the keys of some accounts, returning them.
+        
+        Args:
+            bank_names: The names of the bank accounts
+        
+        Returns:
+            The transaction ID of each key, by account name
+        """
+        popped: Dict[str, Dict[str, str]] = {}
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in bank_names]:
+                popped.setdefault(key[0], {})[key[1]] = self._entries.pop(key)
+        return popped
+
+class AccountTable:
+    """
+    The in-memory state of the bank accounts, in a compact layout.
+    
+    Accounts are spread over a fixed number of stripes by the hash of their
+    name. In its stripe, an account is an entry in a name-to-slot dict and a
+    64-bit balance in an array, with no per-account objects. Idempotency keys
+    of all accounts share one bounded cache. The table only holds the state;
+    loading and persisting accounts is up to its owner.
+    """
+    
+    def __init__(self, lock_stripes: int = DEFAULT_LOCK_STRIPES,
+                 idempotency_cache_size: int = DEFAULT_IDEMPOTENCY_CACHE_SIZE):
+        """
+        Initialize an empty table.
+        
+        Args:
+            lock_stripes: The number of stripes, each with its own lock
+            idempotency_cache_size: The number of idempotency keys remembered
+        """
+        self.idempotency = IdempotencyCache(idempotency_cache_size)
+        self._stripes = [RegistryStripe() for _ in range(lock_stripes)]
+    
+    def __len__(self) -> int:
+        return sum(len(stripe.slots) for stripe in self._stripes)
+    
+    def stripe_index(self, bank_name: str) -> int:
+        """
+        Get the index of the stripe an account belongs to.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The index, from 0 to the number of stripes
+        """
+        return hash(bank_name) % len(self._stripes)
+    
+    def stripe_for(self, bank_name: str) -> RegistryStripe:
+        """
+        Get the stripe an account belongs to.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The stripe
+        """
+        return self._stripes[self.stripe_index(bank_name)]
+    
+    def locate(self, bank_name: str) -> Optional[Tuple[RegistryStripe, int]]:
+        """
+        Find where a registered account is kept.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The stripe and slot of the account, or None if it is not registered
+        """
+        stripe = self.stripe_for(bank_name)
+        slot = stripe.slots.get(bank_name)
+        if slot is None:
+            return None
+        return stripe, slot
+    
+    def register(self, bank_name: str, balance: int) -> Tuple[RegistryStripe, int]:
+        """
+        Register an account, unless it is registered already.
+        
+        Args:
+            bank_name: The name of the bank account
+            balance: The balance of the account
+        
+        Returns:
+            The stripe and slot of the account
+        """
+        stripe = self.stripe_for(bank_name)
+        with stripe.lock:
+            slot = stripe.slots.get(bank_name)
+            if slot is None:
+                slot = self._add(stripe, bank_name, balance)
+        return stripe, slot
+    
+    def _add(self, stripe: RegistryStripe, bank_name: str, balance: int) -> int:
+        """
+        Add an account to its stripe. Callers hold the stripe lock.
+        
+        Args:
+            stripe: The stripe of the account
+            bank_name: The name of the bank account
+            balance: The balance of the account
+        
+        Returns:
+            The slot of the account
+        """
+        slot = len(stripe.balances)
+        stripe.balances.append(balance)
+        stripe.slots[bank_name] = slot
+        stripe.name_bytes += sys.getsizeof(bank_name)
+        return slot
+    
+    def names(self) -> List[str]:
+        """
+        Get the names of the registered accounts.
+        
+        Returns:
+            The account names
+        """
+        return [name for stripe in self._stripes for name in list(stripe.slots)]
+    
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        Estimate the memory used by the registry.
+        
+        The per-account overhead counts the dict entry, the slot number and
+        the balance; the names themselves are reported separately.
+        
+        Returns:
+            The number of accounts and the estimated sizes in bytes
+        """
+        accounts = slot_bytes = balance_bytes = name_bytes = 0
+        for stripe in self._stripes:
+            count = len(stripe.slots)
+            accounts += count
+            slot_bytes += sys.getsizeof(stripe.slots) + INT_OBJECT_BYTES * max(0, count - 257)
+            balance_bytes += stripe.balances.buffer_info()[1] * stripe.balances.itemsize
+            name_bytes += stripe.name_bytes
+        overhead = slot_bytes + balance_bytes
+        return {
+            "accounts": accounts,
+            "slotBytes": slot_bytes,
+            "balanceBytes": balance_bytes,
+            "nameBytes": name_bytes,
+            "overheadBytesPerAccount": round(overhead / accounts, 1) if accounts else 0.0,
+            "lockStripes": len(self._stripes),
+            "idempotencyKeys": len(self.idempotency),
+            "idempotencyCacheBytes": self.idempotency.memory_bytes()
+        }
+
+class AccountRegistry(AccountTable):
+    """
+    The account table of the threaded server, which loads and persists accounts.
+    
+    Accounts are registered on first use rather than at startup, and each
+    stripe registers an account at most once however many threads ask for
+    it, so all Bank handles on an account share its state. In a sharded
+    deployment, only the accounts this shard owns are registered and
+    operated on.
+    """
+    
+    def __init__(self, repository: BankRepository, ledger: Optional[LedgerRepository] = None,
+                 lock_stripes: int = DEFAULT_LOCK_STRIPES,
+                 idempotency_cache_size: int = DEFAULT_IDEMPOTENCY_CACHE_SIZE,
+                 shards: Optional[ShardCoordinator] = None):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            repository: The repository to use for persistence
+            ledger: The ledger that records every balance change, in ledger mode
+            lock_stripes: The number of stripes, each with its own lock
+            idempotency_cache_size: The number of idempotency keys remembered
+            shards: Decides which accounts this instance owns; None to own all
+        """
+        super().__init__(lock_stripes, idempotency_cache_size)
+        self.repository = repository
+        self.ledger = ledger
+        self.shards = shards
+    
+    def get(self, bank_name: str) -> Optional[Bank]:
+        """
+        Get a handle on a registered account, without loading it.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The handle, or None if the account is not registered
+        """
+        location = self.locate(bank_name)
+        if location is None:
+            return None
+        return Bank(bank_name, self, *location)
+    
+    def owns(self, bank_name: str) -> bool:
+        """
+        Check whether this instance owns an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            True unless another shard owns the account
+        """
+        return self.shards is None or self.shards.owns(bank_name)
+    
+    def check_owned(self, bank_name: str) -> None:
+        """
+        Check that this instance owns an account.
+        
+        Account operations call this under the stripe lock, so that none
+        runs after the account was released to another shard.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Raises:
+            WrongShardException: If another shard owns the account
+        """
+        if self.shards is not None:
+            self.shards.check_owner(bank_name)
+    
+    def find_transaction_id(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        """
+        Find the transaction ID of an earlier request with the same key.
+        
+        The cache only holds recent keys, so on a miss the logged
+        transactions are searched; a key found there is cached again.
+        Account operations call this under the stripe lock.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+        
+        Returns:
+            The transaction ID, or None if the key was never used
+        """
+        tx_id = self.idempotency.get(bank_name, idempotency_key)
+        if tx_id is None:
+            tx_id = self.repository.find_transaction_id(bank_name, idempotency_key)
+            if tx_id is not None:
+                self.idempotency.put(bank_name, idempotency_key, tx_id)
+        return tx_id
+    
+    def get_or_load(self, bank_name: str, load_balance: Callable[[], Optional[int]]) -> Optional[Bank]:
+        """
+        Get a handle on an account, registering it first if needed.
+        
+        Registration happens under the stripe lock: when several threads ask
+        for an unregistered account at once, `load_balance` runs only in the
+        first, and the others wait and get the account it registered. In
+        ledger mode, the account's ledger is started under the same lock, so
+        the open event precedes every change.
+        
+        Args:
+            bank_name: The name of the bank account
+            load_balance: Returns the stored balance of the account, or None
+                if it does not exist
+        
+        Returns:
+            The handle, or None if the account does not exist
+        
+        Raises:
+            WrongShardException: If another shard owns the account
+        """
+        bank = self.get(bank_name)
+        if bank is not None:
+            return bank
+        
+        stripe = self.stripe_for(bank_name)
+        with stripe.lock:
+            self.check_owned(bank_name)
+            slot = stripe.slots.get(bank_name)
+            if slot is None:
+                balance = load_balance()
+                if balance is None:
+                    return None
+                
+                slot = len(stripe.balances)
+                stripe.balances.append(balance)
+                stripe.slots[bank_name] = slot
+                stripe.name_bytes += sys.getsizeof(bank_name)
+                
+                if self.ledger is not None:
+                    self.ledger.open_account(bank_name, balance)
+        return Bank(bank_name, self, stripe, slot)
+    
+    def release(self, should_release: Callable[[str], bool]) -> Dict[str, Dict[str, str]]:
+        """
+        Unregister the accounts another shard is taking over.
+        
+        Each stripe is released under its lock, so operations in progress on
+        its accounts finish first. The slots of released accounts are not
+        reused; their balances stay behind in the stripe's array.
+        
+        Args:
+            should_release: Whether an account, by name, is to be released
+        
+        Returns:
+            The recent idempotency keys of each released account, by name
+        """
+        released = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                for bank_name in [name for name in stripe.slots if should_release(name)]:
+                    del stripe.slots[bank_name]
+                    stripe.name_bytes -= sys.getsizeof(bank_name)
+                    released.append(bank_name)
+        
+        keys = self.idempotency.pop_accounts(set(released))
+        return {bank_name: keys.get(bank_name, {}) for bank_name in released}
\ No newline at end of file
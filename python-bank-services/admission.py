@@ -0,0 +1,207 @@
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Requests served at once across all accounts
+DEFAULT_MAX_IN_FLIGHT = 256
+
+# Requests served at once for one account
+DEFAULT_ACCOUNT_MAX_IN_FLIGHT = 4
+
+# Requests that may wait for one account while it is at its limit
+DEFAULT_ACCOUNT_QUEUE_SIZE = 16
+
+# Longest a request waits to be admitted before it is rejected
+DEFAULT_MAX_WAIT_SECONDS = 2.0
+
+class OverloadedException(Exception):
+    """Exception raised when a request is rejected to protect the service."""
+    
+    def __init__(self, message: str, retry_after: float):
+        """
+        Initialize the exception.
+        
+        Args:
+            message: A human-readable description of the limit that was hit
+            retry_after: The number of seconds after which the client may retry
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class _AccountQueue:
+    """The requests being served and waiting for one account."""
+    
+    __slots__ = ("active", "waiting", "condition")
+    
+    def __init__(self, lock: threading.Lock):
+        self.active = 0
+        self.waiting = 0
+        self.condition = threading.Condition(lock)
+
+class AdmissionController:
+    """
+    Limits how many requests are served at once, per account and in total.
+    
+    A request for an account already serving its maximum waits in that
+    account's bounded queue. When the queue is full, or the request has
+    waited `max_wait_seconds`, it is rejected at once with an
+    OverloadedException instead of tying up a server thread. Admitted
+    requests then need one of the global slots, waiting for at most
+    `max_wait_seconds` as well. A retry storm on one account therefore fills
+    only that account's queue and leaves the other accounts unaffected.
+    """
+    
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 account_max_in_flight: int = DEFAULT_ACCOUNT_MAX_IN_FLIGHT,
+                 account_queue_size: int = DEFAULT_ACCOUNT_QUEUE_SIZE,
+                 max_wait_seconds: float = DEFAULT_MAX_WAIT_SECONDS):
+        """
+        Initialize the admission controller.
+        
+        Args:
+            max_in_flight: Requests served at once across all accounts
+            account_max_in_flight: Requests served at once for one account
+            account_queue_size: Requests that may wait for one account
+            max_wait_seconds: Longest a request waits to be admitted
+        """
+        self.max_in_flight = max_in_flight
+        self.account_max_in_flight = account_max_in_flight
+        self.account_queue_size = account_queue_size
+        self.max_wait_seconds = max_wait_seconds
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._lock = threading.Lock()
+        # Only accounts with requests being served or waiting have an entry
+        self._accounts: Dict[str, _AccountQueue] = {}
+        self._in_flight = 0
+        self._rejected = 0
+    
+    @contextmanager
+    def admit(self, bank_name: str) -> Iterator[None]:
+        """
+        Serve a request for an account within the limits.
+        
+        Args:
+            bank_name: The account the request is for
+        
+        Raises:
+            OverloadedException: If the request cannot be admitted in time
+        """
+        self._enter_account(bank_name)
+        try:
+            if not self._slots.acquire(timeout=self.max_wait_seconds):
+                self._reject(f"Service is serving {self.max_in_flight} requests, try again later")
+            try:
+                with self._lock:
+                    self._in_flight += 1
+                yield
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                self._slots.release()
+        finally:
+            self._leave_account(bank_name)
+    
+    def _enter_account(self, bank_name: str) -> None:
+        """
+        Take one of an account's places, waiting in its queue if needed.
+        
+        Args:
+            bank_name: The name of the account
+        
+        Raises:
+            OverloadedException: If the queue is full or the wait times out
+        """
+        with self._lock:
+            queue = self._accounts.get(bank_name)
+            if queue is None:
+                queue = self._accounts[bank_name] = _AccountQueue(self._lock)
+            
+            if queue.active < self.account_max_in_flight:
+                queue.active += 1
+                return
+            
+            if queue.waiting >= self.account_queue_size:
+                self._rejected += 1
+                raise OverloadedException(f"Too many requests for bank {bank_name}, try again later",
+                                          self._retry_after(queue))
+            
+            queue.waiting += 1
+            deadline = time.monotonic() + self.max_wait_seconds
+            try:
+                while queue.active >= self.account_max_in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._rejected += 1
+                        raise OverloadedException(f"Timed out waiting for bank {bank_name}, try again later",
+                                                  self._retry_after(queue))
+                    queue.condition.wait(remaining)
+                queue.active += 1
+            finally:
+                queue.waiting -= 1
+                if queue.active == 0 and queue.waiting == 0:
+                    del self._accounts[bank_name]
+    
+    def _leave_account(self, bank_name: str) -> None:
+        """
+        Give back an account's place and wake the next waiting request.
+        
+        Args:
+            bank_name: The name of the account
+        """
+        with self._lock:
+            queue = self._accounts[bank_name]
+            queue.active -= 1
+            if queue.active == 0 and queue.waiting == 0:
+                del self._accounts[bank_name]
+            else:
+                queue.condition.notify()
+    
+    def _retry_after(self, queue: _AccountQueue) -> int:
+        """
+        Estimate when a rejected request for an account is likely to succeed.
+        
+        Each full round of the account's limit is assumed to take at most
+        `max_wait_seconds`, so the longer the queue, the later the retry.
+        
+        Args:
+            queue: The account's queue
+        
+        Returns:
+            The number of seconds to wait, at least 1
+        """
+        rounds = (queue.active + queue.waiting) / self.account_max_in_flight
+        return max(1, math.ceil(rounds * self.max_wait_seconds))
+    
+    def _reject(self, message: str) -> None:
+        """
+        Reject a request that could not get a global slot.
+        
+        Args:
+            message: A human-readable description of the limit that was hit
+        
+        Raises:
+            OverloadedException: Always
+        """
+        with self._lock:
+            self._rejected += 1
+        raise OverloadedException(message, max(1, math.ceil(self.max_wait_seconds)))
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the current load.
+        
+        Returns:
+            The requests in flight, the accounts with waiting requests and the
+            number of requests rejected since startup
+        """
+        with self._lock:
+            return {
+                "inFlight": self._in_flight,
+                "accountsQueued": sum(1 for queue in self._accounts.values() if queue.waiting),
+                "rejected": self._rejected
+            }
\ No newline at end of file
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+from bank import Bank, InsufficientFundsException
+
+if TYPE_CHECKING:
+    from account_registry import RegistryStripe
+    from async_bank_manager import AsyncBankManager
+
+logger = logging.getLogger(__name__)
+
+class AsyncBank:
+    """
+    A bank account of the async server, with coroutine deposit and withdrawal.
+    
+    Like Bank, it is a handle on an account registered in an AccountTable,
+    whose stripe holds the balance. Accounts in a stripe share an asyncio
+    lock instead of the stripe's thread lock, so waiting for it or for the
+    database suspends the request rather than blocking a thread.
+    """
+    
+    __slots__ = ("name", "_manager", "_stripe", "_slot", "_lock")
+    
+    def __init__(self, name: str, manager: "AsyncBankManager", stripe: "RegistryStripe", slot: int,
+                 lock: asyncio.Lock):
+        """
+        Initialize a handle on a bank account.
+        
+        Args:
+            name: The name of the bank account
+            manager: The manager the account belongs to
+            stripe: The registry stripe holding the account
+            slot: The slot of the account in the stripe
+            lock: The asyncio lock of the stripe
+        """
+        self.name = name
+        self._manager = manager
+        self._stripe = stripe
+        self._slot = slot
+        self._lock = lock
+    
+    def get_name(self) -> str:
+        """Get the name of the bank account."""
+        return self.name
+    
+    def get_balance(self) -> int:
+        """
+        Get the current balance of the bank account.
+        
+        Returns:
+            The current balance
+        """
+        return self._stripe.balances[self._slot]
+    
+    async def deposit(self, amount: int, idempotency_key: str) -> str:
+        """
+        Deposit funds into the bank account.
+        
+        Args:
+            amount: The amount to deposit
+            idempotency_key: A key to ensure idempotency of the operation
+        
+        Returns:
+            A transaction ID for the deposit
+        
+        Raises:
+            ValueError: If the amount is less than 1
+        """
+        logger.info("Bank '%s': deposit for %s, key is %s", self.name, amount, idempotency_key)
+        
+        if amount < 1:
+            raise ValueError(f"Invalid deposit amount: {amount}")
+        
+        async with self._lock:
+            tx_id = await self._apply("deposit", amount, idempotency_key)
+        
+        logger.debug("Bank '%s': deposit complete for %s, txID is %s", self.name, amount, tx_id)
+        return tx_id
+    
+    async def withdraw(self, amount: int, idempotency_key: str) -> str:
+        """
+        Withdraw funds from the bank account.
+        
+        Args:
+            amount: The amount to withdraw
+            idempotency_key: A key to ensure idempotency of the operation
+        
+        Returns:
+            A transaction ID for the withdrawal
+        
+        Raises:
+            ValueError: If the amount is less than 1
+            InsufficientFundsException: If the amount exceeds the balance
+        """
+        logger.info("Bank '%s': withdraw for %s, key is %s", self.name, amount, idempotency_key)
+        
+        if amount < 1:
+            raise ValueError(f"Invalid withdrawal amount: {amount}")
+        
+        async with self._lock:
+            tx_id = await self._apply("withdraw", amount, idempotency_key)
+        
+        logger.debug("Bank '%s': withdraw complete for %s, txID is %s", self.name, amount, tx_id)
+        return tx_id
+    
+    async def _apply(self, operation: str, amount: int, idempotency_key: str) -> str:
+        """
+        Apply a deposit or withdrawal. Callers hold the stripe lock.
+        
+        A repeated request is answered before the funds are checked, as the
+        balance no longer includes the money a repeated withdrawal took. The
+        balance update and the transaction log are written concurrently.
+        
+        Args:
+            operation: The type of operation (deposit, withdraw)
+            amount: The amount involved
+            idempotency_key: A key to ensure idempotency of the operation
+        
+        Returns:
+            The transaction ID, or that of the earlier request with the same key
+        
+        Raises:
+            InsufficientFundsException: If a withdrawal exceeds the balance
+        """
+        idempotency = self._manager.registry.idempotency
+        repository = self._manager.repository
+        previous_tx_id = idempotency.get(self.name, idempotency_key)
+        if previous_tx_id is None:
+            # The cache only holds recent keys
+            previous_tx_id = await repository.find_transaction_id(self.name, idempotency_key)
+            if previous_tx_id is not None:
+                idempotency.put(self.name, idempotency_key, previous_tx_id)
+        if previous_tx_id is not None:
+            return previous_tx_id
+        
+        balance = self._stripe.balances[self._slot]
+        if operation == "withdraw" and amount > balance:
+            raise InsufficientFundsException(f"Insufficient funds: balance={balance}, withdrawal={amount}")
+        
+        balance += amount if operation == "deposit" else -amount
+        self._stripe.balances[self._slot] = balance
+        tx_id = Bank.generate_transaction_id("D" if operation == "deposit" else "W", 10)
+        idempotency.put(self.name, idempotency_key, tx_id)
+        
+        await asyncio.gather(
+            repository.update_balance(self.name, balance),
+            repository.log_transaction(operation, amount, tx_id, idempotency_key, self.name)
+        )
+        return tx_id
\ No newline at end of file
@@ -0,0 +1,305 @@
+import asyncio
+import logging
+from typing import Any, Dict
+
+import msgpack
+from quart import Quart, Response, jsonify, request
+
+from async_bank import AsyncBank
+from async_bank_manager import AsyncBankManager
+from bank_api import (BankStoppedException, NoSuchBankException, bank_name_param, check_active, create_bank_params,
+                      day_param, decode_params, error_payload, new_status_param, transfer_params)
+from bank import InsufficientFundsException
+from repository.async_bank_repository_impl import AsyncBankRepositoryImpl
+from wire_format import JSON_MIMETYPE, MSGPACK_MIMETYPE, ErrorCode
+
+logger = logging.getLogger(__name__)
+
+class AsyncBankController:
+    """
+    Quart controller for the bank API endpoints, with async handlers.
+    
+    It serves the same API as BankController, with the same parameters,
+    content negotiation and error codes; both check requests and build
+    error responses with the functions of bank_api. A request that waits on
+    MongoDB suspends on the event loop instead of holding a thread, so one
+    process can have thousands of requests in flight. The web UI and the
+    transaction export are only served by BankController.
+    """
+    
+    def __init__(self, bank_manager: AsyncBankManager, port: int = 8480):
+        """
+        Initialize the controller.
+        
+        Args:
+            bank_manager: The bank manager to use
+            port: The port to run the server on
+        """
+        self.bank_manager = bank_manager
+        self.port = port
+        self.app = Quart(__name__)
+        
+        # Configure routes
+        self._configure_routes()
+        
+        # Configure error handlers
+        self._configure_error_handlers()
+        
+        # Create the indexes on the server's event loop, before the first request
+        self.app.before_serving(self._create_indexes)
+    
+    def _configure_routes(self):
+        """Configure the Quart application routes."""
+        # POST is accepted for clients that send a MessagePack request body
+        self.app.add_url_rule('/api/createBank', 'create_bank', self.create_bank, methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/balance', 'get_balance', self.get_balance, methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/deposit', 'deposit', self.deposit, methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/withdraw', 'withdraw', self.withdraw, methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/bankStatus', 'bank_status', self.bank_status, methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/banks', 'get_banks', self.get_banks, methods=['GET'])
+        self.app.add_url_rule('/api/stats', 'get_stats', self.get_stats, methods=['GET'])
+        self.app.add_url_rule('/api/ready', 'ready', self.ready, methods=['GET'])
+        self.app.add_url_rule('/api/memoryStats', 'get_memory_stats', self.get_memory_stats, methods=['GET'])
+    
+    def _configure_error_handlers(self):
+        """Configure Quart error handlers."""
+        @self.app.errorhandler(InsufficientFundsException)
+        async def handle_insufficient_funds(error):
+            return await self._error(str(error), ErrorCode.INSUFFICIENT_FUNDS, 400)
+        
+        @self.app.errorhandler(NoSuchBankException)
+        async def handle_no_such_bank(error):
+            return await self._error(str(error), ErrorCode.NO_SUCH_BANK, 404)
+        
+        @self.app.errorhandler(BankStoppedException)
+        async def handle_bank_stopped(error):
+            return await self._error(str(error), ErrorCode.BANK_STOPPED, 400)
+        
+        @self.app.errorhandler(ValueError)
+        async def handle_value_error(error):
+            return await self._error(str(error), ErrorCode.INVALID_REQUEST, 400)
+        
+        @self.app.errorhandler(404)
+        async def handle_not_found(error):
+            return await self._error("Resource not found", ErrorCode.NOT_FOUND, 404)
+    
+    async def _create_indexes(self):
+        """Create the repository's indexes, if it has any to create."""
+        repository = self.bank_manager.repository
+        if isinstance(repository, AsyncBankRepositoryImpl):
+            await repository.create_indexes()
+    
+    def start(self):
+        """Start the Quart application."""
+        self.app.run(host='0.0.0.0', port=self.port)
+    
+    # ===== Content Negotiation =====
+    
+    async def _request_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters of the current API request.
+        
+        Returns:
+            The request parameters, see decode_params
+        """
+        return decode_params(request.args.to_dict(), request.mimetype,
+                             await request.get_data() if request.content_length else None)
+    
+    async def _respond(self, payload: Dict[str, Any], http_status: int = 200):
+        """
+        Build an API response in the format the client asked for.
+        
+        Args:
+            payload: The response fields
+            http_status: The HTTP status code
+        
+        Returns:
+            A MessagePack response if the client prefers it, JSON otherwise
+        """
+        if request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+            return Response(msgpack.packb(payload), status=http_status, mimetype=MSGPACK_MIMETYPE)
+        return jsonify(payload), http_status
+    
+    async def _error(self, message: str, code: int, http_status: int):
+        """
+        Build an API error response.
+        
+        Args:
+            message: A human-readable description of the error
+            code: The ErrorCode that clients use to classify the error
+            http_status: The HTTP status code
+        """
+        payload, _ = error_payload(message, code)
+        return await self._respond(payload, http_status)
+    
+    # ===== API Endpoints =====
+    
+    # Requests are checked by the same functions as in BankController, and
+    # their errors turned into responses by the error handlers
+    
+    async def create_bank(self):
+        """
+        Create a new bank account.
+        
+        URL: /api/createBank?bankName={name}&initialBalance={balance}
+        """
+        bank_name, initial_balance = create_bank_params(await self._request_params())
+        await self.bank_manager.create_bank(bank_name, initial_balance)
+        
+        return await self._respond({
+            "status": "SUCCESS",
+            "message": "Bank created successfully"
+        })
+    
+    async def _active_bank(self, bank_name: str) -> AsyncBank:
+        """
+        Get a bank that exists and is not stopped.
+        
+        The bank and its status are looked up concurrently.
+        
+        Args:
+            bank_name: The name of the bank
+        
+        Returns:
+            The bank
+        
+        Raises:
+            NoSuchBankException: If the bank does not exist
+            BankStoppedException: If the bank is stopped
+        """
+        bank, status = await asyncio.gather(
+            self.bank_manager.get_bank(bank_name),
+            self.bank_manager.get_bank_status(bank_name)
+        )
+        check_active(bank_name, bank, status)
+        return bank
+    
+    async def get_balance(self):
+        """
+        Get the balance of a bank account.
+        
+        URL: /api/balance?bankName={name}
+        """
+        bank = await self._active_bank(bank_name_param(await self._request_params()))
+        
+        return await self._respond({
+            "status": "SUCCESS",
+            "balance": bank.get_balance()
+        })
+    
+    async def deposit(self):
+        """
+        Deposit money into a bank account.
+        
+        URL: /api/deposit?bankName={name}&amount={amount}&idempotencyKey={key}
+        """
+        bank_name, amount, idempotency_key = transfer_params(await self._request_params())
+        bank = await self._active_bank(bank_name)
+        tx_id = await bank.deposit(amount, idempotency_key)
+        
+        return await self._respond({
+            "status": "SUCCESS",
+            "transaction-id": tx_id
+        })
+    
+    async def withdraw(self):
+        """
+        Withdraw money from a bank account.
+        
+        URL: /api/withdraw?bankName={name}&amount={amount}&idempotencyKey={key}
+        """
+        bank_name, amount, idempotency_key = transfer_params(await self._request_params())
+        bank = await self._active_bank(bank_name)
+        tx_id = await bank.withdraw(amount, idempotency_key)
+        
+        return await self._respond({
+            "status": "SUCCESS",
+            "transaction-id": tx_id
+        })
+    
+    async def bank_status(self):
+        """
+        Get or set the status of a bank.
+        
+        GET: /api/bankStatus?bankName={name}
+        POST: /api/bankStatus?bankName={name}&status={status}
+        """
+        params = await self._request_params()
+        bank_name = bank_name_param(params)
+        
+        if request.method == 'POST':
+            new_status = new_status_param(params)
+            if not await self.bank_manager.set_bank_status(bank_name, new_status):
+                raise NoSuchBankException(f"No such bank: {bank_name}")
+            
+            return await self._respond({
+                "status": "SUCCESS",
+                "message": f"Bank status updated to {new_status}"
+            })
+        else:
+            # GET request
+            status = await self.bank_manager.get_bank_status(bank_name)
+            if status is None:
+                raise NoSuchBankException(f"No such bank: {bank_name}")
+            
+            return await self._respond({
+                "status": "SUCCESS",
+                "bankStatus": status
+            })
+    
+    async def get_banks(self):
+        """
+        Get all banks.
+        
+        URL: /api/banks
+        """
+        banks = await self.bank_manager.get_all_banks()
+        statuses = await asyncio.gather(*(self.bank_manager.get_bank_status(bank.get_name()) for bank in banks))
+        
+        return await self._respond({
+            "status": "SUCCESS",
+            "banks": [
+                {"name": bank.get_name(), "balance": bank.get_balance(), "status": status}
+                for bank, status in zip(banks, statuses)
+            ]
+        })
+    
+    async def get_stats(self):
+        """
+        Get the global and per-account transaction statistics.
+        
+        URL: /api/stats?bankName={name}&day={YYYY-MM-DD}
+        """
+        bank_name = request.args.get('bankName')
+        day = day_param(request.args.get('day'))
+        
+        if bank_name and await self.bank_manager.get_bank_status(bank_name) is None:
+            raise NoSuchBankException(f"No such bank: {bank_name}")
+        
+        return await self._respond({
+            "status": "SUCCESS",
+            **await self.bank_manager.get_stats(bank_name, day)
+        })
+    
+    async def ready(self):
+        """
+        Report that the service is ready; accounts are always loaded on first use.
+        
+        URL: /api/ready
+        """
+        return await self._respond({
+            "status": "SUCCESS",
+            "ready": True,
+            "warmup": {"state": "done", "loaded": 0, "total": 0}
+        })
+    
+    async def get_memory_stats(self):
+        """
+        Get the estimated memory used by the in-memory account registry.
+        
+        URL: /api/memoryStats
+        """
+        return await self._respond({
+            "status": "SUCCESS",
+            **self.bank_manager.get_memory_stats()
+        })
\ No newline at end of file
@@ -0,0 +1,172 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+
+from account_registry import DEFAULT_IDEMPOTENCY_CACHE_SIZE, DEFAULT_LOCK_STRIPES, AccountTable
+from async_bank import AsyncBank
+from repository.async_bank_repository import AsyncBankRepository
+
+logger = logging.getLogger(__name__)
+
+class AsyncBankManager:
+    """
+    Manages the bank accounts of the async server.
+    
+    Account state is kept in an AccountTable, the in-memory part of
+    BankManager's AccountRegistry; every database access goes through the
+    async repository. Each stripe of the table has an asyncio lock, under
+    which accounts are also loaded, so concurrent requests for a new account
+    load it once.
+    """
+    
+    def __init__(self, repository: AsyncBankRepository, lock_stripes: int = DEFAULT_LOCK_STRIPES,
+                 idempotency_cache_size: int = DEFAULT_IDEMPOTENCY_CACHE_SIZE):
+        """
+        Initialize the bank manager.
+        
+        Args:
+            repository: The repository to use for persistence
+            lock_stripes: The number of locks shared by the accounts
+            idempotency_cache_size: The number of idempotency keys remembered
+        """
+        self.repository = repository
+        self.registry = AccountTable(lock_stripes, idempotency_cache_size)
+        self._locks = [asyncio.Lock() for _ in range(lock_stripes)]
+    
+    def _handle(self, bank_name: str) -> Optional[AsyncBank]:
+        """
+        Get a handle on a registered account.
+        
+        Args:
+            bank_name: The name of the bank
+        
+        Returns:
+            The bank object or None if it isn't registered
+        """
+        location = self.registry.locate(bank_name)
+        if location is None:
+            return None
+        return AsyncBank(bank_name, self, *location, self._locks[self.registry.stripe_index(bank_name)])
+    
+    async def get_bank(self, bank_name: str, create_with_balance: Optional[int] = None) -> Optional[AsyncBank]:
+        """
+        Get a bank by name, registering it on first use.
+        
+        Args:
+            bank_name: The name of the bank to get
+            create_with_balance: Create the bank with this balance if it doesn't exist
+        
+        Returns:
+            The bank object or None if it doesn't exist
+        """
+        bank = self._handle(bank_name)
+        if bank is not None:
+            return bank
+        
+        async with self._locks[self.registry.stripe_index(bank_name)]:
+            bank = self._handle(bank_name)
+            if bank is not None:
+                return bank
+            
+            account = await self.repository.find_account_by_bank_name(bank_name)
+            if account:
+                balance = account.get("balance", 0)
+            elif create_with_balance is not None:
+                await self.repository.create_account(bank_name, create_with_balance)
+                balance = create_with_balance
+            else:
+                return None
+            
+            self.registry.register(bank_name, balance)
+            return self._handle(bank_name)
+    
+    async def create_bank(self, bank_name: str, initial_balance: int = 0) -> AsyncBank:
+        """
+        Create a new bank.
+        
+        Args:
+            bank_name: The name of the new bank
+            initial_balance: The initial balance for the bank
+        
+        Returns:
+            The newly created bank, or the existing one with that name
+        """
+        logger.info(f"Creating new bank: {bank_name} with initial balance: {initial_balance}")
+        return await self.get_bank(bank_name, create_with_balance=initial_balance)
+    
+    async def get_all_banks(self) -> List[AsyncBank]:
+        """
+        Get all banks.
+        
+        Returns:
+            A list of all bank objects
+        """
+        banks = []
+        for bank_doc in await self.repository.get_all_banks():
+            bank_name = bank_doc.get("bankName")
+            if bank_name:
+                bank = self._handle(bank_name)
+                if bank is None:
+                    self.registry.register(bank_name, bank_doc.get("balance", 0))
+                    bank = self._handle(bank_name)
+                banks.append(bank)
+        return banks
+    
+    async def get_stats(self, bank_name: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the pre-aggregated transaction statistics.
+        
+        Args:
+            bank_name: Also return the daily statistics of this bank
+            day: The day of the daily statistics, as YYYY-MM-DD; defaults to today
+        
+        Returns:
+            The global totals, the global totals for the day and, if a bank
+            was given, its totals for the day
+        """
+        return await self.repository.get_stats(bank_name, day)
+    
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """
+        Get the estimated memory used by the account registry.
+        
+        Returns:
+            The number of registered accounts and the estimated sizes in bytes
+        """
+        return self.registry.memory_stats()
+    
+    async def get_bank_status(self, bank_name: str) -> Optional[str]:
+        """
+        Get the status of a bank.
+        
+        Args:
+            bank_name: The name of the bank
+        
+        Returns:
+            The status of the bank or None if the bank doesn't exist
+        """
+        bank_doc = await self.repository.find_account_by_bank_name(bank_name)
+        if bank_doc:
+            return bank_doc.get("status", "ACTIVE")
+        return None
+    
+    async def set_bank_status(self, bank_name: str, status: str) -> bool:
+        """
+        Set the status of a bank.
+        
+        Args:
+            bank_name: The name of the bank
+            status: The new status ('ACTIVE' or 'STOPPED')
+        
+        Returns:
+            True if the status was updated, False otherwise
+        """
+        if await self.get_bank(bank_name) is None:
+            return False
+        
+        if status not in ["ACTIVE", "STOPPED"]:
+            raise ValueError(f"Invalid bank status: {status}")
+        
+        logger.info(f"Setting bank {bank_name} status to {status}")
+        await self.repository.update_bank_status(bank_name, status)
+        return True
\ No newline at end of file
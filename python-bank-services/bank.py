@@ -1,13 +1,21 @@
 import logging
 import random
 import string
-import threading
-from typing import Dict
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
 
-from repository.bank_repository import BankRepository
+from opentelemetry import trace
+
+from admission import OverloadedException
+from shard_coordinator import HANDOFF_RETRY_AFTER
+
+if TYPE_CHECKING:
+    from account_registry import AccountRegistry, RegistryStripe
 
 logger = logging.getLogger(__name__)
 
+tracer = trace.get_tracer(__name__)
+
 class InsufficientFundsException(Exception):
     """Exception raised when a withdrawal would result in a negative balance."""
     pass
@@ -15,29 +23,33 @@ class InsufficientFundsException(Exception):
 class Bank:
     """
     Represents a bank account with deposit and withdrawal functionality.
+    
+    A Bank is a lightweight handle on an account registered in an
+    AccountRegistry, whose stripe holds the balance and lock. Handles are
+    created by the registry on demand and any number may exist for one
+    account. In a sharded deployment, every operation checks under the lock
+    that the account has not been handed over to another shard, and that
+    the handle's slot is still the account's: an account that comes back
+    to this shard after a handoff is registered in a new slot, loaded from
+    MongoDB, and older handles move to it.
     """
     
-    def __init__(self, name: str, repository: BankRepository):
+    __slots__ = ("name", "_registry", "_stripe", "_slot")
+    
+    def __init__(self, name: str, registry: "AccountRegistry", stripe: "RegistryStripe", slot: int):
         """
-        Initialize a bank account.
+        Initialize a handle on a bank account.
         
         Args:
             name: The name of the bank account
-            repository: The repository to use for persistence
+            registry: The registry the account is registered in
+            stripe: The registry stripe holding the account
+            slot: The slot of the account in the stripe
         """
-        logger.debug(f"Creating new bank named {name}")
-        
         self.name = name
-        self.repository = repository
-        self._lock = threading.Lock()  # For thread safety
-        self.requests: Dict[str, str] = {}
-        
-        account = repository.find_account_by_bank_name(name)
-        if account is None:
-            repository.create_account(name, 0)
-            self.balance = 0
-        else:
-            self.balance = account.get("balance", 0)
+        self._registry = registry
+        self._stripe = stripe
+        self._slot = slot
     
     def get_name(self) -> str:
         """Get the name of the bank account."""
@@ -49,9 +61,14 @@ class Bank:
         
         Returns:
             The current balance
+            
+        Raises:
+            WrongShardException: If the account was handed over to another shard
+            OverloadedException: If the account is coming back to this shard
         """
-        with self._lock:
-            return self.balance
+        with self._stripe.lock:
+            self._check_registered()
+            return self._stripe.balances[self._slot]
     
     def deposit(self, amount: int, idempotency_key: str) -> str:
         """
@@ -66,25 +83,33 @@ class Bank:
             
         Raises:
             ValueError: If the amount is less than 1
+            WrongShardException: If the account was handed over to another shard
+            OverloadedException: If the account is coming back to this shard
         """
-        logger.info(f"Bank '{self.name}': deposit for {amount}, key is {idempotency_key}")
+        logger.info("Bank '%s': deposit for %s, key is %s", self.name, amount, idempotency_key)
         
         if amount < 1:
             raise ValueError(f"Invalid deposit amount: {amount}")
         
-        with self._lock:
-            if idempotency_key in self.requests:
-                return self.requests[idempotency_key]
+        registry = self._registry
+        with self._locked("deposit"):
+            previous_tx_id = registry.find_transaction_id(self.name, idempotency_key)
+            if previous_tx_id is not None:
+                return previous_tx_id
             
-            self.balance += amount
-            tx_id = self._generate_transaction_id("D", 10)
-            self.requests[idempotency_key] = tx_id
+            balance = self._stripe.balances[self._slot] + amount
+            self._stripe.balances[self._slot] = balance
+            tx_id = self.generate_transaction_id("D", 10)
+            registry.idempotency.put(self.name, idempotency_key, tx_id)
             
-            self.repository.update_balance(self.name, self.balance)
-            self.repository.log_transaction("deposit", amount, tx_id, idempotency_key, self.name)
-            
-            logger.debug(f"Bank '{self.name}': deposit complete for {amount}, txID is {tx_id}")
-            return tx_id
+            registry.repository.update_balance(self.name, balance)
+            registry.repository.log_transaction("deposit", amount, tx_id, idempotency_key, self.name)
+            if registry.ledger is not None:
+                registry.ledger.append_event(self.name, "deposit", amount, balance, tx_id)
+        
+        # Logged after the lock is released, so it never adds to the hold time
+        logger.debug("Bank '%s': deposit complete for %s, txID is %s", self.name, amount, tx_id)
+        return tx_id
     
     def withdraw(self, amount: int, idempotency_key: str) -> str:
         """
@@ -100,30 +125,90 @@ class Bank:
         Raises:
             ValueError: If the amount is less than 1
             InsufficientFundsException: If the amount exceeds the balance
+            WrongShardException: If the account was handed over to another shard
+            OverloadedException: If the account is coming back to this shard
         """
-        logger.info(f"Bank '{self.name}': withdraw for {amount}, key is {idempotency_key}")
+        logger.info("Bank '%s': withdraw for %s, key is %s", self.name, amount, idempotency_key)
         
         if amount < 1:
             raise ValueError(f"Invalid withdrawal amount: {amount}")
         
-        with self._lock:
-            if amount > self.balance:
-                raise InsufficientFundsException(f"Insufficient funds: balance={self.balance}, withdrawal={amount}")
+        registry = self._registry
+        with self._locked("withdraw"):
+            # A repeated withdrawal is answered before the funds are checked,
+            # as the balance no longer includes the money it took
+            previous_tx_id = registry.find_transaction_id(self.name, idempotency_key)
+            if previous_tx_id is not None:
+                return previous_tx_id
             
-            if idempotency_key in self.requests:
-                return self.requests[idempotency_key]
+            balance = self._stripe.balances[self._slot]
+            if amount > balance:
+                raise InsufficientFundsException(f"Insufficient funds: balance={balance}, withdrawal={amount}")
             
-            self.balance -= amount
-            tx_id = self._generate_transaction_id("W", 10)
-            self.requests[idempotency_key] = tx_id
+            balance -= amount
+            self._stripe.balances[self._slot] = balance
+            tx_id = self.generate_transaction_id("W", 10)
+            registry.idempotency.put(self.name, idempotency_key, tx_id)
             
-            self.repository.update_balance(self.name, self.balance)
-            self.repository.log_transaction("withdraw", amount, tx_id, idempotency_key, self.name)
+            registry.repository.update_balance(self.name, balance)
+            registry.repository.log_transaction("withdraw", amount, tx_id, idempotency_key, self.name)
+            if registry.ledger is not None:
+                registry.ledger.append_event(self.name, "withdraw", -amount, balance, tx_id)
+        
+        # Logged after the lock is released, so it never adds to the hold time
+        logger.debug("Bank '%s': withdraw complete for %s, txID is %s", self.name, amount, tx_id)
+        return tx_id
+    
+    @contextmanager
+    def _locked(self, operation: str) -> Iterator[None]:
+        """
+        Hold the account's lock stripe, recording the wait for it as a span.
+        
+        Args:
+            operation: The operation that needs the lock, for the span
             
-            logger.debug(f"Bank '{self.name}': withdraw complete for {amount}, txID is {tx_id}")
-            return tx_id
+        Raises:
+            WrongShardException: If the account was handed over to another shard
+            OverloadedException: If the account is coming back to this shard
+        """
+        with tracer.start_as_current_span("Bank.lock_wait", attributes={
+            "bank.name": self.name,
+            "bank.operation": operation
+        }) as span:
+            lock = self._stripe.lock
+            contended = not lock.acquire(blocking=False)
+            if contended:
+                lock.acquire()
+            span.set_attribute("bank.lock_contended", contended)
+        try:
+            self._check_registered()
+            yield
+        finally:
+            lock.release()
+    
+    def _check_registered(self) -> None:
+        """
+        Check that the account is owned and registered in this handle's slot.
+        
+        Callers hold the stripe lock.
+        
+        Raises:
+            WrongShardException: If the account was handed over to another shard
+            OverloadedException: If the account is coming back to this shard
+                and has not been loaded again yet
+        """
+        self._registry.check_owned(self.name)
+        slot = self._stripe.slots.get(self.name)
+        if slot == self._slot:
+            return
+        if slot is None:
+            raise OverloadedException(f"Bank {self.name} is being handed back to this shard",
+                                      HANDOFF_RETRY_AFTER)
+        # Registered again after a handoff; the old slot's balance is stale
+        self._slot = slot
     
-    def _generate_transaction_id(self, prefix: str, length: int) -> str:
+    @staticmethod
+    def generate_transaction_id(prefix: str, length: int) -> str:
         """
         Generate a random transaction ID.
         
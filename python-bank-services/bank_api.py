@@ -0,0 +1,193 @@
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+import msgpack
+
+from wire_format import MSGPACK_MIMETYPE, SHARD_OWNER_HEADER
+
+# Statuses a bank can be set to
+BANK_STATUSES = ("ACTIVE", "STOPPED")
+
+class NoSuchBankException(Exception):
+    """Exception raised for a request about a bank that does not exist."""
+    pass
+
+class BankStoppedException(Exception):
+    """Exception raised for an operation on a stopped bank."""
+    pass
+
+def decode_params(args: Dict[str, Any], mimetype: str, body: Optional[bytes]) -> Dict[str, Any]:
+    """
+    Get the parameters of an API request.
+    
+    Query parameters are always accepted. A MessagePack request body, if
+    present, is decoded and its fields take precedence.
+    
+    Args:
+        args: The query parameters
+        mimetype: The media type of the request body
+        body: The request body, or None if there is none
+    
+    Returns:
+        The request parameters
+    
+    Raises:
+        ValueError: If the body is not a MessagePack map
+    """
+    params = dict(args)
+    if mimetype == MSGPACK_MIMETYPE and body:
+        decoded = msgpack.unpackb(body)
+        if not isinstance(decoded, dict):
+            raise ValueError("A MessagePack request body must be a map")
+        params.update(decoded)
+    return params
+
+def error_payload(message: str, code: int, retry_after: Optional[float] = None,
+                  shard_owner: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """
+    Build the fields and headers of an API error response.
+    
+    Args:
+        message: A human-readable description of the error
+        code: The ErrorCode that clients use to classify the error
+        retry_after: Seconds after which the client may retry, sent both in
+            the Retry-After header and in the response
+        shard_owner: The address of the shard that owns the account, sent
+            both in the SHARD_OWNER_HEADER header and in the response
+    
+    Returns:
+        The response fields and headers
+    """
+    payload: Dict[str, Any] = {
+        "status": "ERROR",
+        "code": code,
+        "message": message
+    }
+    headers = {}
+    if retry_after is not None:
+        payload["retryAfter"] = retry_after
+        headers["Retry-After"] = str(retry_after)
+    if shard_owner is not None:
+        payload["shardOwner"] = shard_owner
+        headers[SHARD_OWNER_HEADER] = shard_owner
+    return payload, headers
+
+def bank_name_param(params: Dict[str, Any]) -> str:
+    """
+    Get the bank name of a request.
+    
+    Args:
+        params: The request parameters
+    
+    Returns:
+        The bank name
+    
+    Raises:
+        ValueError: If the bank name is missing
+    """
+    bank_name = params.get('bankName')
+    if not bank_name:
+        raise ValueError("Bank name is required")
+    return bank_name
+
+def create_bank_params(params: Dict[str, Any]) -> Tuple[str, int]:
+    """
+    Get the parameters of a bank creation.
+    
+    Args:
+        params: The request parameters
+    
+    Returns:
+        The bank name and initial balance
+    
+    Raises:
+        ValueError: If a parameter is missing or malformed
+    """
+    bank_name = bank_name_param(params)
+    try:
+        return bank_name, int(params.get('initialBalance', 0))
+    except ValueError:
+        raise ValueError("Initial balance must be a number") from None
+
+def transfer_params(params: Dict[str, Any]) -> Tuple[str, int, str]:
+    """
+    Get the parameters of a deposit or withdrawal.
+    
+    Args:
+        params: The request parameters
+    
+    Returns:
+        The bank name, amount and idempotency key
+    
+    Raises:
+        ValueError: If a parameter is missing or malformed
+    """
+    bank_name = params.get('bankName')
+    amount = params.get('amount')
+    idempotency_key = params.get('idempotencyKey')
+    
+    if not bank_name or not amount or not idempotency_key:
+        raise ValueError("Bank name, amount, and idempotency key are required")
+    
+    try:
+        return bank_name, int(amount), idempotency_key
+    except ValueError:
+        raise ValueError("Amount must be a number") from None
+
+def new_status_param(params: Dict[str, Any]) -> str:
+    """
+    Get the status a request sets a bank to.
+    
+    Args:
+        params: The request parameters
+    
+    Returns:
+        The status, one of BANK_STATUSES
+    
+    Raises:
+        ValueError: If the status is missing or unknown
+    """
+    new_status = params.get('status')
+    if not new_status:
+        raise ValueError("Status is required")
+    if new_status not in BANK_STATUSES:
+        raise ValueError("Status must be either ACTIVE or STOPPED")
+    return new_status
+
+def day_param(day: Optional[str]) -> Optional[str]:
+    """
+    Check the day of a statistics request.
+    
+    Args:
+        day: The day, as YYYY-MM-DD, or None for today
+    
+    Returns:
+        The day in canonical form, or None
+    
+    Raises:
+        ValueError: If the day is malformed
+    """
+    if not day:
+        return None
+    try:
+        return date.fromisoformat(day).isoformat()
+    except ValueError:
+        raise ValueError("Day must be given as YYYY-MM-DD") from None
+
+def check_active(bank_name: str, bank: Any, status: Optional[str]) -> None:
+    """
+    Check that a bank can be operated on.
+    
+    Args:
+        bank_name: The name of the bank
+        bank: The bank, or None if it does not exist
+        status: The status of the bank
+    
+    Raises:
+        NoSuchBankException: If the bank does not exist
+        BankStoppedException: If the bank is stopped
+    """
+    if not bank:
+        raise NoSuchBankException(f"No such bank: {bank_name}")
+    if status == "STOPPED":
+        raise BankStoppedException(f"Bank {bank_name} is currently stopped")
\ No newline at end of file
@@ -1,31 +1,61 @@
+import csv
+import io
 import logging
 import os
 import json
-from flask import Flask, request, jsonify, render_template, redirect, url_for
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import msgpack
+from flask import Flask, Response, g, request, jsonify, render_template, redirect, stream_with_context, url_for
+from opentelemetry import context, propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
 from werkzeug.exceptions import BadRequest
 
+from admission import AdmissionController, OverloadedException
+from bank_api import (BankStoppedException, NoSuchBankException, bank_name_param, check_active, create_bank_params,
+                      day_param, decode_params, error_payload, new_status_param, transfer_params)
 from bank_manager import BankManager
-from bank import InsufficientFundsException
+from bank import Bank, InsufficientFundsException
+from shard_coordinator import ShardCoordinator, WrongShardException
 from json_util import serialize_to_json
 from config.mongodb_config import MongodbConfig
+from wire_format import CSV_MIMETYPE, JSON_MIMETYPE, MSGPACK_MIMETYPE, NDJSON_MIMETYPE, ErrorCode
 
 logger = logging.getLogger(__name__)
 
+tracer = trace.get_tracer(__name__)
+
+# Rows written to the response per chunk of a transaction export
+EXPORT_CHUNK_ROWS = 1000
+
+# Columns of a transaction export, in order
+EXPORT_COLUMNS = ["timestamp", "operation", "amount", "txId", "idempotencyKey"]
+
 class BankController:
     """
     Flask controller for bank API endpoints.
     """
     
-    def __init__(self, bank_manager: BankManager, port: int = 8480):
+    def __init__(self, bank_manager: BankManager, port: int = 8480, ready_after_warmup: bool = False,
+                 admission: Optional[AdmissionController] = None, shards: Optional[ShardCoordinator] = None):
         """
         Initialize the controller.
         
         Args:
             bank_manager: The bank manager to use
             port: The port to run the server on
+            ready_after_warmup: Report ready only once the warm-up has finished
+            admission: Limits the concurrent requests per account and in
+                total; without it, requests are never rejected for load
+            shards: Decides which accounts this instance serves in a sharded
+                deployment; None to serve every account
         """
         self.bank_manager = bank_manager
         self.port = port
+        self.ready_after_warmup = ready_after_warmup
+        self.admission = admission
+        self.shards = shards
         self.app = Flask(__name__, 
                          template_folder='templates',
                          static_folder='static')
@@ -35,16 +65,36 @@ class BankController:
         
         # Configure error handlers
         self._configure_error_handlers()
+        
+        # Record a span for every request
+        self._configure_request_tracing()
     
     def _configure_routes(self):
         """Configure the Flask application routes."""
         # API routes
-        self.app.add_url_rule('/api/createBank', 'create_bank', self.create_bank, methods=['GET'])
-        self.app.add_url_rule('/api/balance', 'get_balance', self.get_balance, methods=['GET'])
-        self.app.add_url_rule('/api/deposit', 'deposit', self.deposit, methods=['GET'])
-        self.app.add_url_rule('/api/withdraw', 'withdraw', self.withdraw, methods=['GET'])
-        self.app.add_url_rule('/api/bankStatus', 'bank_status', self.bank_status, methods=['GET', 'POST'])
+        # POST is accepted for clients that send a MessagePack request body.
+        # Requests about one account are only served by the shard owning it
+        self.app.add_url_rule('/api/createBank', 'create_bank', self._owned(self.create_bank),
+                              methods=['GET', 'POST'])
+        # Account operations go through admission control
+        self.app.add_url_rule('/api/balance', 'get_balance', self._owned(self._admitted(self.get_balance)),
+                              methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/deposit', 'deposit', self._owned(self._admitted(self.deposit)),
+                              methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/withdraw', 'withdraw', self._owned(self._admitted(self.withdraw)),
+                              methods=['GET', 'POST'])
+        self.app.add_url_rule('/api/bankStatus', 'bank_status', self._owned(self.bank_status),
+                              methods=['GET', 'POST'])
         self.app.add_url_rule('/api/banks', 'get_banks', self.get_banks, methods=['GET'])
+        self.app.add_url_rule('/api/stats', 'get_stats', self.get_stats, methods=['GET'])
+        self.app.add_url_rule('/api/ready', 'ready', self.ready, methods=['GET'])
+        self.app.add_url_rule('/api/admissionStats', 'get_admission_stats', self.get_admission_stats,
+                              methods=['GET'])
+        self.app.add_url_rule('/api/memoryStats', 'get_memory_stats', self.get_memory_stats, methods=['GET'])
+        self.app.add_url_rule('/api/shard/ring', 'get_shard_ring', self.get_shard_ring, methods=['GET'])
+        self.app.add_url_rule('/api/shard/handoff', 'shard_handoff', self.shard_handoff, methods=['POST'])
+        self.app.add_url_rule('/api/transactions/export', 'export_transactions', self.export_transactions,
+                              methods=['GET'])
         
         # Web UI routes
         self.app.add_url_rule('/', 'home', self.home)
@@ -55,95 +105,211 @@ class BankController:
         """Configure Flask error handlers."""
         @self.app.errorhandler(InsufficientFundsException)
         def handle_insufficient_funds(error):
-            return jsonify({
-                "status": "ERROR",
-                "message": str(error)
-            }), 400
+            return self._error(str(error), ErrorCode.INSUFFICIENT_FUNDS, 400)
+            
+        @self.app.errorhandler(NoSuchBankException)
+        def handle_no_such_bank(error):
+            return self._error(str(error), ErrorCode.NO_SUCH_BANK, 404)
+            
+        @self.app.errorhandler(BankStoppedException)
+        def handle_bank_stopped(error):
+            return self._error(str(error), ErrorCode.BANK_STOPPED, 400)
+            
+        @self.app.errorhandler(OverloadedException)
+        def handle_overloaded(error):
+            return self._error(str(error), ErrorCode.OVERLOADED, 429, retry_after=error.retry_after)
+            
+        @self.app.errorhandler(WrongShardException)
+        def handle_wrong_shard(error):
+            return self._error(str(error), ErrorCode.WRONG_SHARD, 421, shard_owner=error.owner_address)
             
         @self.app.errorhandler(ValueError)
         def handle_value_error(error):
-            return jsonify({
-                "status": "ERROR",
-                "message": str(error)
-            }), 400
+            return self._error(str(error), ErrorCode.INVALID_REQUEST, 400)
             
         @self.app.errorhandler(404)
         def handle_not_found(error):
-            return jsonify({
-                "status": "ERROR",
-                "message": "Resource not found"
-            }), 404
+            return self._error("Resource not found", ErrorCode.NOT_FOUND, 404)
+    
+    def _configure_request_tracing(self):
+        """
+        Record every request as a server span.
+        
+        The span continues the trace whose context the caller sent in the
+        request headers, and is current while the request is handled, so the
+        lock-wait and MongoDB spans of the request become its children.
+        """
+        @self.app.before_request
+        def start_request_span():
+            route = request.url_rule.rule if request.url_rule else request.path
+            span = tracer.start_span(
+                f"{request.method} {route}",
+                context=propagate.extract(request.headers),
+                kind=SpanKind.SERVER,
+                attributes={"http.method": request.method, "http.route": route}
+            )
+            g.request_span = span
+            g.request_span_token = context.attach(trace.set_span_in_context(span))
+        
+        @self.app.after_request
+        def record_response_status(response):
+            span = g.get("request_span")
+            if span is not None:
+                span.set_attribute("http.status_code", response.status_code)
+                if response.status_code >= 500:
+                    span.set_status(Status(StatusCode.ERROR))
+            return response
+        
+        @self.app.teardown_request
+        def end_request_span(error):
+            span = g.pop("request_span", None)
+            if span is None:
+                return
+            if error is not None:
+                span.record_exception(error)
+                span.set_status(Status(StatusCode.ERROR, str(error)))
+            span.end()
+            context.detach(g.pop("request_span_token"))
+    
+    def _admitted(self, view: Callable) -> Callable:
+        """
+        Wrap an account operation so that it runs under admission control.
+        
+        Args:
+            view: The view function; its bankName parameter selects the account
+            
+        Returns:
+            The wrapped view function
+        """
+        def admitted_view():
+            bank_name = self._request_params().get('bankName')
+            if self.admission is None or not bank_name:
+                return view()
+            with self.admission.admit(bank_name):
+                return view()
+        
+        admitted_view.__doc__ = view.__doc__
+        return admitted_view
+    
+    def _owned(self, view: Callable) -> Callable:
+        """
+        Wrap an account endpoint so that it is only served by the account's shard.
+        
+        Args:
+            view: The view function; its bankName parameter selects the account
+            
+        Returns:
+            The wrapped view function
+        """
+        def owned_view():
+            bank_name = self._request_params().get('bankName')
+            if self.shards is not None and bank_name:
+                self.shards.check(bank_name)
+            return view()
+        
+        owned_view.__doc__ = view.__doc__
+        return owned_view
     
     def start(self):
         """Start the Flask application."""
-        self.app.run(host='0.0.0.0', port=self.port)
+        # Each request is served on its own thread; account state is safe to
+        # share because the registry serializes access per stripe
+        self.app.run(host='0.0.0.0', port=self.port, threaded=True)
+    
+    # ===== Content Negotiation =====
+    
+    def _request_params(self) -> Dict[str, Any]:
+        """
+        Get the parameters of the current API request.
+        
+        Returns:
+            The request parameters, see decode_params
+        """
+        return decode_params(request.args.to_dict(), request.mimetype,
+                             request.get_data() if request.content_length else None)
+    
+    def _respond(self, payload: Dict[str, Any], http_status: int = 200,
+                 headers: Optional[Dict[str, str]] = None):
+        """
+        Build an API response in the format the client asked for.
+        
+        Args:
+            payload: The response fields
+            http_status: The HTTP status code
+            headers: Extra response headers
+            
+        Returns:
+            A MessagePack response if the client prefers it, JSON otherwise
+        """
+        if request.accept_mimetypes.best_match([JSON_MIMETYPE, MSGPACK_MIMETYPE]) == MSGPACK_MIMETYPE:
+            return Response(msgpack.packb(payload), status=http_status, mimetype=MSGPACK_MIMETYPE,
+                            headers=headers)
+        return jsonify(payload), http_status, headers or {}
+    
+    def _error(self, message: str, code: int, http_status: int, retry_after: Optional[float] = None,
+               shard_owner: Optional[str] = None):
+        """
+        Build an API error response.
+        
+        Args:
+            message: A human-readable description of the error
+            code: The ErrorCode that clients use to classify the error
+            http_status: The HTTP status code
+            retry_after: Seconds after which the client may retry
+            shard_owner: The address of the shard that owns the account
+        """
+        payload, headers = error_payload(message, code, retry_after, shard_owner)
+        return self._respond(payload, http_status, headers or None)
     
     # ===== API Endpoints =====
     
+    # Missing or malformed parameters raise ValueError, and operations on a
+    # missing or stopped bank raise NoSuchBankException or
+    # BankStoppedException; the error handlers turn them into responses
+    
     def create_bank(self):
         """
         Create a new bank account.
         
         URL: /api/createBank?bankName={name}&initialBalance={balance}
         """
-        bank_name = request.args.get('bankName')
-        initial_balance = request.args.get('initialBalance', 0)
-        
-        if not bank_name:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Bank name is required"
-            }), 400
-        
-        try:
-            initial_balance = int(initial_balance)
-        except ValueError:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Initial balance must be a number"
-            }), 400
+        bank_name, initial_balance = create_bank_params(self._request_params())
+        self.bank_manager.create_bank(bank_name, initial_balance)
         
-        bank = self.bank_manager.create_bank(bank_name, initial_balance)
-        
-        return jsonify({
+        return self._respond({
             "status": "SUCCESS",
             "message": "Bank created successfully"
         })
     
+    def _active_bank(self, bank_name: str) -> Bank:
+        """
+        Get a bank that exists and is not stopped.
+        
+        Args:
+            bank_name: The name of the bank
+            
+        Returns:
+            The bank
+            
+        Raises:
+            NoSuchBankException: If the bank does not exist
+            BankStoppedException: If the bank is stopped
+        """
+        bank = self.bank_manager.get_bank(bank_name)
+        check_active(bank_name, bank, self.bank_manager.get_bank_status(bank_name) if bank else None)
+        return bank
+    
     def get_balance(self):
         """
         Get the balance of a bank account.
         
         URL: /api/balance?bankName={name}
         """
-        bank_name = request.args.get('bankName')
-        
-        if not bank_name:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Bank name is required"
-            }), 400
-        
-        bank = self.bank_manager.get_bank(bank_name)
-        
-        if not bank:
-            return jsonify({
-                "status": "ERROR",
-                "message": f"No such bank: {bank_name}"
-            }), 404
-        
-        status = self.bank_manager.get_bank_status(bank_name)
-        if status == "STOPPED":
-            return jsonify({
-                "status": "ERROR",
-                "message": f"Bank {bank_name} is currently stopped"
-            }), 400
-            
-        balance = bank.get_balance()
+        bank = self._active_bank(bank_name_param(self._request_params()))
         
-        return jsonify({
+        return self._respond({
             "status": "SUCCESS",
-            "balance": balance
+            "balance": bank.get_balance()
         })
     
     def deposit(self):
@@ -152,51 +318,13 @@ class BankController:
         
         URL: /api/deposit?bankName={name}&amount={amount}&idempotencyKey={key}
         """
-        bank_name = request.args.get('bankName')
-        amount = request.args.get('amount')
-        idempotency_key = request.args.get('idempotencyKey')
+        bank_name, amount, idempotency_key = transfer_params(self._request_params())
+        tx_id = self._active_bank(bank_name).deposit(amount, idempotency_key)
         
-        if not bank_name or not amount or not idempotency_key:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Bank name, amount, and idempotency key are required"
-            }), 400
-        
-        try:
-            amount = int(amount)
-        except ValueError:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Amount must be a number"
-            }), 400
-        
-        bank = self.bank_manager.get_bank(bank_name)
-        
-        if not bank:
-            return jsonify({
-                "status": "ERROR",
-                "message": f"No such bank: {bank_name}"
-            }), 404
-        
-        status = self.bank_manager.get_bank_status(bank_name)
-        if status == "STOPPED":
-            return jsonify({
-                "status": "ERROR",
-                "message": f"Bank {bank_name} is currently stopped"
-            }), 400
-            
-        try:
-            tx_id = bank.deposit(amount, idempotency_key)
-            
-            return jsonify({
-                "status": "SUCCESS",
-                "transaction-id": tx_id
-            })
-        except ValueError as e:
-            return jsonify({
-                "status": "ERROR",
-                "message": str(e)
-            }), 400
+        return self._respond({
+            "status": "SUCCESS",
+            "transaction-id": tx_id
+        })
     
     def withdraw(self):
         """
@@ -204,51 +332,13 @@ class BankController:
         
         URL: /api/withdraw?bankName={name}&amount={amount}&idempotencyKey={key}
         """
-        bank_name = request.args.get('bankName')
-        amount = request.args.get('amount')
-        idempotency_key = request.args.get('idempotencyKey')
-        
-        if not bank_name or not amount or not idempotency_key:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Bank name, amount, and idempotency key are required"
-            }), 400
-        
-        try:
-            amount = int(amount)
-        except ValueError:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Amount must be a number"
-            }), 400
+        bank_name, amount, idempotency_key = transfer_params(self._request_params())
+        tx_id = self._active_bank(bank_name).withdraw(amount, idempotency_key)
         
-        bank = self.bank_manager.get_bank(bank_name)
-        
-        if not bank:
-            return jsonify({
-                "status": "ERROR",
-                "message": f"No such bank: {bank_name}"
-            }), 404
-        
-        status = self.bank_manager.get_bank_status(bank_name)
-        if status == "STOPPED":
-            return jsonify({
-                "status": "ERROR",
-                "message": f"Bank {bank_name} is currently stopped"
-            }), 400
-            
-        try:
-            tx_id = bank.withdraw(amount, idempotency_key)
-            
-            return jsonify({
-                "status": "SUCCESS",
-                "transaction-id": tx_id
-            })
-        except (ValueError, InsufficientFundsException) as e:
-            return jsonify({
-                "status": "ERROR",
-                "message": str(e)
-            }), 400
+        return self._respond({
+            "status": "SUCCESS",
+            "transaction-id": tx_id
+        })
     
     def bank_status(self):
         """
@@ -257,52 +347,25 @@ class BankController:
         GET: /api/bankStatus?bankName={name}
         POST: /api/bankStatus?bankName={name}&status={status}
         """
-        bank_name = request.args.get('bankName')
-        
-        if not bank_name:
-            return jsonify({
-                "status": "ERROR",
-                "message": "Bank name is required"
-            }), 400
+        params = self._request_params()
+        bank_name = bank_name_param(params)
         
         if request.method == 'POST':
-            new_status = request.args.get('status')
-            
-            if not new_status:
-                return jsonify({
-                    "status": "ERROR",
-                    "message": "Status is required"
-                }), 400
-                
-            if new_status not in ["ACTIVE", "STOPPED"]:
-                return jsonify({
-                    "status": "ERROR",
-                    "message": "Status must be either ACTIVE or STOPPED"
-                }), 400
+            new_status = new_status_param(params)
+            if not self.bank_manager.set_bank_status(bank_name, new_status):
+                raise NoSuchBankException(f"No such bank: {bank_name}")
                 
-            success = self.bank_manager.set_bank_status(bank_name, new_status)
-            
-            if not success:
-                return jsonify({
-                    "status": "ERROR",
-                    "message": f"No such bank: {bank_name}"
-                }), 404
-                
-            return jsonify({
+            return self._respond({
                 "status": "SUCCESS",
                 "message": f"Bank status updated to {new_status}"
             })
         else:
             # GET request
             status = self.bank_manager.get_bank_status(bank_name)
-            
             if status is None:
-                return jsonify({
-                    "status": "ERROR",
-                    "message": f"No such bank: {bank_name}"
-                }), 404
+                raise NoSuchBankException(f"No such bank: {bank_name}")
                 
-            return jsonify({
+            return self._respond({
                 "status": "SUCCESS",
                 "bankStatus": status
             })
@@ -324,11 +387,222 @@ class BankController:
                 "status": status
             })
         
-        return jsonify({
+        return self._respond({
             "status": "SUCCESS",
             "banks": bank_list
         })
     
+    def get_stats(self):
+        """
+        Get the global and per-account transaction statistics.
+        
+        The statistics are maintained incrementally as transactions are
+        logged, so this reads a few documents instead of scanning.
+        
+        URL: /api/stats?bankName={name}&day={YYYY-MM-DD}
+        """
+        bank_name = request.args.get('bankName')
+        day = day_param(request.args.get('day'))
+        
+        if bank_name and self.bank_manager.get_bank_status(bank_name) is None:
+            raise NoSuchBankException(f"No such bank: {bank_name}")
+        
+        return self._respond({
+            "status": "SUCCESS",
+            **self.bank_manager.get_stats(bank_name, day)
+        })
+    
+    def get_admission_stats(self):
+        """
+        Get the current load seen by admission control.
+        
+        URL: /api/admissionStats
+        """
+        if self.admission is None:
+            return self._error("Admission control is disabled", ErrorCode.NOT_FOUND, 404)
+        return self._respond({
+            "status": "SUCCESS",
+            **self.admission.stats()
+        })
+    
+    def ready(self):
+        """
+        Report whether the service is ready for traffic, with the warm-up progress.
+        
+        The service is ready as soon as it is listening, unless it was started
+        to be ready only after the warm-up. A failed warm-up does not keep it
+        unready, since accounts are still loaded when first used.
+        
+        URL: /api/ready
+        """
+        warmup = self.bank_manager.get_warmup_progress()
+        is_ready = not self.ready_after_warmup or warmup["state"] in ("done", "failed")
+        return self._respond({
+            "status": "SUCCESS",
+            "ready": is_ready,
+            "warmup": warmup
+        }, 200 if is_ready else 503)
+    
+    def get_memory_stats(self):
+        """
+        Get the estimated memory used by the in-memory account registry.
+        
+        URL: /api/memoryStats
+        """
+        return self._respond({
+            "status": "SUCCESS",
+            **self.bank_manager.get_memory_stats()
+        })
+    
+    def get_shard_ring(self):
+        """
+        Get the shard ring this instance uses and the progress of a rebalance.
+        
+        URL: /api/shard/ring
+        """
+        if self.shards is None:
+            return self._error("Sharding is disabled", ErrorCode.NOT_FOUND, 404)
+        return self._respond({
+            "status": "SUCCESS",
+            **self.shards.status()
+        })
+    
+    def shard_handoff(self):
+        """
+        Accept the accounts another shard handed over for a new ring version.
+        
+        The body is JSON: {"version": ..., "fromShard": ..., "accounts":
+        {bankName: {idempotencyKey: txId}}}.
+        
+        URL: POST /api/shard/handoff
+        """
+        if self.shards is None:
+            return self._error("Sharding is disabled", ErrorCode.NOT_FOUND, 404)
+        
+        body = request.get_json(silent=True) or {}
+        version = body.get('version')
+        from_shard = body.get('fromShard')
+        accounts = body.get('accounts', {})
+        if not isinstance(version, int) or not from_shard or not isinstance(accounts, dict):
+            return self._error("version and fromShard are required", ErrorCode.INVALID_REQUEST, 400)
+        
+        return self._respond({
+            "status": "SUCCESS",
+            "accounts": self.shards.receive_handoff(version, from_shard, accounts)
+        })
+    
+    def export_transactions(self):
+        """
+        Export the transactions of a bank account, oldest first.
+        
+        The response is streamed with chunked encoding. Transactions are read
+        from a batched cursor and written EXPORT_CHUNK_ROWS rows at a time,
+        so memory use does not depend on the number of transactions.
+        
+        URL: /api/transactions/export?bankName={name}&from={iso time}&to={iso time}&format={ndjson|csv}
+        """
+        bank_name = request.args.get('bankName')
+        export_format = request.args.get('format', 'ndjson')
+        
+        if not bank_name:
+            return self._error("Bank name is required", ErrorCode.INVALID_REQUEST, 400)
+        if export_format not in ('ndjson', 'csv'):
+            return self._error("Format must be ndjson or csv", ErrorCode.INVALID_REQUEST, 400)
+        
+        try:
+            start = self._parse_time(request.args.get('from'))
+            end = self._parse_time(request.args.get('to'))
+        except ValueError:
+            return self._error("from and to must be ISO 8601 times", ErrorCode.INVALID_REQUEST, 400)
+        
+        if self.bank_manager.get_bank_status(bank_name) is None:
+            return self._error(f"No such bank: {bank_name}", ErrorCode.NO_SUCH_BANK, 404)
+        
+        transactions = self.bank_manager.iter_transactions(bank_name, start, end)
+        if export_format == 'csv':
+            chunks, mimetype = self._csv_chunks(transactions), CSV_MIMETYPE
+        else:
+            chunks, mimetype = self._ndjson_chunks(transactions), NDJSON_MIMETYPE
+        
+        response = Response(stream_with_context(chunks), mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename={bank_name}-transactions.{export_format}"
+        return response
+    
+    def _parse_time(self, value: Optional[str]) -> Optional[datetime]:
+        """
+        Parse an optional ISO 8601 time from the query string.
+        
+        Transactions are stamped with the server's naive local time, so a
+        time with a UTC offset is converted to local time and compared
+        without it; a time without an offset is taken as local time.
+        
+        Args:
+            value: The query parameter, or None if it was not given
+            
+        Returns:
+            The time, or None if no value was given
+            
+        Raises:
+            ValueError: If the value is not an ISO 8601 time
+        """
+        if not value:
+            return None
+        parsed = datetime.fromisoformat(value)
+        if parsed.tzinfo is not None:
+            parsed = parsed.astimezone().replace(tzinfo=None)
+        return parsed
+    
+    def _ndjson_chunks(self, transactions: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        """
+        Encode transactions as newline-delimited JSON, a chunk at a time.
+        
+        Args:
+            transactions: The transactions to encode
+            
+        Returns:
+            An iterator over the chunks
+        """
+        lines = []
+        for transaction in transactions:
+            lines.append(serialize_to_json({column: transaction.get(column) for column in EXPORT_COLUMNS}) + "\n")
+            if len(lines) >= EXPORT_CHUNK_ROWS:
+                yield "".join(lines)
+                lines = []
+        if lines:
+            yield "".join(lines)
+    
+    def _csv_chunks(self, transactions: Iterator[Dict[str, Any]]) -> Iterator[str]:
+        """
+        Encode transactions as CSV with a header row, a chunk at a time.
+        
+        Args:
+            transactions: The transactions to encode
+            
+        Returns:
+            An iterator over the chunks
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        rows = 0
+        for transaction in transactions:
+            timestamp = transaction.get("timestamp")
+            writer.writerow([
+                timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+                transaction.get("operation"),
+                transaction.get("amount"),
+                transaction.get("txId"),
+                transaction.get("idempotencyKey")
+            ])
+            rows += 1
+            if rows >= EXPORT_CHUNK_ROWS:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+                rows = 0
+        if buffer.tell():
+            yield buffer.getvalue()
+    
     # ===== Web UI Routes =====
     
     def home(self):
@@ -348,7 +622,9 @@ class BankController:
                 "status": status
             })
         
-        return render_template('banks_list.html', banks=bank_list)
+        stats = self.bank_manager.get_stats()
+        
+        return render_template('banks_list.html', banks=bank_list, stats=stats)
     
     def bank_detail(self, bank_name):
         """
@@ -1,56 +1,156 @@
 import logging
-from typing import Dict, List, Optional
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
 
+from account_registry import DEFAULT_IDEMPOTENCY_CACHE_SIZE, DEFAULT_LOCK_STRIPES, AccountRegistry
 from bank import Bank
 from repository.bank_repository import BankRepository
+from repository.ledger_repository import LedgerRepository
+from shard_coordinator import ShardCoordinator
 
 logger = logging.getLogger(__name__)
 
+# Which accounts the startup warm-up loads
+WARMUP_NONE = "none"
+WARMUP_ACTIVE = "active"
+WARMUP_ALL = "all"
+
 class BankManager:
     """
     Manages a collection of bank accounts.
+    
+    Accounts are registered in a compact AccountRegistry the first time they
+    are used, so startup does not depend on the number of accounts. In a
+    sharded deployment, only the accounts this shard owns are registered.
     """
     
-    def __init__(self, repository: BankRepository):
+    def __init__(self, repository: BankRepository, ledger: Optional[LedgerRepository] = None,
+                 lock_stripes: int = DEFAULT_LOCK_STRIPES,
+                 idempotency_cache_size: int = DEFAULT_IDEMPOTENCY_CACHE_SIZE,
+                 shards: Optional[ShardCoordinator] = None):
         """
         Initialize the bank manager.
         
         Args:
             repository: The repository to use for persistence
+            ledger: The ledger that records every balance change, in ledger mode
+            lock_stripes: The number of locks shared by the accounts
+            idempotency_cache_size: The number of idempotency keys remembered
+            shards: Decides which accounts this instance owns; None to own all
         """
         self.repository = repository
-        self.banks: Dict[str, Bank] = {}
-        self._load_banks()
+        self.ledger = ledger
+        self.registry = AccountRegistry(repository, ledger, lock_stripes, idempotency_cache_size, shards)
+        self._warmup = {"state": "idle", "loaded": 0, "total": 0}
+        self._warmup_lock = threading.Lock()
     
-    def _load_banks(self) -> None:
-        """Load all banks from the repository."""
-        logger.debug("Loading all banks from repository")
-        banks = self.repository.get_all_banks()
-        for bank_doc in banks:
-            bank_name = bank_doc.get("bankName")
-            if bank_name:
-                self.banks[bank_name] = Bank(bank_name, self.repository)
+    def start_warmup(self, mode: str = WARMUP_ACTIVE, active_days: int = 7) -> None:
+        """
+        Load accounts into the registry in a background thread.
+        
+        Requests are served while it runs; accounts not loaded yet are
+        loaded when first used, as without a warm-up.
+        
+        Args:
+            mode: WARMUP_ACTIVE for the accounts with transactions in the
+                last `active_days` days, WARMUP_ALL for every account, or
+                WARMUP_NONE
+            active_days: How many days back an account counts as active
+        """
+        if mode == WARMUP_NONE:
+            self._set_warmup(state="done")
+            return
+        
+        self._set_warmup(state="running")
+        threading.Thread(target=self._warm_up, args=(mode, active_days), daemon=True,
+                         name="bank-warmup").start()
+    
+    def _warm_up(self, mode: str, active_days: int) -> None:
+        """
+        Load the warm-up accounts with a single projected cursor.
+        
+        In a sharded deployment, accounts owned by other shards are skipped;
+        with WARMUP_ALL, the total then counts them as well.
+        
+        Args:
+            mode: WARMUP_ACTIVE or WARMUP_ALL
+            active_days: How many days back an account counts as active
+        """
+        try:
+            if mode == WARMUP_ALL:
+                bank_names = None
+                total = self.repository.get_stats()["global"]["accountCount"]
+            else:
+                since_day = (date.today() - timedelta(days=active_days)).isoformat()
+                bank_names = [bank_name for bank_name in self.repository.get_active_accounts(since_day)
+                              if self.registry.owns(bank_name)]
+                total = len(bank_names)
+            self._set_warmup(total=total)
+            logger.info(f"Warming up {total} account(s)")
+            
+            loaded = 0
+            for account in self.repository.iter_account_balances(bank_names):
+                if not self.registry.owns(account["bankName"]):
+                    continue
+                self.registry.get_or_load(account["bankName"], lambda balance=account.get("balance", 0): balance)
+                loaded += 1
+                if loaded % 1000 == 0:
+                    self._set_warmup(loaded=loaded)
+            
+            self._set_warmup(state="done", loaded=loaded)
+            logger.info(f"Warm-up complete, {loaded} account(s) loaded")
+        except Exception as e:
+            self._set_warmup(state="failed", error=str(e))
+            logger.error(f"Warm-up failed: {e}", exc_info=True)
+    
+    def _set_warmup(self, **fields: Any) -> None:
+        """
+        Update the warm-up progress.
+        
+        Args:
+            **fields: The progress fields to update
+        """
+        with self._warmup_lock:
+            self._warmup.update(fields)
+    
+    def get_warmup_progress(self) -> Dict[str, Any]:
+        """
+        Get the progress of the startup warm-up.
+        
+        Returns:
+            The warm-up state (idle, running, done or failed), the number of
+            accounts loaded so far and the number to load
+        """
+        with self._warmup_lock:
+            return dict(self._warmup)
     
     def get_bank(self, bank_name: str) -> Optional[Bank]:
         """
-        Get a bank by name, creating it if it doesn't exist.
+        Get a bank by name, registering it on first use.
         
         Args:
             bank_name: The name of the bank to get
             
         Returns:
             The bank object or None if it doesn't exist
+            
+        Raises:
+            WrongShardException: If another shard owns the bank
         """
-        if bank_name not in self.banks:
-            # Check if it exists in the repository
-            account = self.repository.find_account_by_bank_name(bank_name)
-            if account:
-                # Create the bank object for an existing account
-                self.banks[bank_name] = Bank(bank_name, self.repository)
-            else:
-                return None
+        return self.registry.get_or_load(bank_name, lambda: self._stored_balance(bank_name))
+    
+    def _stored_balance(self, bank_name: str) -> Optional[int]:
+        """
+        Get the balance stored for a bank, read from the primary.
         
-        return self.banks.get(bank_name)
+        Args:
+            bank_name: The name of the bank
+            
+        Returns:
+            The balance or None if the bank doesn't exist
+        """
+        return self.repository.find_account_balance(bank_name)
     
     def create_bank(self, bank_name: str, initial_balance: int = 0) -> Bank:
         """
@@ -65,29 +165,76 @@ class BankManager:
         """
         logger.info(f"Creating new bank: {bank_name} with initial balance: {initial_balance}")
         
-        # Check if bank already exists
-        if bank_name in self.banks:
-            return self.banks[bank_name]
+        def load_or_create() -> int:
+            # Runs under the registry stripe lock, so concurrent requests
+            # create the account once
+            balance = self._stored_balance(bank_name)
+            if balance is not None:
+                return balance
+            self.repository.create_account(bank_name, initial_balance)
+            return initial_balance
         
-        # Create new bank in the repository
-        self.repository.create_account(bank_name, initial_balance)
+        return self.registry.get_or_load(bank_name, load_or_create)
+    
+    def get_all_banks(self) -> List[Bank]:
+        """
+        Get all banks this instance owns.
         
-        # Create the bank object
-        bank = Bank(bank_name, self.repository)
-        self.banks[bank_name] = bank
+        Returns:
+            A list of all bank objects, or in a sharded deployment of those
+            owned by this shard
+        """
+        bank_names = [doc["bankName"] for doc in self.repository.get_all_banks()
+                      if doc.get("bankName") and self.registry.owns(doc["bankName"])]
         
-        return bank
+        # Register banks created by other instances; registered banks keep
+        # their in-memory state. The listing may come from a secondary, so
+        # their balances are read again with a single projected cursor
+        missing = [bank_name for bank_name in bank_names if self.registry.get(bank_name) is None]
+        if missing:
+            for account in self.repository.iter_account_balances(missing):
+                self.registry.get_or_load(account["bankName"], lambda balance=account.get("balance", 0): balance)
+        
+        banks = [self.registry.get(bank_name) for bank_name in bank_names]
+        return [bank for bank in banks if bank is not None]
     
-    def get_all_banks(self) -> List[Bank]:
+    def iter_transactions(self, bank_name: str, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the transactions of a bank, oldest first.
+        
+        Args:
+            bank_name: The name of the bank
+            start: Only include transactions at or after this time
+            end: Only include transactions before this time
+            
+        Returns:
+            An iterator over the transaction documents
+        """
+        return self.repository.iter_transactions(bank_name, start, end)
+    
+    def get_stats(self, bank_name: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the pre-aggregated transaction statistics.
+        
+        Args:
+            bank_name: Also return the daily statistics of this bank
+            day: The day of the daily statistics, as YYYY-MM-DD; defaults to today
+            
+        Returns:
+            The global totals, the global totals for the day and, if a bank
+            was given, its totals for the day
+        """
+        return self.repository.get_stats(bank_name, day)
+    
+    def get_memory_stats(self) -> Dict[str, Any]:
         """
-        Get all banks.
+        Get the estimated memory used by the account registry.
         
         Returns:
-            A list of all bank objects
+            The number of registered accounts and the estimated sizes in bytes
         """
-        # Refresh from repository to catch any new banks
-        self._load_banks()
-        return list(self.banks.values())
+        return self.registry.memory_stats()
     
     def get_bank_status(self, bank_name: str) -> Optional[str]:
         """
@@ -115,7 +262,7 @@ class BankManager:
         Returns:
             True if the status was updated, False otherwise
         """
-        if bank_name not in self.banks:
+        if self.get_bank(bank_name) is None:
             return False
         
         if status not in ["ACTIVE", "STOPPED"]:
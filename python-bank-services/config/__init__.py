@@ -1,4 +1,6 @@
 # Make the config directory a Python package
+from .logging_config import LoggingConfig
 from .mongodb_config import MongodbConfig
+from .tracing_config import TracingConfig
 
-__all__ = ["MongodbConfig"]
\ No newline at end of file
+__all__ = ["LoggingConfig", "MongodbConfig", "TracingConfig"]
\ No newline at end of file
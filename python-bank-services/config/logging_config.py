@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as single-line JSON objects.
+    """
+    
+    def __init__(self, service_name: str):
+        """
+        Initialize the formatter.
+        
+        Args:
+            service_name: The service name added to every record
+        """
+        super().__init__()
+        self.service_name = service_name
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as JSON."""
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "service": self.service_name,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+class TextFormatter(logging.Formatter):
+    """
+    Formats records in the classic text format, noting how many earlier
+    records the rate limiter dropped.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        """Format a record as text."""
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" [{suppressed} earlier record(s) suppressed]"
+        return text
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits the INFO and DEBUG records of each logger with a token bucket.
+    
+    Warnings and errors always pass. When records have been dropped, the
+    next record that passes carries their count in its `suppressed`
+    attribute.
+    """
+    
+    def __init__(self, rate: float, burst: int = 0):
+        """
+        Initialize the filter.
+        
+        Args:
+            rate: The records per second each logger may emit
+            burst: The records a quiet logger may emit at once; defaults to
+                one second's worth
+        """
+        super().__init__()
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, List[float]] = {}  # logger -> [tokens, last refill, suppressed]
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Decide whether a record is emitted."""
+        if record.levelno >= logging.WARNING:
+            return True
+        
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(record.name)
+            if bucket is None:
+                bucket = self._buckets[record.name] = [float(self.burst), now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            record.suppressed = int(bucket[2])
+            bucket[2] = 0
+        return True
+
+class _DeferredFormattingQueueHandler(QueueHandler):
+    """
+    Queue handler that queues records unformatted, leaving the formatting
+    to the listener thread. The queue never leaves the process.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class LoggingConfig:
+    """
+    Logging configuration for the bank service.
+    
+    Request threads only filter a record and put it on an in-memory queue;
+    a listener thread formats it and writes it to stdout.
+    """
+    FORMAT_ENV_VARNAME = "LOG_FORMAT"
+    RATE_LIMIT_ENV_VARNAME = "LOG_RATE_LIMIT"
+    DEFAULT_RATE_LIMIT = 50
+    SERVICE_NAME = "bank-services"
+    TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    
+    @staticmethod
+    def configure(level: int = logging.INFO) -> QueueListener:
+        """
+        Route all logging through a queue to a background writer thread.
+        
+        LOG_FORMAT selects "json" (the default) or "text" output, and
+        LOG_RATE_LIMIT the INFO and DEBUG records each logger may emit per
+        second (0 disables the limit).
+        
+        Args:
+            level: The level of the root logger
+        
+        Returns:
+            The running listener; stop it before exiting to flush the queue
+        """
+        if os.getenv(LoggingConfig.FORMAT_ENV_VARNAME, "json").lower() == "text":
+            formatter = TextFormatter(LoggingConfig.TEXT_FORMAT)
+        else:
+            formatter = JsonFormatter(LoggingConfig.SERVICE_NAME)
+        
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        
+        log_queue = queue.SimpleQueue()
+        queue_handler = _DeferredFormattingQueueHandler(log_queue)
+        rate = float(os.getenv(LoggingConfig.RATE_LIMIT_ENV_VARNAME, str(LoggingConfig.DEFAULT_RATE_LIMIT)))
+        if rate > 0:
+            queue_handler.addFilter(RateLimitFilter(rate))
+        
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(level)
+        
+        listener = QueueListener(log_queue, stream_handler)
+        listener.start()
+        return listener
\ No newline at end of file
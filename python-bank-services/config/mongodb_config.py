@@ -1,6 +1,9 @@
 import os
+from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 
+from .tracing_config import TracingConfig
+
 class MongodbConfig:
     """
     MongoDB configuration class similar to the Java MongodbConfig.
@@ -29,5 +32,16 @@ class MongodbConfig:
         Returns:
             The MongoDB database corresponding to the input parameters
         """
-        client = MongoClient(connection_string)
-        return client[database_name]
\ No newline at end of file
+        # Traces every command when tracing is enabled
+        client = MongoClient(connection_string, event_listeners=TracingConfig.mongo_event_listeners())
+        return client[database_name]
+
+    @staticmethod
+    def get_async_database():
+        """
+        Returns the database with the default name for the async server, on a
+        Motor client. The client binds to the event loop on first use.
+        """
+        client = AsyncIOMotorClient(MongodbConfig.CONNECTION_STRING,
+                                    event_listeners=TracingConfig.mongo_event_listeners())
+        return client[MongodbConfig.DATABASE_NAME]
\ No newline at end of file
@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+from pymongo import monitoring
+
+logger = logging.getLogger(__name__)
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Appends finished spans to a file as JSON lines, standing in for a
+    collector during local runs.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Initialize the exporter.
+        
+        Args:
+            path: The file to append to
+        """
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Append a batch of spans to the file."""
+        lines = [json.dumps(json.loads(span.to_json())) + "\n" for span in spans]
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.writelines(lines)
+        return SpanExportResult.SUCCESS
+    
+    def shutdown(self) -> None:
+        """Nothing to release; the file is opened per batch."""
+        pass
+
+class MongoCommandTracer(monitoring.CommandListener):
+    """
+    Records every MongoDB command as a client span.
+    
+    pymongo calls started() on the thread that issues the command, so the
+    span is a child of whatever span is current there, such as the Flask
+    request span.
+    """
+    
+    def __init__(self):
+        """Initialize the listener."""
+        self._tracer = trace.get_tracer(__name__)
+        self._lock = threading.Lock()
+        self._spans: Dict[int, trace.Span] = {}
+    
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        """Start the span of a command."""
+        span = self._tracer.start_span(f"mongodb {event.command_name}", kind=SpanKind.CLIENT, attributes={
+            "db.system": "mongodb",
+            "db.name": event.database_name,
+            "db.operation": event.command_name,
+            "db.mongodb.collection": str(event.command.get(event.command_name, ""))
+        })
+        with self._lock:
+            self._spans[event.request_id] = span
+    
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        """End the span of a command that succeeded."""
+        with self._lock:
+            span = self._spans.pop(event.request_id, None)
+        if span is not None:
+            span.end()
+    
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        """End the span of a command that failed."""
+        with self._lock:
+            span = self._spans.pop(event.request_id, None)
+        if span is not None:
+            span.set_status(Status(StatusCode.ERROR, str(event.failure)))
+            span.end()
+
+class TracingConfig:
+    """
+    OpenTelemetry tracing configuration for the bank service.
+    
+    Tracing is off unless TRACING_EXPORTER is set to "file", which appends
+    spans to TRACING_FILE, or "otlp", which sends them to a collector.
+    """
+    EXPORTER_ENV_VARNAME = "TRACING_EXPORTER"
+    FILE_ENV_VARNAME = "TRACING_FILE"
+    OTLP_ENDPOINT_ENV_VARNAME = "OTEL_EXPORTER_OTLP_TRACES_ENDPOINT"
+    DEFAULT_FILE = "traces.jsonl"
+    DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+    SERVICE_NAME = "bank-services"
+    
+    _enabled = False
+    
+    @staticmethod
+    def configure() -> bool:
+        """
+        Install a global tracer provider if tracing is configured.
+        
+        Returns:
+            True if tracing was enabled
+        """
+        exporter = os.getenv(TracingConfig.EXPORTER_ENV_VARNAME, "none").lower()
+        if exporter == "none":
+            return False
+        
+        if exporter == "file":
+            path = os.getenv(TracingConfig.FILE_ENV_VARNAME, TracingConfig.DEFAULT_FILE)
+            span_exporter = JsonLinesSpanExporter(path)
+            logger.info(f"Writing traces to {path}")
+        elif exporter == "otlp":
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+            
+            endpoint = os.getenv(TracingConfig.OTLP_ENDPOINT_ENV_VARNAME, TracingConfig.DEFAULT_OTLP_ENDPOINT)
+            span_exporter = OTLPSpanExporter(endpoint=endpoint)
+            logger.info(f"Sending traces to {endpoint}")
+        else:
+            raise ValueError(f"Unsupported tracing exporter: {exporter}")
+        
+        provider = TracerProvider(resource=Resource.create({SERVICE_NAME: TracingConfig.SERVICE_NAME}))
+        provider.add_span_processor(BatchSpanProcessor(span_exporter))
+        trace.set_tracer_provider(provider)
+        TracingConfig._enabled = True
+        return True
+    
+    @staticmethod
+    def is_enabled() -> bool:
+        """Check whether configure() enabled tracing."""
+        return TracingConfig._enabled
+    
+    @staticmethod
+    def mongo_event_listeners() -> List[monitoring.CommandListener]:
+        """
+        Get the pymongo event listeners to register on the MongoClient.
+        
+        Returns:
+            A command tracer if tracing is enabled, otherwise no listeners
+        """
+        return [MongoCommandTracer()] if TracingConfig._enabled else []
\ No newline at end of file
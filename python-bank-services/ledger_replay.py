@@ -0,0 +1,222 @@
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from config.mongodb_config import MongodbConfig
+from repository.bank_repository import BankRepository
+from repository.bank_repository_impl import BankRepositoryImpl
+from repository.ledger_repository import LedgerRepository
+from repository.ledger_repository_impl import LedgerRepositoryImpl
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ReplayResult:
+    """
+    The outcome of replaying the ledger of one account.
+    
+    Attributes:
+        bank_name: The name of the bank account
+        balance: The balance rebuilt from the ledger
+        last_seq: The sequence number of the last event replayed
+        snapshot_seq: The sequence number of the snapshot the replay started
+            from, or 0 if it started from the first event
+        events_replayed: The number of events read after the snapshot
+        stored_balance: The balance stored on the account document, if any
+        ledger_consistent: Whether the events followed each other without a
+            gap and each event's recorded balance matched the running total
+        matches_stored: Whether the rebuilt balance matches the stored one
+    """
+    bank_name: str
+    balance: int
+    last_seq: int
+    snapshot_seq: int
+    events_replayed: int
+    stored_balance: Optional[int]
+    ledger_consistent: bool
+    matches_stored: bool
+    
+    @property
+    def consistent(self) -> bool:
+        """Whether the ledger is self-consistent and agrees with the stored balance."""
+        return self.ledger_consistent and self.matches_stored
+
+class ReplayEngine:
+    """
+    Rebuilds account balances from the ledger.
+    
+    Each account starts from its latest snapshot and applies only the events
+    after it, so the work per account is bounded by the snapshot interval
+    plus any events not yet covered by a snapshot. Accounts are independent
+    and are replayed concurrently.
+    """
+    
+    def __init__(self, ledger: LedgerRepository, repository: BankRepository):
+        """
+        Initialize the engine.
+        
+        Args:
+            ledger: The ledger to replay
+            repository: The repository holding the stored balances
+        """
+        self.ledger = ledger
+        self.repository = repository
+    
+    def replay_account(self, bank_name: str) -> ReplayResult:
+        """
+        Rebuild the balance of one account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The result of the replay
+        """
+        snapshot = self.ledger.latest_snapshot(bank_name)
+        balance = snapshot["balance"] if snapshot else 0
+        snapshot_seq = snapshot["seq"] if snapshot else 0
+        
+        last_seq = snapshot_seq
+        events_replayed = 0
+        ledger_consistent = True
+        for event in self.ledger.iter_events(bank_name, snapshot_seq):
+            if event["seq"] != last_seq + 1:
+                logger.warning(f"Ledger of {bank_name} has a gap: seq {last_seq} is followed by {event['seq']}")
+                ledger_consistent = False
+            balance += event["delta"]
+            if event["balance"] != balance:
+                logger.warning(f"Ledger of {bank_name} records balance {event['balance']} at seq {event['seq']}, "
+                               f"the events add up to {balance}")
+                ledger_consistent = False
+            last_seq = event["seq"]
+            events_replayed += 1
+        
+        stored_balance = self.repository.find_account_balance(bank_name)
+        
+        return ReplayResult(bank_name, balance, last_seq, snapshot_seq, events_replayed, stored_balance,
+                            ledger_consistent, stored_balance == balance)
+    
+    def replay_all(self, bank_names: Optional[List[str]] = None, parallelism: int = 8) -> List[ReplayResult]:
+        """
+        Rebuild the balances of many accounts concurrently.
+        
+        Args:
+            bank_names: The accounts to replay; defaults to every account
+                with a ledger
+            parallelism: The number of accounts replayed at once
+        
+        Returns:
+            The results, in the order of the account names
+        """
+        if bank_names is None:
+            bank_names = self.ledger.get_ledger_accounts()
+        with ThreadPoolExecutor(max_workers=parallelism) as executor:
+            return list(executor.map(self.replay_account, bank_names))
+
+def rebase(ledger: LedgerRepository, result: ReplayResult) -> None:
+    """
+    Restart the ledger of an account from its stored balance.
+    
+    A snapshot of the stored balance is saved at the last sequence number
+    allocated to the account, so later replays start after every event
+    already in the ledger, including a gap or an event written with a wrong
+    balance. The events before the snapshot are kept, but no longer read.
+    
+    Args:
+        ledger: The ledger of the account
+        result: The result of replaying the account
+    """
+    seq = ledger.last_seq(result.bank_name)
+    ledger.save_snapshot(result.bank_name, result.stored_balance, seq)
+    logger.warning(f"{result.bank_name}: ledger is not self-consistent, restarted from the stored balance "
+                   f"{result.stored_balance} at seq {seq} (rebuilt balance was {result.balance})")
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Rebuild account balances from the event ledger.")
+    parser.add_argument("banks", nargs="*", help="accounts to replay (default: every account with a ledger)")
+    parser.add_argument("--parallelism", type=int, default=8, help="accounts replayed at once")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="save a snapshot of every replayed balance, to shorten the next replay")
+    parser.add_argument("--repair", action="store_true",
+                        help="overwrite stored balances that differ from a self-consistent ledger; "
+                             "stop the service first")
+    parser.add_argument("--rebase", action="store_true",
+                        help="restart a ledger that is not self-consistent from a snapshot of the stored "
+                             "balance; check the stored balance and stop the service first")
+    return parser.parse_args()
+
+def main():
+    """Main entry point for the ledger replay command."""
+    load_dotenv()
+    args = parse_args()
+    if args.parallelism < 1:
+        print("Parallelism must be at least 1")
+        sys.exit(1)
+    
+    database = MongodbConfig.get_database()
+    repository = BankRepositoryImpl(database)
+    ledger = LedgerRepositoryImpl(database)
+    engine = ReplayEngine(ledger, repository)
+    
+    start = time.monotonic()
+    results = engine.replay_all(args.banks or None, args.parallelism)
+    elapsed = time.monotonic() - start
+    
+    if args.repair and args.rebase:
+        print("--repair and --rebase cannot be combined")
+        sys.exit(1)
+    
+    mismatches = 0
+    broken_ledgers = 0
+    rebased = 0
+    for result in results:
+        if result.consistent:
+            logger.info(f"{result.bank_name}: balance {result.balance} at seq {result.last_seq} "
+                        f"({result.events_replayed} events after snapshot {result.snapshot_seq})")
+        elif not result.ledger_consistent:
+            # The rebuilt balance cannot be trusted, so it is neither written
+            # back nor snapshotted
+            if args.rebase and result.stored_balance is not None:
+                rebase(ledger, result)
+                rebased += 1
+                continue
+            broken_ledgers += 1
+            logger.error(f"{result.bank_name}: ledger is not self-consistent, balance {result.balance} at seq "
+                         f"{result.last_seq} not trusted, stored balance {result.stored_balance} left as is")
+            continue
+        else:
+            mismatches += 1
+            logger.warning(f"{result.bank_name}: ledger balance {result.balance} at seq {result.last_seq}, "
+                           f"stored balance {result.stored_balance}")
+            if args.repair and result.stored_balance is not None:
+                repository.update_balance(result.bank_name, result.balance)
+                logger.info(f"{result.bank_name}: stored balance set to {result.balance}")
+        
+        if args.snapshot and result.events_replayed:
+            ledger.save_snapshot(result.bank_name, result.balance, result.last_seq)
+    
+    events = sum(result.events_replayed for result in results)
+    logger.info(f"Replayed {len(results)} account(s) and {events} event(s) in {elapsed:.2f}s, "
+                f"{mismatches} disagreeing with the stored balance, {broken_ledgers} with a broken ledger, "
+                f"{rebased} rebased")
+    if broken_ledgers or (mismatches and not args.repair):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -1,12 +1,30 @@
 import os
 import logging
 import sys
+import threading
+import time
+from datetime import timedelta
 from dotenv import load_dotenv
+from pymongo.database import Database
 
+from config.logging_config import LoggingConfig
 from config.mongodb_config import MongodbConfig
+from config.tracing_config import TracingConfig
 from repository.bank_repository_impl import BankRepositoryImpl
-from bank_manager import BankManager
+from repository.handoff_repository_impl import HandoffRepositoryImpl
+from repository.read_routing import DEFAULT_MAX_STALENESS_SECONDS
+from repository.ledger_repository_impl import DEFAULT_SNAPSHOT_INTERVAL, LedgerRepositoryImpl
+from repository.transaction_bucket_store import DEFAULT_BUCKET_SIZE, TransactionBucketStore
+from account_registry import DEFAULT_IDEMPOTENCY_CACHE_SIZE, DEFAULT_LOCK_STRIPES
+from admission import (DEFAULT_ACCOUNT_MAX_IN_FLIGHT, DEFAULT_ACCOUNT_QUEUE_SIZE, DEFAULT_MAX_IN_FLIGHT,
+                       DEFAULT_MAX_WAIT_SECONDS, AdmissionController)
+from bank_manager import WARMUP_ACTIVE, BankManager
 from bank_controller import BankController
+from shard_coordinator import DEFAULT_HANDOFF_DEADLINE_SECONDS, DEFAULT_POLL_SECONDS, ShardCoordinator
+from shard_ring import HashRing, RingConfig, load_ring_file, parse_shards
+from async_bank_manager import AsyncBankManager
+from async_bank_controller import AsyncBankController
+from repository.async_bank_repository_impl import AsyncBankRepositoryImpl
 
 # Configure logging
 logging.basicConfig(
@@ -22,11 +40,135 @@ logger = logging.getLogger(__name__)
 # Default port
 SERVICE_PORT = 8481
 
+# "threaded" for the Flask server, "async" for the asyncio server on Motor
+SERVER_MODE = os.getenv("SERVER_MODE", "threaded").lower()
+
+# Whether every balance change is also appended to the event ledger
+LEDGER_MODE = os.getenv("LEDGER_MODE", "false").lower() == "true"
+
+# Ledger events of an account between balance snapshots
+LEDGER_SNAPSHOT_INTERVAL = int(os.getenv("LEDGER_SNAPSHOT_INTERVAL", str(DEFAULT_SNAPSHOT_INTERVAL)))
+
+# How transactions are stored: "documents" (one per transaction) or "buckets"
+TRANSACTION_STORAGE = os.getenv("TRANSACTION_STORAGE", "documents").lower()
+
+# Transactions per bucket in the bucketed layout
+TRANSACTION_BUCKET_SIZE = int(os.getenv("TRANSACTION_BUCKET_SIZE", str(DEFAULT_BUCKET_SIZE)))
+
+# Age in days after which buckets are moved to the compressed archive
+TRANSACTION_ARCHIVE_DAYS = int(os.getenv("TRANSACTION_ARCHIVE_DAYS", "30"))
+
+# Seconds between archive runs
+TRANSACTION_ARCHIVE_INTERVAL = int(os.getenv("TRANSACTION_ARCHIVE_INTERVAL", "3600"))
+
+# Whether listing, dashboard and account lookups may read from secondaries
+SECONDARY_READS = os.getenv("SECONDARY_READS", "false").lower() == "true"
+
+# How far behind the primary a secondary used for reads may be
+READ_MAX_STALENESS_SECONDS = int(os.getenv("READ_MAX_STALENESS_SECONDS", str(DEFAULT_MAX_STALENESS_SECONDS)))
+
+# Locks shared by all accounts in the account registry
+BANK_LOCK_STRIPES = int(os.getenv("BANK_LOCK_STRIPES", str(DEFAULT_LOCK_STRIPES)))
+
+# Idempotency keys remembered across all accounts
+IDEMPOTENCY_CACHE_SIZE = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", str(DEFAULT_IDEMPOTENCY_CACHE_SIZE)))
+
+# "lazy" to be ready immediately, "warm" to be ready once the warm-up is done
+BANK_STARTUP_MODE = os.getenv("BANK_STARTUP_MODE", "lazy").lower()
+
+# Accounts loaded in the background at startup: "none", "active" or "all"
+BANK_WARMUP = os.getenv("BANK_WARMUP", WARMUP_ACTIVE).lower()
+
+# Days back an account counts as active for the warm-up
+BANK_WARMUP_ACTIVE_DAYS = int(os.getenv("BANK_WARMUP_ACTIVE_DAYS", "7"))
+
+# Admission control: requests served at once in total and per account, the
+# requests that may wait per account, and how long they may wait
+MAX_IN_FLIGHT = int(os.getenv("MAX_IN_FLIGHT", str(DEFAULT_MAX_IN_FLIGHT)))
+ACCOUNT_MAX_IN_FLIGHT = int(os.getenv("ACCOUNT_MAX_IN_FLIGHT", str(DEFAULT_ACCOUNT_MAX_IN_FLIGHT)))
+ACCOUNT_QUEUE_SIZE = int(os.getenv("ACCOUNT_QUEUE_SIZE", str(DEFAULT_ACCOUNT_QUEUE_SIZE)))
+ADMISSION_MAX_WAIT_SECONDS = float(os.getenv("ADMISSION_MAX_WAIT_SECONDS", str(DEFAULT_MAX_WAIT_SECONDS)))
+
+# This instance's shard ID in a sharded deployment; unset to serve every account
+SHARD_ID = os.getenv("SHARD_ID")
+
+# The shard ring: a JSON file that is watched for new versions, or a static
+# list of "id=host:port" entries
+SHARD_RING_FILE = os.getenv("SHARD_RING_FILE")
+SHARD_RING = os.getenv("SHARD_RING", "")
+
+# Seconds between checks of the shard ring file
+SHARD_RING_POLL_SECONDS = float(os.getenv("SHARD_RING_POLL_SECONDS", str(DEFAULT_POLL_SECONDS)))
+
+# Seconds a rebalance waits for missing handoffs before serving the accounts
+# anyway; 0 waits until they arrive
+SHARD_HANDOFF_DEADLINE_SECONDS = float(os.getenv("SHARD_HANDOFF_DEADLINE_SECONDS",
+                                                 str(DEFAULT_HANDOFF_DEADLINE_SECONDS)))
+
+def archive_periodically(bucket_store: TransactionBucketStore) -> None:
+    """
+    Move cold buckets to the archive every TRANSACTION_ARCHIVE_INTERVAL seconds.
+    
+    Args:
+        bucket_store: The store to archive buckets of
+    """
+    while True:
+        try:
+            moved = bucket_store.archive(timedelta(days=TRANSACTION_ARCHIVE_DAYS))
+            if moved:
+                logger.info(f"Moved {moved} transaction bucket(s) to the archive")
+        except Exception as e:
+            logger.error(f"Error archiving transaction buckets: {e}")
+        time.sleep(TRANSACTION_ARCHIVE_INTERVAL)
+
+def run_async_server() -> None:
+    """Serve the API from the asyncio server until it is stopped."""
+    # Ignoring any of these would corrupt data: a shard would serve every
+    # account, transactions logged in buckets would not be found by their
+    # idempotency key, or the ledger would silently fall behind
+    unsupported = [name for name, enabled in (("LEDGER_MODE", LEDGER_MODE),
+                                              ("TRANSACTION_STORAGE=buckets", TRANSACTION_STORAGE == "buckets"),
+                                              ("SHARD_ID", bool(SHARD_ID))) if enabled]
+    if unsupported:
+        logger.error(f"{', '.join(unsupported)} cannot be used with the async server; "
+                     f"unset them or use the threaded server")
+        sys.exit(1)
+    if SECONDARY_READS:
+        logger.warning("Secondary reads are not supported by the async server; every read goes to the primary")
+    
+    repository = AsyncBankRepositoryImpl(MongodbConfig.get_async_database())
+    manager = AsyncBankManager(repository, BANK_LOCK_STRIPES, IDEMPOTENCY_CACHE_SIZE)
+    
+    logger.info("Starting the async server; the web UI is only served by the threaded server")
+    AsyncBankController(manager, SERVICE_PORT).start()
+
+def create_shard_coordinator(database: Database) -> ShardCoordinator:
+    """
+    Create the coordinator of this shard from SHARD_RING_FILE or SHARD_RING.
+    
+    Args:
+        database: The database to record received handoffs in
+    
+    Returns:
+        The coordinator, not started yet
+    """
+    if SHARD_RING_FILE:
+        config = load_ring_file(SHARD_RING_FILE)
+    else:
+        config = RingConfig(0, HashRing(parse_shards(SHARD_RING)))
+    logger.info(f"Sharding enabled as shard {SHARD_ID} of {len(config.ring.shards)}, "
+                f"ring version {config.version}")
+    return ShardCoordinator(SHARD_ID, config, SHARD_RING_FILE, SHARD_RING_POLL_SECONDS,
+                            HandoffRepositoryImpl(database), SHARD_HANDOFF_DEADLINE_SECONDS)
+
 def main():
     """Main entry point for the application."""
     # Load environment variables from .env file if it exists
     load_dotenv()
     
+    # Log through a background thread, so requests never wait on stdout
+    log_listener = LoggingConfig.configure()
+    
     try:
         logger.info("Starting application")
         
@@ -34,15 +176,49 @@ def main():
             logger.error(f"{MongodbConfig.CONN_STRING_ENV_VARNAME} environment variable is not set!")
             sys.exit(1)
         
+        # Tracing must be configured before the MongoDB client is created
+        TracingConfig.configure()
+        
+        if SERVER_MODE == "async":
+            run_async_server()
+            return
+        
         logger.debug("Setting up MongoDB connection")
         database = MongodbConfig.get_database()
-        repository = BankRepositoryImpl(database)
+        
+        bucket_store = None
+        if TRANSACTION_STORAGE == "buckets":
+            logger.info(f"Bucketed transaction storage enabled, {TRANSACTION_BUCKET_SIZE} per bucket, "
+                        f"archived after {TRANSACTION_ARCHIVE_DAYS} days")
+            bucket_store = TransactionBucketStore(database, TRANSACTION_BUCKET_SIZE)
+            threading.Thread(target=archive_periodically, args=(bucket_store,), daemon=True,
+                             name="transaction-archiver").start()
+        if SECONDARY_READS:
+            logger.info(f"Secondary reads enabled, at most {READ_MAX_STALENESS_SECONDS}s stale")
+        repository = BankRepositoryImpl(database, bucket_store, SECONDARY_READS, READ_MAX_STALENESS_SECONDS)
+        
+        # Recompute the statistics once for data written before they were kept
+        if "--rebuild-stats" in sys.argv:
+            repository.rebuild_stats()
+        
+        ledger = None
+        if LEDGER_MODE:
+            logger.info(f"Ledger mode enabled, snapshot every {LEDGER_SNAPSHOT_INTERVAL} events")
+            ledger = LedgerRepositoryImpl(database, LEDGER_SNAPSHOT_INTERVAL)
+        
+        shards = create_shard_coordinator(database) if SHARD_ID else None
         
         logger.debug("Initializing BankManager")
-        manager = BankManager(repository)
+        manager = BankManager(repository, ledger, BANK_LOCK_STRIPES, IDEMPOTENCY_CACHE_SIZE, shards)
+        if shards is not None:
+            shards.start(manager.registry)
+        manager.start_warmup(BANK_WARMUP, BANK_WARMUP_ACTIVE_DAYS)
         
         logger.debug("Starting the server")
-        controller = BankController(manager, SERVICE_PORT)
+        admission = AdmissionController(MAX_IN_FLIGHT, ACCOUNT_MAX_IN_FLIGHT, ACCOUNT_QUEUE_SIZE,
+                                        ADMISSION_MAX_WAIT_SECONDS)
+        controller = BankController(manager, SERVICE_PORT, ready_after_warmup=BANK_STARTUP_MODE == "warm",
+                                    admission=admission, shards=shards)
         
         # Check for --no-web argument
         no_web = "--no-web" in sys.argv
@@ -55,6 +231,8 @@ def main():
     except Exception as e:
         logger.error(f"Error encountered while running the application: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        log_listener.stop()
 
 if __name__ == "__main__":
     main()
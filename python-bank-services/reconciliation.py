@@ -0,0 +1,310 @@
+import argparse
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from dotenv import load_dotenv
+from pymongo.database import Database
+
+from config.mongodb_config import MongodbConfig
+from repository.transaction_bucket_store import ARCHIVE_COLLECTION, BUCKETS_COLLECTION, unwind_buckets
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# _id of the document in reconciliation_checkpoints recording the last run
+CHECKPOINT_ID = "last_run"
+
+# Accounts reconciled by one task
+DEFAULT_RANGE_SIZE = 500
+
+# Seconds a run stops short of the current time. A transaction is stamped by
+# the service just before it is inserted, possibly on another host whose
+# clock differs, so one stamped before the cutoff can still arrive after the
+# run; a later run, which only sums transactions after the cutoff, would
+# then never count it.
+DEFAULT_SETTLE_SECONDS = 60
+
+def aggregate_transactions(database: Database, pipeline: List[Dict[str, Any]],
+                           bucket_filter: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Run an aggregation pipeline over the transactions in every layout.
+    
+    Args:
+        database: The database
+        pipeline: The pipeline over transaction documents
+        bucket_filter: A filter selecting the buckets the pipeline can match
+    
+    Returns:
+        An iterator over the results from all collections
+    """
+    yield from database["transactions"].aggregate(pipeline)
+    for collection in (BUCKETS_COLLECTION, ARCHIVE_COLLECTION):
+        yield from database[collection].aggregate(unwind_buckets(pipeline, bucket_filter))
+
+def reconcile_range(connection_string: str, database_name: str, bank_names: List[str],
+                    cutoff: datetime) -> Dict[str, Any]:
+    """
+    Reconcile a range of accounts. Runs in a worker process.
+    
+    For each account, the deposits and withdrawals logged since the
+    account's own checkpoint, up to the cutoff, are summed with one
+    aggregation served by the (bankName, timestamp) index, plus one over the
+    buckets in the bucketed layout, and added to its
+    running totals in `reconciliation_totals`. The stored balance is then
+    compared with initialBalance + deposits - withdrawals. Because each
+    account records how far it has been summed, a run that is interrupted
+    and repeated never counts a transaction twice.
+    
+    An account created before initialBalance was recorded has nothing to be
+    checked against on its first run, so the balance implied by its history
+    is kept as its baseline in `reconciliation_totals`, never in `accounts`.
+    Later runs check the account against that baseline, and every run
+    reports it as unverified.
+    
+    Args:
+        connection_string: The MongoDB connection string
+        database_name: The name of the database
+        bank_names: The accounts to reconcile
+        cutoff: Only transactions logged at or before this time are summed
+    
+    Returns:
+        The number of accounts and transactions examined, the mismatches and
+        the accounts without an initial balance
+    """
+    database = MongodbConfig.get_database_with_params(database_name, connection_string)
+    accounts_collection = database["accounts"]
+    totals_collection = database["reconciliation_totals"]
+    
+    totals = {doc["_id"]: doc for doc in totals_collection.find({"_id": {"$in": bank_names}})}
+    
+    # Accounts summed up to the same point share one aggregation; normally
+    # that is every account in the range
+    by_checkpoint: Dict[Optional[datetime], List[str]] = {}
+    for bank_name in bank_names:
+        by_checkpoint.setdefault(totals.get(bank_name, {}).get("through"), []).append(bank_name)
+    
+    sums: Dict[str, Dict[str, int]] = {name: {"deposit": 0, "withdraw": 0} for name in bank_names}
+    transactions_scanned = 0
+    for through, names in by_checkpoint.items():
+        time_range: Dict[str, Any] = {"$lte": cutoff}
+        if through is not None:
+            time_range["$gt"] = through
+        pipeline = [
+            {"$match": {"bankName": {"$in": names}, "timestamp": time_range}},
+            {"$group": {"_id": {"bankName": "$bankName", "operation": "$operation"},
+                        "total": {"$sum": "$amount"}, "count": {"$sum": 1}}}
+        ]
+        bucket_filter: Dict[str, Any] = {"bankName": {"$in": names}}
+        if through is not None:
+            bucket_filter["end"] = {"$gt": through}
+        for group in aggregate_transactions(database, pipeline, bucket_filter):
+            sums[group["_id"]["bankName"]][group["_id"]["operation"]] += group["total"]
+            transactions_scanned += group["count"]
+    
+    mismatches = []
+    unverified = []
+    accounts = accounts_collection.find({"bankName": {"$in": bank_names}},
+                                        {"_id": 0, "bankName": 1, "balance": 1, "initialBalance": 1})
+    for account in accounts:
+        bank_name = account["bankName"]
+        previous = totals.get(bank_name, {})
+        deposit_total = previous.get("depositTotal", 0) + sums[bank_name]["deposit"]
+        withdraw_total = previous.get("withdrawTotal", 0) + sums[bank_name]["withdraw"]
+        
+        progress = {"depositTotal": deposit_total, "withdrawTotal": withdraw_total, "through": cutoff}
+        initial_balance = account.get("initialBalance")
+        if initial_balance is None:
+            unverified.append(bank_name)
+            initial_balance = previous.get("baseline")
+            if initial_balance is None:
+                initial_balance = account.get("balance", 0) - deposit_total + withdraw_total
+                progress["baseline"] = initial_balance
+        
+        totals_collection.update_one({"_id": bank_name}, {"$set": progress}, upsert=True)
+        
+        expected = initial_balance + deposit_total - withdraw_total
+        balance = account.get("balance", 0)
+        if balance != expected:
+            # Transactions logged after the cutoff are already in the balance
+            late = aggregate_transactions(database, [
+                {"$match": {"bankName": bank_name, "timestamp": {"$gt": cutoff}}},
+                {"$group": {"_id": "$operation", "total": {"$sum": "$amount"}}}
+            ], {"bankName": bank_name, "end": {"$gt": cutoff}})
+            for group in late:
+                expected += group["total"] if group["_id"] == "deposit" else -group["total"]
+        if balance != expected:
+            mismatches.append({"bankName": bank_name, "balance": balance, "expected": expected})
+    
+    database.client.close()
+    return {"accounts": len(bank_names), "transactions": transactions_scanned, "mismatches": mismatches,
+            "unverified": unverified}
+
+class Reconciler:
+    """
+    Checks that every account balance equals its initial balance plus the
+    sum of its transactions.
+    
+    The accounts to check are split into ranges that are reconciled in
+    parallel by a process pool. A checkpoint records the time each run
+    covered; an incremental run only examines accounts with transactions
+    logged since then.
+    """
+    
+    def __init__(self, connection_string: str, database_name: str, processes: int,
+                 range_size: int = DEFAULT_RANGE_SIZE, settle_seconds: float = DEFAULT_SETTLE_SECONDS):
+        """
+        Initialize the reconciler.
+        
+        Args:
+            connection_string: The MongoDB connection string
+            database_name: The name of the database
+            processes: The number of worker processes
+            range_size: The number of accounts per range
+            settle_seconds: How far before the start of a run its cutoff is
+        """
+        self.connection_string = connection_string
+        self.database_name = database_name
+        self.processes = processes
+        self.range_size = range_size
+        self.settle_seconds = settle_seconds
+        self.database = MongodbConfig.get_database_with_params(database_name, connection_string)
+        self.checkpoints_collection = self.database["reconciliation_checkpoints"]
+        
+        # Finds the accounts with transactions since the last run; the
+        # bucket collections are indexed on "end" by the bucket store
+        self.database["transactions"].create_index("timestamp")
+    
+    def accounts_to_check(self, full: bool) -> List[str]:
+        """
+        Get the accounts a run has to examine, in name order.
+        
+        Args:
+            full: Examine every account instead of only those with new transactions
+        
+        Returns:
+            The account names
+        """
+        checkpoint = self.checkpoints_collection.find_one({"_id": CHECKPOINT_ID})
+        if full or checkpoint is None:
+            names = [doc["bankName"] for doc in self.database["accounts"].find({}, {"_id": 0, "bankName": 1})]
+        else:
+            through = checkpoint["through"]
+            names = set(self.database["transactions"].distinct("bankName", {"timestamp": {"$gt": through}}))
+            for collection in (BUCKETS_COLLECTION, ARCHIVE_COLLECTION):
+                names.update(self.database[collection].distinct("bankName", {"end": {"$gt": through}}))
+        return sorted(names)
+    
+    def run(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Reconcile the accounts and advance the checkpoint.
+        
+        Args:
+            full: Recompute every account from its first transaction
+        
+        Returns:
+            The summary of the run, including the mismatches
+        """
+        start = time.monotonic()
+        cutoff = datetime.now() - timedelta(seconds=self.settle_seconds)
+        if full:
+            # Keep the adopted baselines, so that a full run still checks
+            # accounts without an initial balance against them
+            self.database["reconciliation_totals"].update_many(
+                {}, {"$unset": {"depositTotal": "", "withdrawTotal": "", "through": ""}}
+            )
+        
+        bank_names = self.accounts_to_check(full)
+        ranges = [bank_names[i:i + self.range_size] for i in range(0, len(bank_names), self.range_size)]
+        logger.info(f"Reconciling {len(bank_names)} account(s) in {len(ranges)} range(s) "
+                    f"on {self.processes} process(es)")
+        
+        accounts = transactions = 0
+        mismatches = []
+        unverified = []
+        with ProcessPoolExecutor(max_workers=self.processes) as executor:
+            futures = [
+                executor.submit(reconcile_range, self.connection_string, self.database_name, names, cutoff)
+                for names in ranges
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                accounts += result["accounts"]
+                transactions += result["transactions"]
+                mismatches.extend(result["mismatches"])
+                unverified.extend(result["unverified"])
+        
+        self.checkpoints_collection.update_one(
+            {"_id": CHECKPOINT_ID}, {"$set": {"through": cutoff}}, upsert=True
+        )
+        
+        elapsed = time.monotonic() - start
+        return {
+            "accounts": accounts,
+            "transactions": transactions,
+            "mismatches": sorted(mismatches, key=lambda m: m["bankName"]),
+            "unverified": sorted(unverified),
+            "elapsed_seconds": round(elapsed, 2),
+            "accounts_per_second": round(accounts / elapsed, 1) if elapsed > 0 else 0.0,
+            "transactions_per_second": round(transactions / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Check account balances against their transactions.")
+    parser.add_argument("--full", action="store_true",
+                        help="examine every account, not only those with transactions since the last run")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("--range-size", type=int, default=DEFAULT_RANGE_SIZE, help="accounts per range")
+    parser.add_argument("--settle-seconds", type=float, default=DEFAULT_SETTLE_SECONDS,
+                        help="only sum transactions stamped at least this many seconds before the run; "
+                             "above the longest insert delay plus the clock skew between service hosts")
+    return parser.parse_args()
+
+def main():
+    """Main entry point for the reconciliation command."""
+    load_dotenv()
+    args = parse_args()
+    if args.processes < 1 or args.range_size < 1:
+        print("Processes and range size must be at least 1")
+        sys.exit(1)
+    if args.settle_seconds < 0:
+        print("Settle seconds must not be negative")
+        sys.exit(1)
+    
+    connection_string = os.getenv(MongodbConfig.CONN_STRING_ENV_VARNAME)
+    if connection_string is None:
+        logger.error(f"{MongodbConfig.CONN_STRING_ENV_VARNAME} environment variable is not set!")
+        sys.exit(1)
+    
+    reconciler = Reconciler(connection_string, MongodbConfig.DATABASE_NAME, args.processes, args.range_size,
+                            args.settle_seconds)
+    summary = reconciler.run(args.full)
+    
+    for mismatch in summary["mismatches"]:
+        logger.warning(f"{mismatch['bankName']}: balance {mismatch['balance']}, "
+                       f"transactions imply {mismatch['expected']}")
+    for bank_name in summary["unverified"]:
+        logger.warning(f"{bank_name}: unverified, no initial balance; checked against the baseline "
+                       f"adopted on its first run")
+    logger.info(f"Reconciled {summary['accounts']} account(s) and {summary['transactions']} transaction(s) "
+                f"in {summary['elapsed_seconds']}s ({summary['accounts_per_second']} accounts/s, "
+                f"{summary['transactions_per_second']} transactions/s), "
+                f"{len(summary['mismatches'])} mismatch(es), {len(summary['unverified'])} unverified")
+    if summary["mismatches"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
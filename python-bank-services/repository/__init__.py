@@ -1,5 +1,15 @@
 # Make the repository directory a Python package
+from .async_bank_repository import AsyncBankRepository
+from .async_bank_repository_impl import AsyncBankRepositoryImpl
 from .bank_repository import BankRepository
 from .bank_repository_impl import BankRepositoryImpl
+from .handoff_repository import HandoffRepository
+from .handoff_repository_impl import HandoffRepositoryImpl
+from .ledger_repository import LedgerRepository
+from .ledger_repository_impl import LedgerRepositoryImpl
+from .read_routing import ReadRouting
+from .transaction_bucket_store import TransactionBucketStore
 
-__all__ = ["BankRepository", "BankRepositoryImpl"]
\ No newline at end of file
+__all__ = ["AsyncBankRepository", "AsyncBankRepositoryImpl", "BankRepository", "BankRepositoryImpl",
+           "HandoffRepository", "HandoffRepositoryImpl", "LedgerRepository", "LedgerRepositoryImpl",
+           "ReadRouting", "TransactionBucketStore"]
\ No newline at end of file
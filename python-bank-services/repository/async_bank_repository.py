@@ -0,0 +1,109 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional
+
+class AsyncBankRepository(ABC):
+    """
+    Asynchronous counterpart of the BankRepository interface, for the async
+    server. Every operation is a coroutine, so waiting on the database never
+    holds a thread.
+    """
+    
+    @abstractmethod
+    async def find_account_by_bank_name(self, bank_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a bank account by name.
+        
+        Args:
+            bank_name: The name of the bank account to find
+        
+        Returns:
+            The account document or None if not found
+        """
+        pass
+    
+    @abstractmethod
+    async def create_account(self, bank_name: str, initial_balance: int) -> None:
+        """
+        Create a new bank account.
+        
+        Args:
+            bank_name: The name of the new bank account
+            initial_balance: The initial balance for the account
+        """
+        pass
+    
+    @abstractmethod
+    async def update_balance(self, bank_name: str, new_balance: int) -> None:
+        """
+        Update the balance of a bank account.
+        
+        Args:
+            bank_name: The name of the bank account to update
+            new_balance: The new balance for the account
+        """
+        pass
+    
+    @abstractmethod
+    async def log_transaction(self, operation: str, amount: int, tx_id: str, idempotency_key: str,
+                              bank_name: str) -> None:
+        """
+        Log a transaction.
+        
+        Args:
+            operation: The type of operation (deposit, withdraw)
+            amount: The amount involved in the transaction
+            tx_id: The transaction ID
+            idempotency_key: The idempotency key for the transaction
+            bank_name: The name of the bank account involved
+        """
+        pass
+    
+    @abstractmethod
+    async def find_transaction_id(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        """
+        Find the transaction logged for an idempotency key.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+        
+        Returns:
+            The transaction ID, or None if no transaction has the key
+        """
+        pass
+    
+    @abstractmethod
+    async def get_stats(self, bank_name: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the pre-aggregated transaction statistics.
+        
+        Args:
+            bank_name: Also return the daily statistics of this bank account
+            day: The day of the daily statistics, as YYYY-MM-DD; defaults to today
+        
+        Returns:
+            The global totals, the global totals for the day and, if a bank
+            account was given, its totals for the day
+        """
+        pass
+    
+    @abstractmethod
+    async def get_all_banks(self) -> List[Dict[str, Any]]:
+        """
+        Get all banks.
+        
+        Returns:
+            A list of all bank accounts
+        """
+        pass
+    
+    @abstractmethod
+    async def update_bank_status(self, bank_name: str, status: str) -> None:
+        """
+        Update the status of a bank account.
+        
+        Args:
+            bank_name: The name of the bank account to update
+            status: The new status for the account ('ACTIVE' or 'STOPPED')
+        """
+        pass
\ No newline at end of file
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from .async_bank_repository import AsyncBankRepository
+from .bank_repository_impl import (GLOBAL_TOTALS_QUERY, STATS_FIELDS, global_daily_id, global_totals_id,
+                                   sum_stats)
+
+logger = logging.getLogger(__name__)
+
+class AsyncBankRepositoryImpl(AsyncBankRepository):
+    """
+    MongoDB implementation of the AsyncBankRepository interface, on the Motor
+    driver.
+    
+    It reads and writes the same collections and documents as
+    BankRepositoryImpl in its default layout. It knows nothing of the
+    transaction buckets or the ledger, so only a database that has never
+    used them can be served by either server. Writes that do not depend on
+    each other are sent concurrently.
+    """
+    
+    def __init__(self, database: AsyncIOMotorDatabase):
+        """
+        Initialize the repository with a Motor database.
+        
+        Args:
+            database: Motor database instance
+        """
+        self.database = database
+        self.accounts_collection = database["accounts"]
+        self.transactions_collection = database["transactions"]
+        self.account_stats_collection = database["account_stats"]
+        self.global_stats_collection = database["global_stats"]
+    
+    async def create_indexes(self) -> None:
+        """Create the indexes BankRepositoryImpl creates, if they don't exist."""
+        await asyncio.gather(
+            self.accounts_collection.create_index("bankName", unique=True),
+            self.account_stats_collection.create_index("day"),
+            self.global_stats_collection.create_index("day"),
+            self.transactions_collection.create_index([("bankName", 1), ("timestamp", 1)]),
+            self.transactions_collection.create_index([("bankName", 1), ("idempotencyKey", 1)])
+        )
+    
+    async def find_account_by_bank_name(self, bank_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a bank account by name.
+        
+        Args:
+            bank_name: The name of the bank account to find
+        
+        Returns:
+            The account document or None if not found
+        """
+        return await self.accounts_collection.find_one({"bankName": bank_name})
+    
+    async def create_account(self, bank_name: str, initial_balance: int) -> None:
+        """
+        Create a new bank account.
+        
+        Args:
+            bank_name: The name of the new bank account
+            initial_balance: The initial balance for the account
+        """
+        logger.info(f"Creating account for {bank_name} with initial balance {initial_balance}")
+        await self.accounts_collection.insert_one({
+            "bankName": bank_name,
+            "balance": initial_balance,
+            # Kept so that reconciliation can check balance = initial + transactions
+            "initialBalance": initial_balance,
+            "status": "ACTIVE",
+            "created": datetime.now()
+        })
+        await self.global_stats_collection.update_one(
+            {"_id": global_totals_id(bank_name)},
+            {"$inc": {"accountCount": 1, "totalBalance": initial_balance}},
+            upsert=True
+        )
+    
+    async def update_balance(self, bank_name: str, new_balance: int) -> None:
+        """
+        Update the balance of a bank account.
+        
+        Args:
+            bank_name: The name of the bank account to update
+            new_balance: The new balance for the account
+        """
+        logger.debug("Updating balance for %s to %s", bank_name, new_balance)
+        await self.accounts_collection.update_one(
+            {"bankName": bank_name},
+            {"$set": {"balance": new_balance}}
+        )
+    
+    async def log_transaction(self, operation: str, amount: int, tx_id: str, idempotency_key: str,
+                              bank_name: str) -> None:
+        """
+        Log a transaction and add it to the statistics, concurrently.
+        
+        Args:
+            operation: The type of operation (deposit, withdraw)
+            amount: The amount involved in the transaction
+            tx_id: The transaction ID
+            idempotency_key: The idempotency key for the transaction
+            bank_name: The name of the bank account involved
+        """
+        logger.debug("Logging transaction: %s %s for %s, txID: %s", operation, amount, bank_name, tx_id)
+        timestamp = datetime.now()
+        day = timestamp.date().isoformat()
+        increments = {f"{operation}Count": 1, f"{operation}Total": amount}
+        balance_change = amount if operation == "deposit" else -amount
+        
+        await asyncio.gather(
+            self.transactions_collection.insert_one({
+                "operation": operation,
+                "amount": amount,
+                "txId": tx_id,
+                "idempotencyKey": idempotency_key,
+                "bankName": bank_name,
+                "timestamp": timestamp
+            }),
+            self.account_stats_collection.update_one(
+                {"_id": f"{bank_name}:{day}"},
+                {"$inc": increments, "$setOnInsert": {"bankName": bank_name, "day": day}},
+                upsert=True
+            ),
+            self.global_stats_collection.update_one(
+                {"_id": global_daily_id(bank_name, day)},
+                {"$inc": increments, "$setOnInsert": {"day": day}},
+                upsert=True
+            ),
+            self.global_stats_collection.update_one(
+                {"_id": global_totals_id(bank_name)},
+                {"$inc": {**increments, "totalBalance": balance_change}},
+                upsert=True
+            )
+        )
+    
+    async def find_transaction_id(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        """
+        Find the transaction logged for an idempotency key.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+        
+        Returns:
+            The transaction ID, or None if no transaction has the key
+        """
+        transaction = await self.transactions_collection.find_one(
+            {"bankName": bank_name, "idempotencyKey": idempotency_key}, {"_id": 0, "txId": 1}
+        )
+        return transaction["txId"] if transaction is not None else None
+    
+    async def get_stats(self, bank_name: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the pre-aggregated transaction statistics.
+        
+        Args:
+            bank_name: Also return the daily statistics of this bank account
+            day: The day of the daily statistics, as YYYY-MM-DD; defaults to today
+        
+        Returns:
+            The global totals, the global totals for the day and, if a bank
+            account was given, its totals for the day
+        """
+        day = day or datetime.now().date().isoformat()
+        empty = {field: 0 for field in STATS_FIELDS}
+        
+        totals, daily, account = await asyncio.gather(
+            self.global_stats_collection.find(GLOBAL_TOTALS_QUERY).to_list(length=None),
+            self.global_stats_collection.find({"day": day}).to_list(length=None),
+            self.account_stats_collection.find_one(
+                {"_id": f"{bank_name}:{day}"}, {"_id": 0, "bankName": 0, "day": 0}
+            ) if bank_name is not None else asyncio.sleep(0)
+        )
+        stats = {
+            "day": day,
+            "global": {"accountCount": 0, "totalBalance": 0, **empty, **sum_stats(totals)},
+            "globalDaily": {**empty, **sum_stats(daily)}
+        }
+        
+        if bank_name is not None:
+            stats["accountDaily"] = {"bankName": bank_name, **empty, **(account or {})}
+        
+        return stats
+    
+    async def get_all_banks(self) -> List[Dict[str, Any]]:
+        """
+        Get all banks.
+        
+        Returns:
+            A list of all bank accounts
+        """
+        return await self.accounts_collection.find({}).to_list(length=None)
+    
+    async def update_bank_status(self, bank_name: str, status: str) -> None:
+        """
+        Update the status of a bank account.
+        
+        Args:
+            bank_name: The name of the bank account to update
+            status: The new status for the account ('ACTIVE' or 'STOPPED')
+        """
+        logger.info(f"Updating status for {bank_name} to {status}")
+        await self.accounts_collection.update_one(
+            {"bankName": bank_name},
+            {"$set": {"status": status}}
+        )
\ No newline at end of file
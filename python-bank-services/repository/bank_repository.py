@@ -1,5 +1,6 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional
 
 class BankRepository(ABC):
     """
@@ -19,6 +20,19 @@ class BankRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def find_account_balance(self, bank_name: str) -> Optional[int]:
+        """
+        Find the stored balance of a bank account, as of the latest write.
+        
+        Args:
+            bank_name: The name of the bank account
+            
+        Returns:
+            The balance or None if the account does not exist
+        """
+        pass
+    
     @abstractmethod
     def create_account(self, bank_name: str, initial_balance: int) -> None:
         """
@@ -30,6 +44,32 @@ class BankRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def iter_account_balances(self, bank_names: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the names and balances of bank accounts.
+        
+        Args:
+            bank_names: Only include these accounts; defaults to every account
+            
+        Returns:
+            An iterator over documents with bankName and balance
+        """
+        pass
+    
+    @abstractmethod
+    def get_active_accounts(self, since_day: str) -> List[str]:
+        """
+        Get the accounts with transactions on or after a day.
+        
+        Args:
+            since_day: The first day, as YYYY-MM-DD
+            
+        Returns:
+            The account names
+        """
+        pass
+    
     @abstractmethod
     def update_balance(self, bank_name: str, new_balance: int) -> None:
         """
@@ -55,6 +95,54 @@ class BankRepository(ABC):
         """
         pass
     
+    @abstractmethod
+    def find_transaction_id(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        """
+        Find the transaction logged for an idempotency key.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+            
+        Returns:
+            The transaction ID, or None if no transaction has the key
+        """
+        pass
+    
+    @abstractmethod
+    def iter_transactions(self, bank_name: str, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the transactions of a bank account, oldest first.
+        
+        Implementations fetch the transactions in batches as the iterator
+        advances, rather than loading them all at once.
+        
+        Args:
+            bank_name: The name of the bank account
+            start: Only include transactions at or after this time
+            end: Only include transactions before this time
+            
+        Returns:
+            An iterator over the transaction documents
+        """
+        pass
+    
+    @abstractmethod
+    def get_stats(self, bank_name: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the pre-aggregated transaction statistics.
+        
+        Args:
+            bank_name: Also return the daily statistics of this bank account
+            day: The day of the daily statistics, as YYYY-MM-DD; defaults to today
+            
+        Returns:
+            The global totals, the global totals for the day and, if a bank
+            account was given, its totals for the day
+        """
+        pass
+    
     @abstractmethod
     def get_all_banks(self) -> list:
         """
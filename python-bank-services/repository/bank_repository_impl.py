@@ -1,42 +1,168 @@
 import logging
-from typing import Dict, Any, Optional
+import zlib
+from itertools import chain
+from typing import Dict, Any, Iterable, Iterator, List, Optional
+from pymongo import UpdateOne
 from pymongo.database import Database
 from datetime import datetime
 
 from .bank_repository import BankRepository
+from .read_routing import DEFAULT_MAX_STALENESS_SECONDS, ReadRouting
+from .transaction_bucket_store import TransactionBucketStore
 
 logger = logging.getLogger(__name__)
 
+# Documents fetched per round trip when exporting transactions
+EXPORT_BATCH_SIZE = 1000
+
+# Fields returned when exporting transactions
+EXPORT_PROJECTION = {
+    "_id": 0,
+    "timestamp": 1,
+    "operation": 1,
+    "amount": 1,
+    "txId": 1,
+    "idempotencyKey": 1
+}
+
+# _id prefix of the all-time global statistics documents
+GLOBAL_TOTALS_ID = "totals"
+
+# Documents the all-time and the daily global statistics are each spread
+# over. Every transaction updates them, so with a single document each, the
+# writes for all accounts would queue on the same two documents.
+GLOBAL_STATS_SHARDS = 16
+
+# Matches every all-time totals document, including the unsharded one
+# written before the totals were spread over GLOBAL_STATS_SHARDS documents
+GLOBAL_TOTALS_QUERY = {"_id": {"$regex": f"^{GLOBAL_TOTALS_ID}"}}
+
+# Counters kept in every statistics document
+STATS_FIELDS = ["depositCount", "depositTotal", "withdrawCount", "withdrawTotal"]
+
+def global_totals_id(bank_name: str) -> str:
+    """
+    Get the _id of the all-time global statistics document an account adds to.
+    
+    Args:
+        bank_name: The name of the bank account
+    
+    Returns:
+        The document _id
+    """
+    return f"{GLOBAL_TOTALS_ID}:{zlib.crc32(bank_name.encode('utf-8')) % GLOBAL_STATS_SHARDS}"
+
+def global_daily_id(bank_name: str, day: str) -> str:
+    """
+    Get the _id of the daily global statistics document an account adds to.
+    
+    Args:
+        bank_name: The name of the bank account
+        day: The day, as YYYY-MM-DD
+    
+    Returns:
+        The document _id
+    """
+    return f"day:{day}:{zlib.crc32(bank_name.encode('utf-8')) % GLOBAL_STATS_SHARDS}"
+
+def sum_stats(documents: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Add up the counters of the documents one set of statistics is spread over.
+    
+    Args:
+        documents: The statistics documents
+    
+    Returns:
+        The sum of each counter
+    """
+    totals: Dict[str, int] = {}
+    for document in documents:
+        for field, value in document.items():
+            if field not in ("_id", "day"):
+                totals[field] = totals.get(field, 0) + value
+    return totals
+
 class BankRepositoryImpl(BankRepository):
     """
     MongoDB implementation of the BankRepository interface.
     """
     
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, bucket_store: Optional[TransactionBucketStore] = None,
+                 secondary_reads: bool = False, max_staleness_seconds: int = DEFAULT_MAX_STALENESS_SECONDS):
         """
         Initialize the repository with a MongoDB database.
         
         Args:
             database: MongoDB database instance
+            bucket_store: Where to log transactions in the bucketed layout;
+                without it, each transaction is its own document
+            secondary_reads: Send listing, dashboard and account lookups to
+                secondaries
+            max_staleness_seconds: How far behind the primary a secondary
+                used for reads may be
         """
         self.database = database
+        self.bucket_store = bucket_store
+        self.read_routing = ReadRouting(database.client, secondary_reads, max_staleness_seconds)
         self.accounts_collection = database["accounts"]
         self.transactions_collection = database["transactions"]
+        # Statistics maintained with $inc as accounts and transactions are
+        # written: one document per account and day, one per day for all
+        # accounts, and one with the all-time totals
+        self.account_stats_collection = database["account_stats"]
+        self.global_stats_collection = database["global_stats"]
+        # The same collections, for reads that may go to secondaries
+        self.accounts_reads = self.read_routing.for_reads(self.accounts_collection)
+        self.account_stats_reads = self.read_routing.for_reads(self.account_stats_collection)
+        self.global_stats_reads = self.read_routing.for_reads(self.global_stats_collection)
         
         # Create indexes if they don't exist
         self.accounts_collection.create_index("bankName", unique=True)
+        # Finds the recently active accounts for the startup warm-up
+        self.account_stats_collection.create_index("day")
+        # Finds the documents the daily global statistics are spread over
+        self.global_stats_collection.create_index("day")
+        # Serves the per-account, time-ordered transaction export
+        self.transactions_collection.create_index([("bankName", 1), ("timestamp", 1)])
+        # Finds a transaction by idempotency key when the cache has forgotten it
+        self.transactions_collection.create_index([("bankName", 1), ("idempotencyKey", 1)])
     
     def find_account_by_bank_name(self, bank_name: str) -> Optional[Dict[str, Any]]:
         """
         Find a bank account by name.
         
+        With secondary reads, the lookup runs in a causally consistent
+        session, so it reflects every account write this repository made,
+        but not those of other instances. Use find_account_balance for a
+        balance that seeds the account registry.
+        
         Args:
             bank_name: The name of the bank account to find
             
         Returns:
             The account document or None if not found
         """
-        return self.accounts_collection.find_one({"bankName": bank_name})
+        with self.read_routing.causal_session() as session:
+            return self.accounts_reads.find_one({"bankName": bank_name}, session=session)
+    
+    def find_account_balance(self, bank_name: str) -> Optional[int]:
+        """
+        Find the stored balance of a bank account, as of the latest write.
+        
+        Always reads from the primary: the balance seeds the in-memory
+        account registry, and the last write may have been made by another
+        instance, such as the shard that owned the account before.
+        
+        Args:
+            bank_name: The name of the bank account
+            
+        Returns:
+            The balance or None if the account does not exist
+        """
+        account = self.accounts_collection.find_one({"bankName": bank_name}, {"_id": 0, "balance": 1})
+        if account is None:
+            return None
+        return account.get("balance", 0)
     
     def create_account(self, bank_name: str, initial_balance: int) -> None:
         """
@@ -47,12 +173,65 @@ class BankRepositoryImpl(BankRepository):
             initial_balance: The initial balance for the account
         """
         logger.info(f"Creating account for {bank_name} with initial balance {initial_balance}")
-        self.accounts_collection.insert_one({
-            "bankName": bank_name,
-            "balance": initial_balance,
-            "status": "ACTIVE",
-            "created": datetime.now()
-        })
+        with self.read_routing.causal_session() as session:
+            self.accounts_collection.insert_one({
+                "bankName": bank_name,
+                "balance": initial_balance,
+                # Kept so that reconciliation can check balance = initial + transactions
+                "initialBalance": initial_balance,
+                "status": "ACTIVE",
+                "created": datetime.now()
+            }, session=session)
+        self.global_stats_collection.update_one(
+            {"_id": global_totals_id(bank_name)},
+            {"$inc": {"accountCount": 1, "totalBalance": initial_balance}},
+            upsert=True
+        )
+    
+    def iter_account_balances(self, bank_names: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the names and balances of bank accounts.
+        
+        One cursor returns only the two fields, EXPORT_BATCH_SIZE documents
+        per round trip. A list of names is looked up EXPORT_BATCH_SIZE names
+        per query.
+        Always reads from the primary, since the balances seed the in-memory
+        account registry.
+        
+        Args:
+            bank_names: Only include these accounts; defaults to every account
+            
+        Returns:
+            An iterator over documents with bankName and balance
+        """
+        projection = {"_id": 0, "bankName": 1, "balance": 1}
+        if bank_names is None:
+            queries = [{}]
+        else:
+            queries = [{"bankName": {"$in": bank_names[i:i + EXPORT_BATCH_SIZE]}}
+                       for i in range(0, len(bank_names), EXPORT_BATCH_SIZE)]
+        
+        for query in queries:
+            cursor = self.accounts_collection.find(query, projection, batch_size=EXPORT_BATCH_SIZE)
+            try:
+                yield from cursor
+            finally:
+                cursor.close()
+    
+    def get_active_accounts(self, since_day: str) -> List[str]:
+        """
+        Get the accounts with transactions on or after a day.
+        
+        The per-account daily statistics record every day an account had
+        transactions, so this does not read the transactions.
+        
+        Args:
+            since_day: The first day, as YYYY-MM-DD
+            
+        Returns:
+            The account names
+        """
+        return self.account_stats_reads.distinct("bankName", {"day": {"$gte": since_day}})
     
     def update_balance(self, bank_name: str, new_balance: int) -> None:
         """
@@ -62,11 +241,13 @@ class BankRepositoryImpl(BankRepository):
             bank_name: The name of the bank account to update
             new_balance: The new balance for the account
         """
-        logger.debug(f"Updating balance for {bank_name} to {new_balance}")
-        self.accounts_collection.update_one(
-            {"bankName": bank_name},
-            {"$set": {"balance": new_balance}}
-        )
+        logger.debug("Updating balance for %s to %s", bank_name, new_balance)
+        with self.read_routing.causal_session() as session:
+            self.accounts_collection.update_one(
+                {"bankName": bank_name},
+                {"$set": {"balance": new_balance}},
+                session=session
+            )
     
     def log_transaction(self, operation: str, amount: int, tx_id: str, idempotency_key: str, bank_name: str) -> None:
         """
@@ -79,24 +260,215 @@ class BankRepositoryImpl(BankRepository):
             idempotency_key: The idempotency key for the transaction
             bank_name: The name of the bank account involved
         """
-        logger.info(f"Logging transaction: {operation} {amount} for {bank_name}, txID: {tx_id}")
-        self.transactions_collection.insert_one({
-            "operation": operation,
-            "amount": amount,
-            "txId": tx_id,
-            "idempotencyKey": idempotency_key,
-            "bankName": bank_name,
-            "timestamp": datetime.now()
-        })
+        # Called with the account lock held, so only logged at DEBUG
+        logger.debug("Logging transaction: %s %s for %s, txID: %s", operation, amount, bank_name, tx_id)
+        timestamp = datetime.now()
+        if self.bucket_store is not None:
+            self.bucket_store.append(operation, amount, tx_id, idempotency_key, bank_name, timestamp)
+        else:
+            self.transactions_collection.insert_one({
+                "operation": operation,
+                "amount": amount,
+                "txId": tx_id,
+                "idempotencyKey": idempotency_key,
+                "bankName": bank_name,
+                "timestamp": timestamp
+            })
+        self._increment_stats(operation, amount, bank_name, timestamp.date().isoformat())
+    
+    def find_transaction_id(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        """
+        Find the transaction logged for an idempotency key.
+        
+        Reads from the primary, since a retry may follow the original
+        request within milliseconds. The transactions collection is checked
+        in the bucketed layout too, for transactions logged before the switch.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+            
+        Returns:
+            The transaction ID, or None if no transaction has the key
+        """
+        transaction = self.transactions_collection.find_one(
+            {"bankName": bank_name, "idempotencyKey": idempotency_key}, {"_id": 0, "txId": 1}
+        )
+        if transaction is not None:
+            return transaction["txId"]
+        if self.bucket_store is not None:
+            return self.bucket_store.find_transaction_id(bank_name, idempotency_key)
+        return None
+    
+    def _increment_stats(self, operation: str, amount: int, bank_name: str, day: str) -> None:
+        """
+        Add a transaction to the statistics documents.
+        
+        The two global documents are updated in one round trip. They are
+        picked by the account, so transactions on different accounts mostly
+        update different documents.
+        
+        Args:
+            operation: The type of operation (deposit, withdraw)
+            amount: The amount involved in the transaction
+            bank_name: The name of the bank account involved
+            day: The day of the transaction, as YYYY-MM-DD
+        """
+        increments = {f"{operation}Count": 1, f"{operation}Total": amount}
+        balance_change = amount if operation == "deposit" else -amount
+        
+        self.account_stats_collection.update_one(
+            {"_id": f"{bank_name}:{day}"},
+            {"$inc": increments, "$setOnInsert": {"bankName": bank_name, "day": day}},
+            upsert=True
+        )
+        self.global_stats_collection.bulk_write([
+            UpdateOne(
+                {"_id": global_daily_id(bank_name, day)},
+                {"$inc": increments, "$setOnInsert": {"day": day}},
+                upsert=True
+            ),
+            UpdateOne(
+                {"_id": global_totals_id(bank_name)},
+                {"$inc": {**increments, "totalBalance": balance_change}},
+                upsert=True
+            )
+        ], ordered=False)
+    
+    def get_stats(self, bank_name: Optional[str] = None, day: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Get the pre-aggregated transaction statistics.
+        
+        Every value is summed from at most GLOBAL_STATS_SHARDS documents,
+        however many accounts and transactions there are. With secondary
+        reads, the
+        statistics may be up to the staleness bound old.
+        
+        Args:
+            bank_name: Also return the daily statistics of this bank account
+            day: The day of the daily statistics, as YYYY-MM-DD; defaults to today
+            
+        Returns:
+            The global totals, the global totals for the day and, if a bank
+            account was given, its totals for the day
+        """
+        day = day or datetime.now().date().isoformat()
+        empty = {field: 0 for field in STATS_FIELDS}
+        
+        totals = sum_stats(self.global_stats_reads.find(GLOBAL_TOTALS_QUERY))
+        daily = sum_stats(self.global_stats_reads.find({"day": day}))
+        stats = {
+            "day": day,
+            "global": {"accountCount": 0, "totalBalance": 0, **empty, **totals},
+            "globalDaily": {**empty, **daily}
+        }
+        
+        if bank_name is not None:
+            account = self.account_stats_reads.find_one(
+                {"_id": f"{bank_name}:{day}"}, {"_id": 0, "bankName": 0, "day": 0}
+            ) or {}
+            stats["accountDaily"] = {"bankName": bank_name, **empty, **account}
+        
+        return stats
+    
+    def rebuild_stats(self) -> None:
+        """
+        Recompute every statistics document from the accounts and transactions.
+        
+        This is a one-off full scan, for data written before the statistics
+        were maintained; afterwards they are kept up to date incrementally.
+        """
+        logger.info("Rebuilding statistics from accounts and transactions")
+        self.account_stats_collection.delete_many({})
+        self.global_stats_collection.delete_many({})
+        
+        totals = {"accountCount": 0, "totalBalance": 0, **{field: 0 for field in STATS_FIELDS}}
+        for account in self.accounts_collection.find({}, {"balance": 1}):
+            totals["accountCount"] += 1
+            totals["totalBalance"] += account.get("balance", 0)
+        
+        global_daily: Dict[str, Dict[str, int]] = {}
+        pipeline = [{
+            "$group": {
+                "_id": {
+                    "bankName": "$bankName",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$timestamp"}},
+                    "operation": "$operation"
+                },
+                "count": {"$sum": 1},
+                "total": {"$sum": "$amount"}
+            }
+        }]
+        groups = self.transactions_collection.aggregate(pipeline, allowDiskUse=True)
+        if self.bucket_store is not None:
+            groups = chain(groups, self.bucket_store.aggregate(pipeline))
+        for group in groups:
+            key = group["_id"]
+            increments = {f"{key['operation']}Count": group["count"], f"{key['operation']}Total": group["total"]}
+            self.account_stats_collection.update_one(
+                {"_id": f"{key['bankName']}:{key['day']}"},
+                {"$inc": increments, "$setOnInsert": {"bankName": key["bankName"], "day": key["day"]}},
+                upsert=True
+            )
+            day_totals = global_daily.setdefault(key["day"], {})
+            for field, value in increments.items():
+                day_totals[field] = day_totals.get(field, 0) + value
+                totals[field] += value
+        
+        for day, day_totals in global_daily.items():
+            self.global_stats_collection.insert_one({"_id": f"day:{day}:0", "day": day, **day_totals})
+        self.global_stats_collection.insert_one({"_id": f"{GLOBAL_TOTALS_ID}:0", **totals})
+    
+    def iter_transactions(self, bank_name: str, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the transactions of a bank account, oldest first.
+        
+        The cursor fetches EXPORT_BATCH_SIZE documents per round trip, with
+        only the exported fields, and the (bankName, timestamp) index serves
+        both the filter and the sort. In the bucketed layout, transactions
+        logged as documents before the switch come first, then those from the
+        buckets.
+        
+        Args:
+            bank_name: The name of the bank account
+            start: Only include transactions at or after this time
+            end: Only include transactions before this time
+            
+        Returns:
+            An iterator over the transaction documents
+        """
+        query: Dict[str, Any] = {"bankName": bank_name}
+        time_range = {}
+        if start is not None:
+            time_range["$gte"] = start
+        if end is not None:
+            time_range["$lt"] = end
+        if time_range:
+            query["timestamp"] = time_range
+        
+        cursor = self.transactions_collection.find(
+            query, EXPORT_PROJECTION, batch_size=EXPORT_BATCH_SIZE
+        ).sort("timestamp", 1)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+        
+        if self.bucket_store is not None:
+            for transaction in self.bucket_store.iter_transactions(bank_name, start, end):
+                yield {field: transaction[field] for field in EXPORT_PROJECTION if field in transaction}
     
     def get_all_banks(self) -> list:
         """
         Get all banks.
         
+        With secondary reads, the list may be up to the staleness bound old.
+        
         Returns:
             A list of all bank accounts
         """
-        return list(self.accounts_collection.find({}))
+        return list(self.accounts_reads.find({}))
         
     def update_bank_status(self, bank_name: str, status: str) -> None:
         """
@@ -107,7 +479,9 @@ class BankRepositoryImpl(BankRepository):
             status: The new status for the account ('ACTIVE' or 'STOPPED')
         """
         logger.info(f"Updating status for {bank_name} to {status}")
-        self.accounts_collection.update_one(
-            {"bankName": bank_name},
-            {"$set": {"status": status}}
-        )
\ No newline at end of file
+        with self.read_routing.causal_session() as session:
+            self.accounts_collection.update_one(
+                {"bankName": bank_name},
+                {"$set": {"status": status}},
+                session=session
+            )
\ No newline at end of file
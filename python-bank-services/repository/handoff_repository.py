@@ -0,0 +1,33 @@
+from abc import ABC, abstractmethod
+from typing import Set
+
+class HandoffRepository(ABC):
+    """
+    Abstract interface for the record of the shard handoffs an instance received.
+    """
+    
+    @abstractmethod
+    def record_handoff(self, version: int, shard_id: str, from_shard: str) -> None:
+        """
+        Record that a shard received the handoff of another shard.
+        
+        Args:
+            version: The ring version of the handoff
+            shard_id: The shard that received the handoff
+            from_shard: The shard that released the accounts
+        """
+        pass
+    
+    @abstractmethod
+    def get_received_handoffs(self, version: int, shard_id: str) -> Set[str]:
+        """
+        Get the shards whose handoff a shard received for a ring version.
+        
+        Args:
+            version: The ring version
+            shard_id: The shard that received the handoffs
+        
+        Returns:
+            The IDs of the shards that handed off to it
+        """
+        pass
\ No newline at end of file
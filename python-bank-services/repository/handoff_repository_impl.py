@@ -0,0 +1,55 @@
+import logging
+from typing import Set
+
+from pymongo.database import Database
+
+from .handoff_repository import HandoffRepository
+
+logger = logging.getLogger(__name__)
+
+class HandoffRepositoryImpl(HandoffRepository):
+    """
+    MongoDB implementation of the HandoffRepository interface.
+    
+    Each shard has one document per ring version in `shard_handoffs`, listing
+    the shards whose handoff it received, so a restarted instance does not
+    wait again for handoffs that already arrived.
+    """
+    
+    def __init__(self, database: Database):
+        """
+        Initialize the repository with a MongoDB database.
+        
+        Args:
+            database: MongoDB database instance
+        """
+        self.handoffs_collection = database["shard_handoffs"]
+    
+    def record_handoff(self, version: int, shard_id: str, from_shard: str) -> None:
+        """
+        Record that a shard received the handoff of another shard.
+        
+        Args:
+            version: The ring version of the handoff
+            shard_id: The shard that received the handoff
+            from_shard: The shard that released the accounts
+        """
+        self.handoffs_collection.update_one(
+            {"_id": f"{version}:{shard_id}"},
+            {"$set": {"version": version, "shardId": shard_id}, "$addToSet": {"receivedFrom": from_shard}},
+            upsert=True
+        )
+    
+    def get_received_handoffs(self, version: int, shard_id: str) -> Set[str]:
+        """
+        Get the shards whose handoff a shard received for a ring version.
+        
+        Args:
+            version: The ring version
+            shard_id: The shard that received the handoffs
+        
+        Returns:
+            The IDs of the shards that handed off to it
+        """
+        document = self.handoffs_collection.find_one({"_id": f"{version}:{shard_id}"}, {"receivedFrom": 1})
+        return set(document.get("receivedFrom", [])) if document else set()
\ No newline at end of file
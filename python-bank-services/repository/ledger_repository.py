@@ -0,0 +1,106 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional
+
+class LedgerRepository(ABC):
+    """
+    Abstract interface for the append-only ledger of balance changes.
+    """
+    
+    @abstractmethod
+    def open_account(self, bank_name: str, balance: int) -> bool:
+        """
+        Start the ledger of an account, if it has none yet.
+        
+        The first event of every account is an "open" event carrying its
+        balance at that point, so accounts that existed before the ledger
+        was enabled can be replayed too.
+        
+        Args:
+            bank_name: The name of the bank account
+            balance: The current balance of the account
+        
+        Returns:
+            True if the ledger was started, False if it already existed
+        """
+        pass
+    
+    @abstractmethod
+    def append_event(self, bank_name: str, operation: str, delta: int, balance: int,
+                     tx_id: Optional[str] = None) -> int:
+        """
+        Append a balance change to the ledger of an account.
+        
+        Args:
+            bank_name: The name of the bank account
+            operation: The type of operation (open, deposit, withdraw)
+            delta: The signed change to the balance
+            balance: The balance after the change
+            tx_id: The transaction ID, if any
+        
+        Returns:
+            The sequence number of the event
+        """
+        pass
+    
+    @abstractmethod
+    def save_snapshot(self, bank_name: str, balance: int, seq: int) -> None:
+        """
+        Save the balance of an account as of an event.
+        
+        Args:
+            bank_name: The name of the bank account
+            balance: The balance after the event
+            seq: The sequence number of the event
+        """
+        pass
+    
+    @abstractmethod
+    def last_seq(self, bank_name: str) -> int:
+        """
+        Get the last sequence number allocated to an event of an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The sequence number, which may belong to an event whose write
+            failed; 0 if the account has no ledger
+        """
+        pass
+    
+    @abstractmethod
+    def latest_snapshot(self, bank_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the most recent snapshot of an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The snapshot, with its balance and seq, or None if there is none
+        """
+        pass
+    
+    @abstractmethod
+    def iter_events(self, bank_name: str, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the events of an account in sequence order.
+        
+        Args:
+            bank_name: The name of the bank account
+            after_seq: Only include events with a higher sequence number
+        
+        Returns:
+            An iterator over the events
+        """
+        pass
+    
+    @abstractmethod
+    def get_ledger_accounts(self) -> List[str]:
+        """
+        Get the names of all accounts that have a ledger.
+        
+        Returns:
+            The account names
+        """
+        pass
\ No newline at end of file
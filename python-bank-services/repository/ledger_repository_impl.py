@@ -0,0 +1,183 @@
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.database import Database
+
+from .ledger_repository import LedgerRepository
+
+logger = logging.getLogger(__name__)
+
+# A snapshot is saved after every this many events of an account
+DEFAULT_SNAPSHOT_INTERVAL = 100
+
+# Events fetched per round trip when replaying
+REPLAY_BATCH_SIZE = 1000
+
+class LedgerRepositoryImpl(LedgerRepository):
+    """
+    MongoDB implementation of the LedgerRepository interface.
+    
+    Events live in `ledger_events`, ordered per account by a sequence number
+    allocated with $inc on the account's document in `ledger_sequences`.
+    Every `snapshot_interval` events the balance is saved to
+    `ledger_snapshots`, so a replay reads at most that many events per
+    account plus anything written since.
+    """
+    
+    def __init__(self, database: Database, snapshot_interval: int = DEFAULT_SNAPSHOT_INTERVAL):
+        """
+        Initialize the repository with a MongoDB database.
+        
+        Args:
+            database: MongoDB database instance
+            snapshot_interval: The number of events between snapshots
+        """
+        self.snapshot_interval = snapshot_interval
+        self.events_collection = database["ledger_events"]
+        self.snapshots_collection = database["ledger_snapshots"]
+        self.sequences_collection = database["ledger_sequences"]
+        
+        # Create indexes if they don't exist
+        self.events_collection.create_index([("bankName", 1), ("seq", 1)], unique=True)
+        self.snapshots_collection.create_index([("bankName", 1), ("seq", DESCENDING)])
+    
+    def open_account(self, bank_name: str, balance: int) -> bool:
+        """
+        Start the ledger of an account, if it has none yet.
+        
+        Args:
+            bank_name: The name of the bank account
+            balance: The current balance of the account
+        
+        Returns:
+            True if the ledger was started, False if it already existed
+        """
+        result = self.sequences_collection.update_one(
+            {"_id": bank_name},
+            {"$setOnInsert": {"seq": 0}},
+            upsert=True
+        )
+        if result.upserted_id is None:
+            return False
+        
+        logger.info(f"Opening ledger for {bank_name} with balance {balance}")
+        self.append_event(bank_name, "open", balance, balance)
+        return True
+    
+    def append_event(self, bank_name: str, operation: str, delta: int, balance: int,
+                     tx_id: Optional[str] = None) -> int:
+        """
+        Append a balance change to the ledger of an account.
+        
+        Callers must append the events of one account in order, which Bank
+        does by appending while it holds the account lock.
+        
+        Args:
+            bank_name: The name of the bank account
+            operation: The type of operation (open, deposit, withdraw)
+            delta: The signed change to the balance
+            balance: The balance after the change
+            tx_id: The transaction ID, if any
+        
+        Returns:
+            The sequence number of the event
+        """
+        sequence = self.sequences_collection.find_one_and_update(
+            {"_id": bank_name},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        seq = sequence["seq"]
+        
+        self.events_collection.insert_one({
+            "bankName": bank_name,
+            "seq": seq,
+            "operation": operation,
+            "delta": delta,
+            "balance": balance,
+            "txId": tx_id,
+            "timestamp": datetime.now()
+        })
+        
+        if seq % self.snapshot_interval == 0:
+            self.save_snapshot(bank_name, balance, seq)
+        return seq
+    
+    def save_snapshot(self, bank_name: str, balance: int, seq: int) -> None:
+        """
+        Save the balance of an account as of an event.
+        
+        Args:
+            bank_name: The name of the bank account
+            balance: The balance after the event
+            seq: The sequence number of the event
+        """
+        logger.debug("Saving ledger snapshot for %s at seq %s", bank_name, seq)
+        self.snapshots_collection.update_one(
+            {"bankName": bank_name, "seq": seq},
+            {"$set": {"balance": balance, "timestamp": datetime.now()}},
+            upsert=True
+        )
+    
+    def last_seq(self, bank_name: str) -> int:
+        """
+        Get the last sequence number allocated to an event of an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The sequence number, which may belong to an event whose write
+            failed; 0 if the account has no ledger
+        """
+        sequence = self.sequences_collection.find_one({"_id": bank_name}, {"seq": 1})
+        return sequence["seq"] if sequence else 0
+    
+    def latest_snapshot(self, bank_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the most recent snapshot of an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The snapshot, with its balance and seq, or None if there is none
+        """
+        return self.snapshots_collection.find_one(
+            {"bankName": bank_name},
+            {"_id": 0, "balance": 1, "seq": 1},
+            sort=[("seq", DESCENDING)]
+        )
+    
+    def iter_events(self, bank_name: str, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the events of an account in sequence order.
+        
+        Args:
+            bank_name: The name of the bank account
+            after_seq: Only include events with a higher sequence number
+        
+        Returns:
+            An iterator over the events
+        """
+        cursor = self.events_collection.find(
+            {"bankName": bank_name, "seq": {"$gt": after_seq}},
+            {"_id": 0, "seq": 1, "delta": 1, "balance": 1},
+            batch_size=REPLAY_BATCH_SIZE
+        ).sort("seq", 1)
+        try:
+            yield from cursor
+        finally:
+            cursor.close()
+    
+    def get_ledger_accounts(self) -> List[str]:
+        """
+        Get the names of all accounts that have a ledger.
+        
+        Returns:
+            The account names
+        """
+        return [doc["_id"] for doc in self.sequences_collection.find({}, {"_id": 1})]
\ No newline at end of file
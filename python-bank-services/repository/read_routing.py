@@ -0,0 +1,95 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from pymongo import MongoClient
+from pymongo.client_session import ClientSession
+from pymongo.collection import Collection
+from pymongo.read_preferences import SecondaryPreferred
+
+# Smallest staleness bound MongoDB accepts for secondary reads
+DEFAULT_MAX_STALENESS_SECONDS = 90
+
+class ReadRouting:
+    """
+    Decides where the repository's reads go.
+    
+    With secondary reads off, everything reads from the primary. With them
+    on, listing and dashboard reads go to secondaries that lag the primary
+    by at most `max_staleness_seconds`, and reads that must reflect the
+    service's own writes use causally consistent sessions. Every such
+    session is advanced to the latest write made through this object, so a
+    secondary only answers once it has applied that write.
+    """
+    
+    def __init__(self, client: MongoClient, secondary_reads: bool = False,
+                 max_staleness_seconds: int = DEFAULT_MAX_STALENESS_SECONDS):
+        """
+        Initialize the routing.
+        
+        Args:
+            client: The MongoDB client
+            secondary_reads: Whether reads may go to secondaries
+            max_staleness_seconds: How far behind the primary a secondary may be
+        """
+        self.client = client
+        self.secondary_reads = secondary_reads
+        self.read_preference = SecondaryPreferred(max_staleness=max_staleness_seconds)
+        self._lock = threading.Lock()
+        self._cluster_time: Optional[Dict[str, Any]] = None
+        self._operation_time = None
+    
+    def for_reads(self, collection: Collection) -> Collection:
+        """
+        Get a collection whose reads may go to secondaries.
+        
+        Args:
+            collection: The collection, reading from the primary
+        
+        Returns:
+            The collection to read listings and dashboards from
+        """
+        if not self.secondary_reads:
+            return collection
+        return collection.with_options(read_preference=self.read_preference)
+    
+    @contextmanager
+    def causal_session(self) -> Iterator[Optional[ClientSession]]:
+        """
+        Start a causally consistent session for reads and writes.
+        
+        The session starts from the latest write made through this object.
+        The operation time of writes made in it is recorded when it ends.
+        Without secondary reads there is nothing to order, and the session
+        is None.
+        
+        Returns:
+            The session, or None
+        """
+        if not self.secondary_reads:
+            yield None
+            return
+        
+        with self.client.start_session(causal_consistency=True) as session:
+            with self._lock:
+                if self._cluster_time is not None:
+                    session.advance_cluster_time(self._cluster_time)
+                    session.advance_operation_time(self._operation_time)
+            yield session
+            self._record(session)
+    
+    def _record(self, session: ClientSession) -> None:
+        """
+        Remember the latest cluster and operation time a session has seen.
+        
+        Args:
+            session: The session
+        """
+        cluster_time, operation_time = session.cluster_time, session.operation_time
+        if cluster_time is None or operation_time is None:
+            return
+        with self._lock:
+            if self._cluster_time is None or cluster_time["clusterTime"] > self._cluster_time["clusterTime"]:
+                self._cluster_time = cluster_time
+            if self._operation_time is None or operation_time > self._operation_time:
+                self._operation_time = operation_time
\ No newline at end of file
@@ -0,0 +1,224 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+from pymongo.collection import Collection
+from pymongo.database import Database
+from pymongo.errors import BulkWriteError, CollectionInvalid
+
+logger = logging.getLogger(__name__)
+
+# Transactions kept in one bucket document
+DEFAULT_BUCKET_SIZE = 200
+
+# Buckets moved to the archive per round trip
+ARCHIVE_BATCH_SIZE = 500
+
+# Collections holding the recent and the archived buckets
+BUCKETS_COLLECTION = "transaction_buckets"
+ARCHIVE_COLLECTION = "transaction_archive"
+
+def unwind_buckets(pipeline: List[Dict[str, Any]], bucket_filter: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Adapt an aggregation pipeline over transaction documents to run over
+    buckets.
+    
+    The buckets are unwound into documents shaped like those in the
+    `transactions` collection, so the same pipeline works on either layout.
+    
+    Args:
+        pipeline: The pipeline over transaction documents
+        bucket_filter: A filter on the buckets applied before unwinding, so
+            only the buckets that can match are unwound
+    
+    Returns:
+        The pipeline to run on a bucket collection
+    """
+    stages: List[Dict[str, Any]] = [{"$match": bucket_filter}] if bucket_filter else []
+    stages += [
+        {"$unwind": "$transactions"},
+        {"$replaceRoot": {"newRoot": {"$mergeObjects": ["$transactions", {"bankName": "$bankName"}]}}}
+    ]
+    return stages + pipeline
+
+class TransactionBucketStore:
+    """
+    Stores transactions with the bucket pattern, in a hot and an archive tier.
+    
+    Each bucket document holds up to `bucket_size` transactions of one
+    account from one day, with the time range it covers. Appending is a
+    single upsert that pushes onto the open bucket, so the number of
+    documents and index entries is a fraction of the number of
+    transactions. Buckets whose day has passed can be moved to the archive
+    collection, which is created with zstd block compression; reads combine
+    both tiers.
+    """
+    
+    def __init__(self, database: Database, bucket_size: int = DEFAULT_BUCKET_SIZE):
+        """
+        Initialize the store with a MongoDB database.
+        
+        Args:
+            database: MongoDB database instance
+            bucket_size: The maximum number of transactions per bucket
+        """
+        self.bucket_size = bucket_size
+        self.buckets_collection = database[BUCKETS_COLLECTION]
+        self.archive_collection = self._archive_collection(database)
+        
+        # Create indexes if they don't exist
+        self.buckets_collection.create_index([("bankName", 1), ("window", 1), ("count", 1)])
+        for collection in (self.buckets_collection, self.archive_collection):
+            collection.create_index([("bankName", 1), ("start", 1)])
+            collection.create_index("end")
+            # Finds a transaction by idempotency key when the cache has forgotten it
+            collection.create_index([("bankName", 1), ("transactions.idempotencyKey", 1)])
+    
+    def _archive_collection(self, database: Database) -> Collection:
+        """
+        Get the archive collection, creating it with compression if needed.
+        
+        Args:
+            database: MongoDB database instance
+        
+        Returns:
+            The archive collection
+        """
+        try:
+            return database.create_collection(
+                ARCHIVE_COLLECTION,
+                storageEngine={"wiredTiger": {"configString": "block_compressor=zstd"}}
+            )
+        except CollectionInvalid:
+            # Already exists
+            return database[ARCHIVE_COLLECTION]
+    
+    def append(self, operation: str, amount: int, tx_id: str, idempotency_key: str, bank_name: str,
+               timestamp: datetime) -> None:
+        """
+        Append a transaction to the open bucket of its account and day.
+        
+        A new bucket is started when the open one is full. Bank appends the
+        transactions of an account under its lock, so each account has at
+        most one open bucket per day.
+        
+        Args:
+            operation: The type of operation (deposit, withdraw)
+            amount: The amount involved in the transaction
+            tx_id: The transaction ID
+            idempotency_key: The idempotency key for the transaction
+            bank_name: The name of the bank account involved
+            timestamp: When the transaction happened
+        """
+        self.buckets_collection.update_one(
+            {"bankName": bank_name, "window": timestamp.date().isoformat(), "count": {"$lt": self.bucket_size}},
+            {
+                "$push": {"transactions": {
+                    "operation": operation,
+                    "amount": amount,
+                    "txId": tx_id,
+                    "idempotencyKey": idempotency_key,
+                    "timestamp": timestamp
+                }},
+                "$inc": {"count": 1},
+                "$min": {"start": timestamp},
+                "$max": {"end": timestamp}
+            },
+            upsert=True
+        )
+    
+    def iter_transactions(self, bank_name: str, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the transactions of an account, oldest first.
+        
+        Archived buckets are older than every hot bucket, so the archive is
+        read first and skipped entirely when the range starts after its
+        newest bucket. Only buckets overlapping the range are fetched.
+        
+        Args:
+            bank_name: The name of the bank account
+            start: Only include transactions at or after this time
+            end: Only include transactions before this time
+        
+        Returns:
+            An iterator over the transactions
+        """
+        query: Dict[str, Any] = {"bankName": bank_name}
+        if start is not None:
+            query["end"] = {"$gte": start}
+        if end is not None:
+            query["start"] = {"$lt": end}
+        
+        for collection in (self.archive_collection, self.buckets_collection):
+            cursor = collection.find(query, {"_id": 0, "transactions": 1}).sort("start", 1)
+            try:
+                for bucket in cursor:
+                    for transaction in bucket["transactions"]:
+                        timestamp = transaction["timestamp"]
+                        if (start is None or timestamp >= start) and (end is None or timestamp < end):
+                            yield transaction
+            finally:
+                cursor.close()
+    
+    def find_transaction_id(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        """
+        Find the transaction logged for an idempotency key, on both tiers.
+        
+        Args:
+            bank_name: The name of the bank account
+            idempotency_key: The idempotency key of the request
+        
+        Returns:
+            The transaction ID, or None if no transaction has the key
+        """
+        for collection in (self.buckets_collection, self.archive_collection):
+            bucket = collection.find_one({"bankName": bank_name, "transactions.idempotencyKey": idempotency_key},
+                                         {"_id": 0, "transactions.$": 1})
+            if bucket is not None:
+                return bucket["transactions"][0]["txId"]
+        return None
+    
+    def aggregate(self, pipeline: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Run an aggregation pipeline over transaction documents on both tiers.
+        
+        Args:
+            pipeline: The pipeline over transaction documents
+        
+        Returns:
+            An iterator over the results from the archive, then the recent buckets
+        """
+        for collection in (self.archive_collection, self.buckets_collection):
+            yield from collection.aggregate(unwind_buckets(pipeline), allowDiskUse=True)
+    
+    def archive(self, older_than: timedelta) -> int:
+        """
+        Move buckets whose newest transaction is older than a given age to
+        the archive.
+        
+        Buckets are copied before they are deleted, keeping their _id, so an
+        interrupted run can simply be repeated.
+        
+        Args:
+            older_than: The age after which a bucket is cold
+        
+        Returns:
+            The number of buckets moved
+        """
+        cutoff = datetime.now() - older_than
+        moved = 0
+        while True:
+            buckets = list(self.buckets_collection.find({"end": {"$lt": cutoff}}).limit(ARCHIVE_BATCH_SIZE))
+            if not buckets:
+                return moved
+            
+            try:
+                self.archive_collection.insert_many(buckets, ordered=False)
+            except BulkWriteError as e:
+                # Buckets copied by an earlier, interrupted run
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+            self.buckets_collection.delete_many({"_id": {"$in": [bucket["_id"] for bucket in buckets]}})
+            moved += len(buckets)
+            logger.info(f"Archived {moved} bucket(s) so far")
\ No newline at end of file
@@ -0,0 +1,347 @@
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set
+
+from admission import OverloadedException
+from repository.handoff_repository import HandoffRepository
+from shard_ring import RingConfig, load_ring_file
+from wire_format import JSON_MIMETYPE
+
+if TYPE_CHECKING:
+    from account_registry import AccountRegistry
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of the ring file for a new version
+DEFAULT_POLL_SECONDS = 5.0
+
+# Seconds a client is asked to wait while an account is being handed over
+HANDOFF_RETRY_AFTER = 1.0
+
+# Timeout of one attempt to deliver a handoff
+HANDOFF_TIMEOUT_SECONDS = 10.0
+
+# Longest wait between attempts to deliver a handoff
+MAX_HANDOFF_BACKOFF_SECONDS = 30.0
+
+# Seconds after a rebalance starts when the accounts of shards whose handoff
+# has not arrived are served anyway
+DEFAULT_HANDOFF_DEADLINE_SECONDS = 300.0
+
+class WrongShardException(Exception):
+    """Exception raised for a request about an account another shard owns."""
+    
+    def __init__(self, message: str, owner_address: str):
+        """
+        Initialize the exception.
+        
+        Args:
+            message: A human-readable description of the error
+            owner_address: The address ("host:port") of the shard that owns the account
+        """
+        super().__init__(message)
+        self.owner_address = owner_address
+
+class ShardCoordinator:
+    """
+    Decides which accounts this bank-service instance serves, and hands
+    accounts over to other instances when the shard ring changes.
+    
+    A new version of the ring that lists the `previous` ring starts a
+    rebalance, in which each account moves from one owner to the next
+    without ever being served by both:
+    
+    1. Every shard switches to the new ring as soon as it sees it. From then
+       on, it answers requests for accounts it no longer owns with the
+       address of their new owner.
+    2. Every shard of the previous ring releases the accounts it no longer
+       owns, stripe by stripe under the stripe locks, so that operations in
+       progress finish first. It then posts the accounts' recent
+       idempotency keys to each other shard of the new ring, even when no
+       account moved there.
+    3. Every shard holds back requests for the accounts it gained, asking
+       clients to retry shortly, until their previous owner's handoff has
+       arrived. The accounts are then loaded from MongoDB on first use,
+       after the previous owner's last write.
+    
+    Received handoffs are recorded in MongoDB, so a restarted shard does not
+    wait again for a previous owner that has already moved on. A handoff
+    that never arrives, because its shard is gone, stops holding back
+    requests after the handoff deadline; the idempotency keys it would have
+    carried are still found in the logged transactions.
+    """
+    
+    def __init__(self, shard_id: str, config: RingConfig, ring_file: Optional[str] = None,
+                 poll_seconds: float = DEFAULT_POLL_SECONDS, handoffs: Optional[HandoffRepository] = None,
+                 handoff_deadline_seconds: float = DEFAULT_HANDOFF_DEADLINE_SECONDS):
+        """
+        Initialize the coordinator.
+        
+        Args:
+            shard_id: The ID of this instance in the ring
+            config: The current ring
+            ring_file: The file the ring was loaded from, watched for new
+                versions; None for a static ring
+            poll_seconds: The seconds between checks of the ring file
+            handoffs: The record of received handoffs; None to keep it in
+                memory only
+            handoff_deadline_seconds: The seconds to wait for the handoffs of
+                a rebalance, or 0 to wait until they arrive
+        
+        Raises:
+            ValueError: If the shard is not in the ring
+        """
+        if shard_id not in config.ring.shards and (config.previous is None
+                                                   or shard_id not in config.previous.shards):
+            raise ValueError(f"Shard {shard_id} is not in the shard ring")
+        
+        self.shard_id = shard_id
+        self.ring_file = ring_file
+        self.poll_seconds = poll_seconds
+        self.handoffs = handoffs
+        self.handoff_deadline_seconds = handoff_deadline_seconds
+        self.registry: Optional["AccountRegistry"] = None
+        self._config = config
+        self._awaiting: Set[str] = set()
+        self._early: Dict[int, Set[str]] = {}
+        self._delivering: Set[str] = set()
+        self._lock = threading.Lock()
+    
+    def start(self, registry: "AccountRegistry") -> None:
+        """
+        Start serving the accounts of this shard, and watch the ring file.
+        
+        Args:
+            registry: The registry holding the accounts of this shard
+        """
+        self.registry = registry
+        self._apply(self._config)
+        if self.ring_file is not None:
+            threading.Thread(target=self._watch, args=(os.path.getmtime(self.ring_file),), daemon=True,
+                             name="shard-ring-watcher").start()
+    
+    def owns(self, bank_name: str) -> bool:
+        """
+        Check whether this shard owns an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            True if the current ring assigns the account to this shard
+        """
+        return self._config.ring.owner(bank_name) == self.shard_id
+    
+    def check_owner(self, bank_name: str) -> None:
+        """
+        Check that this shard owns an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Raises:
+            WrongShardException: If another shard owns the account
+        """
+        ring = self._config.ring
+        owner = ring.owner(bank_name)
+        if owner != self.shard_id:
+            raise WrongShardException(f"Bank {bank_name} is served by shard {owner}", ring.address(owner))
+    
+    def check(self, bank_name: str) -> None:
+        """
+        Check that this shard can serve a request for an account now.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Raises:
+            WrongShardException: If another shard owns the account
+            OverloadedException: If the account is still being handed over
+                to this shard
+        """
+        config = self._config
+        self.check_owner(bank_name)
+        if self._awaiting and config.previous is not None:
+            previous_owner = config.previous.owner(bank_name)
+            if previous_owner in self._awaiting:
+                raise OverloadedException(f"Bank {bank_name} is being handed over from shard {previous_owner}",
+                                          HANDOFF_RETRY_AFTER)
+    
+    def receive_handoff(self, version: int, from_shard: str, accounts: Dict[str, Dict[str, str]]) -> int:
+        """
+        Accept the handoff of another shard for a ring version.
+        
+        Handoffs are safe to repeat. One that arrives before this shard has
+        seen the ring version is remembered until it does.
+        
+        Args:
+            version: The ring version the handoff is for
+            from_shard: The shard that released the accounts
+            accounts: The recent idempotency keys of each account moved to
+                this shard, by name
+        
+        Returns:
+            The number of accounts handed over
+        """
+        for bank_name, keys in accounts.items():
+            for idempotency_key, tx_id in keys.items():
+                self.registry.idempotency.put(bank_name, idempotency_key, tx_id)
+        
+        # Recorded before it counts, so a restart never forgets a handoff
+        # that was acknowledged
+        if self.handoffs is not None:
+            self.handoffs.record_handoff(version, self.shard_id, from_shard)
+        
+        with self._lock:
+            current = self._config.version
+            if version == current:
+                self._awaiting.discard(from_shard)
+            elif version > current:
+                self._early.setdefault(version, set()).add(from_shard)
+            awaiting = len(self._awaiting)
+        
+        logger.info(f"Received handoff of {len(accounts)} account(s) from shard {from_shard} "
+                    f"for ring version {version}, awaiting {awaiting} more")
+        return len(accounts)
+    
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the state of this shard.
+        
+        Returns:
+            The shard ID, the ring version and shards, the shards whose
+            handoff has not arrived yet and those this shard has not
+            finished handing off to
+        """
+        with self._lock:
+            config = self._config
+            return {
+                "shardId": self.shard_id,
+                "version": config.version,
+                "shards": dict(config.ring.shards),
+                "previousShards": dict(config.previous.shards) if config.previous is not None else None,
+                "awaitingHandoffFrom": sorted(self._awaiting),
+                "handingOffTo": sorted(self._delivering)
+            }
+    
+    def _watch(self, mtime: float) -> None:
+        """
+        Apply new versions of the ring file as they appear.
+        
+        Args:
+            mtime: The modification time of the file already applied
+        """
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                current_mtime = os.path.getmtime(self.ring_file)
+                if current_mtime == mtime:
+                    continue
+                mtime = current_mtime
+                
+                config = load_ring_file(self.ring_file)
+                if config.version <= self._config.version:
+                    continue
+                logger.info(f"Moving to shard ring version {config.version}")
+                self._apply(config)
+            except Exception as e:
+                logger.error(f"Error reloading the shard ring: {e}")
+    
+    def _apply(self, config: RingConfig) -> None:
+        """
+        Switch to a ring version, and start the handoff if it is a rebalance.
+        
+        Args:
+            config: The ring version
+        """
+        awaiting = set()
+        if config.previous is not None:
+            awaiting = set(config.previous.shards) - {self.shard_id}
+            if self.handoffs is not None:
+                awaiting -= self.handoffs.get_received_handoffs(config.version, self.shard_id)
+        
+        with self._lock:
+            self._config = config
+            self._awaiting = awaiting - self._early.pop(config.version, set())
+            self._early = {version: shards for version, shards in self._early.items() if version > config.version}
+            waiting = bool(self._awaiting)
+        
+        if waiting and self.handoff_deadline_seconds > 0:
+            timer = threading.Timer(self.handoff_deadline_seconds, self._expire_handoffs, args=(config.version,))
+            timer.daemon = True
+            timer.start()
+        
+        if config.previous is not None and self.shard_id in config.previous.shards:
+            threading.Thread(target=self._hand_off, args=(config,), daemon=True,
+                             name=f"shard-handoff-{config.version}").start()
+    
+    def _expire_handoffs(self, version: int) -> None:
+        """
+        Stop waiting for the handoffs of a ring version that have not arrived.
+        
+        Args:
+            version: The ring version whose deadline passed
+        """
+        with self._lock:
+            if self._config.version != version or not self._awaiting:
+                return
+            missing = sorted(self._awaiting)
+            self._awaiting = set()
+        logger.warning(f"No handoff from shard(s) {', '.join(missing)} for ring version {version} after "
+                       f"{self.handoff_deadline_seconds}s, serving their accounts anyway")
+    
+    def _hand_off(self, config: RingConfig) -> None:
+        """
+        Release the accounts this shard no longer owns and post them to their new owners.
+        
+        Args:
+            config: The ring version being moved to
+        """
+        released = self.registry.release(lambda bank_name: config.ring.owner(bank_name) != self.shard_id)
+        logger.info(f"Released {len(released)} account(s) for shard ring version {config.version}")
+        
+        by_owner: Dict[str, Dict[str, Dict[str, str]]] = {
+            shard_id: {} for shard_id in config.ring.shards if shard_id != self.shard_id
+        }
+        for bank_name, keys in released.items():
+            by_owner[config.ring.owner(bank_name)][bank_name] = keys
+        
+        for shard_id, accounts in by_owner.items():
+            threading.Thread(target=self._deliver, args=(config, shard_id, accounts), daemon=True,
+                             name=f"shard-handoff-{config.version}-{shard_id}").start()
+    
+    def _deliver(self, config: RingConfig, shard_id: str, accounts: Dict[str, Dict[str, str]]) -> None:
+        """
+        Post a handoff to a shard, retrying until it is accepted or the ring changes again.
+        
+        Args:
+            config: The ring version of the handoff
+            shard_id: The shard to post to
+            accounts: The recent idempotency keys of each account moved to
+                the shard, by name
+        """
+        url = f"http://{config.ring.address(shard_id)}/api/shard/handoff"
+        body = json.dumps({"version": config.version, "fromShard": self.shard_id,
+                           "accounts": accounts}).encode("utf-8")
+        
+        with self._lock:
+            self._delivering.add(shard_id)
+        delay = 0.5
+        while self._config.version == config.version:
+            try:
+                request = urllib.request.Request(url, data=body, headers={"Content-Type": JSON_MIMETYPE},
+                                                 method="POST")
+                with urllib.request.urlopen(request, timeout=HANDOFF_TIMEOUT_SECONDS):
+                    pass
+                logger.info(f"Handed off {len(accounts)} account(s) to shard {shard_id}")
+                break
+            except OSError as e:
+                logger.warning(f"Handoff to shard {shard_id} failed, retrying in {delay}s: {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, MAX_HANDOFF_BACKOFF_SECONDS)
+        with self._lock:
+            self._delivering.discard(shard_id)
\ No newline at end of file
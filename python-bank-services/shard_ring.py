@@ -0,0 +1,166 @@
+import hashlib
+import json
+from bisect import bisect
+from typing import Dict, Optional
+
+# Points each shard gets on the ring; more points spread the accounts more
+# evenly between shards
+DEFAULT_VIRTUAL_NODES = 128
+
+def ring_hash(value: str) -> int:
+    """
+    Hash a value to a position on the ring.
+    
+    MD5 is used rather than hash(), which is salted per process: every
+    bank-service instance and every client must agree on the owner of an
+    account. The function must stay in sync with bankapi/shard_ring.py in
+    python-money-transfer.
+    
+    Args:
+        value: The value to hash
+    
+    Returns:
+        The position, a 64-bit integer
+    """
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+class HashRing:
+    """
+    Assigns accounts to shards by consistent hashing of their name.
+    
+    Each shard is hashed to `virtual_nodes` points on the ring, and an
+    account belongs to the shard of the first point after the hash of its
+    name. Adding or removing a shard therefore only moves the accounts of
+    the ring segments it takes or gives up.
+    """
+    
+    def __init__(self, shards: Dict[str, str], virtual_nodes: int = DEFAULT_VIRTUAL_NODES):
+        """
+        Build the ring.
+        
+        Args:
+            shards: The address ("host:port") of each shard, by shard ID
+            virtual_nodes: The number of points of each shard
+        
+        Raises:
+            ValueError: If there are no shards
+        """
+        if not shards:
+            raise ValueError("A shard ring needs at least one shard")
+        
+        self.shards = dict(shards)
+        self.virtual_nodes = virtual_nodes
+        points = sorted((ring_hash(f"{shard_id}#{i}"), shard_id)
+                        for shard_id in self.shards for i in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [shard_id for _, shard_id in points]
+    
+    def owner(self, bank_name: str) -> str:
+        """
+        Get the shard that owns an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The shard ID
+        """
+        index = bisect(self._hashes, ring_hash(bank_name)) % len(self._hashes)
+        return self._owners[index]
+    
+    def address(self, shard_id: str) -> str:
+        """
+        Get the address of a shard.
+        
+        Args:
+            shard_id: The shard ID
+        
+        Returns:
+            The address, as "host:port"
+        """
+        return self.shards[shard_id]
+
+class RingConfig:
+    """
+    A version of the shard ring.
+    
+    While accounts are being rebalanced, the ring it replaces is kept as
+    `previous`, so that each shard knows which accounts it takes over and
+    from whom.
+    """
+    
+    __slots__ = ("version", "ring", "previous")
+    
+    def __init__(self, version: int, ring: HashRing, previous: Optional[HashRing] = None):
+        """
+        Initialize the ring version.
+        
+        Args:
+            version: The version number; a shard only moves to higher versions
+            ring: The ring
+            previous: The ring being replaced, during a rebalance
+        """
+        self.version = version
+        self.ring = ring
+        self.previous = previous
+
+def parse_shards(spec: str) -> Dict[str, str]:
+    """
+    Parse a static list of shards.
+    
+    Args:
+        spec: Comma-separated "id=host:port" entries, such as
+            "bank-1=10.0.0.1:8480,bank-2=10.0.0.2:8480"
+    
+    Returns:
+        The address of each shard, by shard ID
+    
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    shards = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        shard_id, separator, address = entry.partition("=")
+        if not separator or not shard_id.strip() or not address.strip():
+            raise ValueError(f"Shard entries must look like id=host:port, got {entry!r}")
+        shards[shard_id.strip()] = address.strip()
+    return shards
+
+def load_ring_file(path: str) -> RingConfig:
+    """
+    Load the shard ring from a JSON file.
+    
+    The file looks like:
+    
+        {
+            "version": 2,
+            "virtualNodes": 128,
+            "shards": {"bank-1": "10.0.0.1:8480", "bank-2": "10.0.0.2:8480"},
+            "previous": {"bank-1": "10.0.0.1:8480"}
+        }
+    
+    "previous" lists the shards of the ring being replaced, and is only
+    present while accounts are rebalanced.
+    
+    Args:
+        path: The path of the file
+    
+    Returns:
+        The ring version
+    
+    Raises:
+        ValueError: If the file is malformed
+    """
+    with open(path, encoding="utf-8") as ring_file:
+        document = json.load(ring_file)
+    
+    virtual_nodes = int(document.get("virtualNodes", DEFAULT_VIRTUAL_NODES))
+    previous = document.get("previous")
+    return RingConfig(
+        int(document.get("version", 0)),
+        HashRing(document.get("shards") or {}, virtual_nodes),
+        HashRing(previous, virtual_nodes) if previous else None
+    )
\ No newline at end of file
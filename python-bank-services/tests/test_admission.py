@@ -0,0 +1,70 @@
+import threading
+import unittest
+
+from admission import AdmissionController, OverloadedException
+
+class AdmissionControllerTest(unittest.TestCase):
+    """Tests of the per-account and global request limits."""
+    
+    def test_requests_within_the_limits_are_admitted(self):
+        admission = AdmissionController(max_in_flight=2, account_max_in_flight=2)
+        
+        with admission.admit("Maria"), admission.admit("Maria"):
+            self.assertEqual(admission.stats()["inFlight"], 2)
+        
+        self.assertEqual(admission.stats(), {"inFlight": 0, "accountsQueued": 0, "rejected": 0})
+    
+    def test_full_account_queue_rejects_at_once(self):
+        admission = AdmissionController(account_max_in_flight=1, account_queue_size=0, max_wait_seconds=5)
+        
+        with admission.admit("Maria"):
+            with self.assertRaises(OverloadedException) as raised:
+                with admission.admit("Maria"):
+                    pass
+            # Another account is not held back by the busy one
+            with admission.admit("David"):
+                pass
+        
+        self.assertGreaterEqual(raised.exception.retry_after, 1)
+        self.assertEqual(admission.stats()["rejected"], 1)
+    
+    def test_queued_request_times_out(self):
+        admission = AdmissionController(account_max_in_flight=1, account_queue_size=1, max_wait_seconds=0.05)
+        
+        with admission.admit("Maria"):
+            with self.assertRaises(OverloadedException):
+                with admission.admit("Maria"):
+                    pass
+        
+        self.assertEqual(admission.stats()["rejected"], 1)
+    
+    def test_queued_request_is_admitted_when_a_place_frees_up(self):
+        admission = AdmissionController(account_max_in_flight=1, account_queue_size=1, max_wait_seconds=5)
+        entered = threading.Event()
+        leave = threading.Event()
+        
+        def hold():
+            with admission.admit("Maria"):
+                entered.set()
+                leave.wait()
+        
+        holder = threading.Thread(target=hold)
+        holder.start()
+        entered.wait()
+        threading.Timer(0.05, leave.set).start()
+        
+        with admission.admit("Maria"):
+            pass
+        holder.join()
+        
+        self.assertEqual(admission.stats()["rejected"], 0)
+    
+    def test_global_limit_rejects_when_every_slot_is_taken(self):
+        admission = AdmissionController(max_in_flight=1, max_wait_seconds=0.05)
+        
+        with admission.admit("Maria"):
+            with self.assertRaises(OverloadedException):
+                with admission.admit("David"):
+                    pass
+        
+        self.assertEqual(admission.stats()["rejected"], 1)
\ No newline at end of file
@@ -0,0 +1,75 @@
+import unittest
+from typing import Dict, Optional
+
+from account_registry import AccountRegistry
+from admission import OverloadedException
+from bank import InsufficientFundsException
+
+class FakeRepository:
+    """The part of the bank repository that account operations write to."""
+    
+    def __init__(self, balances: Dict[str, int]):
+        self.balances = dict(balances)
+        self.transactions: Dict[str, str] = {}
+    
+    def find_account_balance(self, bank_name: str) -> Optional[int]:
+        return self.balances.get(bank_name)
+    
+    def find_transaction_id(self, bank_name: str, idempotency_key: str) -> Optional[str]:
+        return self.transactions.get(idempotency_key)
+    
+    def update_balance(self, bank_name: str, balance: int) -> None:
+        self.balances[bank_name] = balance
+    
+    def log_transaction(self, operation: str, amount: int, tx_id: str, idempotency_key: str,
+                        bank_name: str) -> None:
+        self.transactions[idempotency_key] = tx_id
+
+class BankTest(unittest.TestCase):
+    """Tests of deposits and withdrawals on a registered account."""
+    
+    def setUp(self):
+        self.repository = FakeRepository({"Maria": 100})
+        self.registry = AccountRegistry(self.repository, lock_stripes=4)
+    
+    def load(self, bank_name: str = "Maria"):
+        """Get a handle on an account, loading it from the repository."""
+        return self.registry.get_or_load(bank_name, lambda: self.repository.find_account_balance(bank_name))
+    
+    def test_deposit_and_withdraw_update_the_stored_balance(self):
+        bank = self.load()
+        bank.deposit(50, "k1")
+        bank.withdraw(30, "k2")
+        
+        self.assertEqual(bank.get_balance(), 120)
+        self.assertEqual(self.repository.balances["Maria"], 120)
+    
+    def test_repeated_withdrawal_is_answered_before_the_funds_are_checked(self):
+        bank = self.load()
+        tx_id = bank.withdraw(80, "k1")
+        
+        self.assertEqual(bank.withdraw(80, "k1"), tx_id)
+        with self.assertRaises(InsufficientFundsException):
+            bank.withdraw(80, "k2")
+    
+    def test_repeated_withdrawal_is_found_in_the_logged_transactions(self):
+        tx_id = self.load().withdraw(80, "k1")
+        self.registry.idempotency.pop_accounts({"Maria"})
+        
+        self.assertEqual(self.load().withdraw(80, "k1"), tx_id)
+        self.assertEqual(self.repository.balances["Maria"], 20)
+    
+    def test_handle_from_before_a_handoff_moves_to_the_new_slot(self):
+        stale = self.load()
+        self.registry.release(lambda bank_name: True)
+        # Another shard served the account while it was away
+        self.repository.balances["Maria"] = 500
+        
+        with self.assertRaises(OverloadedException):
+            stale.deposit(10, "k1")
+        
+        self.load()
+        stale.deposit(10, "k1")
+        
+        self.assertEqual(self.repository.balances["Maria"], 510)
+        self.assertEqual(self.load().get_balance(), 510)
\ No newline at end of file
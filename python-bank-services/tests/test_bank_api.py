@@ -0,0 +1,28 @@
+import unittest
+
+import msgpack
+
+from bank_api import decode_params
+from wire_format import JSON_MIMETYPE, MSGPACK_MIMETYPE
+
+class DecodeParamsTest(unittest.TestCase):
+    """Tests of reading the parameters of an API request."""
+    
+    def test_msgpack_body_overrides_query_parameters(self):
+        body = msgpack.packb({"bankName": "Maria", "amount": 100})
+        
+        self.assertEqual(decode_params({"bankName": "David", "idempotencyKey": "k1"}, MSGPACK_MIMETYPE, body),
+                         {"bankName": "Maria", "amount": 100, "idempotencyKey": "k1"})
+    
+    def test_other_bodies_are_ignored(self):
+        self.assertEqual(decode_params({"bankName": "Maria"}, JSON_MIMETYPE, b'{"bankName": "David"}'),
+                         {"bankName": "Maria"})
+    
+    def test_msgpack_body_that_is_not_a_map_is_rejected(self):
+        for value in (42, ["Maria", 100]):
+            with self.assertRaises(ValueError):
+                decode_params({}, MSGPACK_MIMETYPE, msgpack.packb(value))
+    
+    def test_malformed_msgpack_body_is_rejected(self):
+        with self.assertRaises(ValueError):
+            decode_params({}, MSGPACK_MIMETYPE, b"\xc1")
\ No newline at end of file
@@ -0,0 +1,93 @@
+import unittest
+from typing import Any, Dict, Iterator, List, Optional
+
+from ledger_replay import ReplayEngine, rebase
+from repository.ledger_repository import LedgerRepository
+
+class InMemoryLedger(LedgerRepository):
+    """A ledger whose events and snapshots live as long as the test."""
+    
+    def __init__(self):
+        self.events: Dict[str, List[Dict[str, Any]]] = {}
+        self.snapshots: Dict[str, List[Dict[str, Any]]] = {}
+        self.sequences: Dict[str, int] = {}
+    
+    def open_account(self, bank_name: str, balance: int) -> bool:
+        if bank_name in self.sequences:
+            return False
+        self.append_event(bank_name, "open", balance, balance)
+        return True
+    
+    def append_event(self, bank_name: str, operation: str, delta: int, balance: int,
+                     tx_id: Optional[str] = None) -> int:
+        seq = self.sequences[bank_name] = self.sequences.get(bank_name, 0) + 1
+        self.events.setdefault(bank_name, []).append({"seq": seq, "delta": delta, "balance": balance})
+        return seq
+    
+    def lose_event(self, bank_name: str) -> None:
+        """Take a sequence number without writing its event, like a failed insert."""
+        self.sequences[bank_name] += 1
+    
+    def save_snapshot(self, bank_name: str, balance: int, seq: int) -> None:
+        self.snapshots.setdefault(bank_name, []).append({"seq": seq, "balance": balance})
+    
+    def last_seq(self, bank_name: str) -> int:
+        return self.sequences.get(bank_name, 0)
+    
+    def latest_snapshot(self, bank_name: str) -> Optional[Dict[str, Any]]:
+        snapshots = self.snapshots.get(bank_name)
+        return max(snapshots, key=lambda snapshot: snapshot["seq"]) if snapshots else None
+    
+    def iter_events(self, bank_name: str, after_seq: int = 0) -> Iterator[Dict[str, Any]]:
+        return iter([event for event in self.events.get(bank_name, []) if event["seq"] > after_seq])
+    
+    def get_ledger_accounts(self) -> List[str]:
+        return list(self.sequences)
+
+class StoredBalances:
+    """The part of the bank repository the replay reads."""
+    
+    def __init__(self, balances: Dict[str, int]):
+        self.balances = balances
+    
+    def find_account_balance(self, bank_name: str) -> Optional[int]:
+        return self.balances.get(bank_name)
+
+class ReplayEngineTest(unittest.TestCase):
+    """Tests of rebuilding balances from the ledger."""
+    
+    def setUp(self):
+        self.ledger = InMemoryLedger()
+        self.ledger.open_account("Maria", 100)
+        self.ledger.append_event("Maria", "deposit", 50, 150)
+    
+    def test_replay_matches_the_stored_balance(self):
+        result = ReplayEngine(self.ledger, StoredBalances({"Maria": 150})).replay_account("Maria")
+        
+        self.assertTrue(result.consistent)
+        self.assertEqual((result.balance, result.last_seq, result.events_replayed), (150, 2, 2))
+    
+    def test_replay_starts_from_the_latest_snapshot(self):
+        self.ledger.save_snapshot("Maria", 150, 2)
+        self.ledger.append_event("Maria", "withdraw", -30, 120)
+        
+        result = ReplayEngine(self.ledger, StoredBalances({"Maria": 120})).replay_account("Maria")
+        
+        self.assertTrue(result.consistent)
+        self.assertEqual((result.snapshot_seq, result.events_replayed), (2, 1))
+    
+    def test_lost_event_breaks_the_ledger_until_it_is_rebased(self):
+        self.ledger.lose_event("Maria")
+        self.ledger.append_event("Maria", "deposit", 10, 170)
+        engine = ReplayEngine(self.ledger, StoredBalances({"Maria": 170}))
+        
+        broken = engine.replay_account("Maria")
+        self.assertFalse(broken.ledger_consistent)
+        
+        rebase(self.ledger, broken)
+        self.ledger.append_event("Maria", "withdraw", -20, 150)
+        engine.repository.balances["Maria"] = 150
+        
+        result = engine.replay_account("Maria")
+        self.assertTrue(result.consistent)
+        self.assertEqual((result.snapshot_seq, result.balance), (4, 150))
\ No newline at end of file
@@ -0,0 +1,95 @@
+import time
+import unittest
+from typing import Dict, Set
+
+from account_registry import IdempotencyCache
+from admission import OverloadedException
+from repository.handoff_repository import HandoffRepository
+from shard_coordinator import ShardCoordinator, WrongShardException
+from shard_ring import HashRing, RingConfig
+
+OLD_RING = HashRing({"bank-1": "bank-1:8480"})
+NEW_RING = HashRing({"bank-1": "bank-1:8480", "bank-2": "bank-2:8480"})
+
+# An account that moves from bank-1 to bank-2, and one that stays on bank-1
+MOVED = next(f"account-{i}" for i in range(1000) if NEW_RING.owner(f"account-{i}") == "bank-2")
+STAYED = next(f"account-{i}" for i in range(1000) if NEW_RING.owner(f"account-{i}") == "bank-1")
+
+class FakeRegistry:
+    """The part of the account registry the coordinator uses."""
+    
+    def __init__(self):
+        self.idempotency = IdempotencyCache(100)
+
+class InMemoryHandoffRepository(HandoffRepository):
+    """A record of received handoffs that lives as long as the test."""
+    
+    def __init__(self):
+        self.received: Dict[str, Set[str]] = {}
+    
+    def record_handoff(self, version: int, shard_id: str, from_shard: str) -> None:
+        self.received.setdefault(f"{version}:{shard_id}", set()).add(from_shard)
+    
+    def get_received_handoffs(self, version: int, shard_id: str) -> Set[str]:
+        return set(self.received.get(f"{version}:{shard_id}", set()))
+
+def new_shard(handoffs: HandoffRepository = None, deadline: float = 0) -> ShardCoordinator:
+    """Start bank-2, which takes over accounts from bank-1 in ring version 2."""
+    coordinator = ShardCoordinator("bank-2", RingConfig(2, NEW_RING, OLD_RING), handoffs=handoffs,
+                                   handoff_deadline_seconds=deadline)
+    coordinator.start(FakeRegistry())
+    return coordinator
+
+class ShardCoordinatorTest(unittest.TestCase):
+    """Tests of the handoff of accounts to a shard joining the ring."""
+    
+    def test_accounts_of_other_shards_are_redirected(self):
+        coordinator = new_shard()
+        
+        with self.assertRaises(WrongShardException) as raised:
+            coordinator.check(STAYED)
+        self.assertEqual(raised.exception.owner_address, "bank-1:8480")
+    
+    def test_gained_accounts_wait_for_the_handoff(self):
+        coordinator = new_shard()
+        
+        with self.assertRaises(OverloadedException):
+            coordinator.check(MOVED)
+        self.assertEqual(coordinator.status()["awaitingHandoffFrom"], ["bank-1"])
+    
+    def test_handoff_releases_accounts_and_keeps_idempotency_keys(self):
+        coordinator = new_shard()
+        
+        self.assertEqual(coordinator.receive_handoff(2, "bank-1", {MOVED: {"key-1": "tx-1"}}), 1)
+        
+        coordinator.check(MOVED)
+        self.assertEqual(coordinator.registry.idempotency.get(MOVED, "key-1"), "tx-1")
+        self.assertEqual(coordinator.status()["awaitingHandoffFrom"], [])
+    
+    def test_handoff_that_arrives_before_the_ring_version_is_kept(self):
+        coordinator = ShardCoordinator("bank-2", RingConfig(1, NEW_RING), handoff_deadline_seconds=0)
+        coordinator.start(FakeRegistry())
+        
+        coordinator.receive_handoff(2, "bank-1", {})
+        coordinator._apply(RingConfig(2, NEW_RING, OLD_RING))
+        
+        coordinator.check(MOVED)
+    
+    def test_received_handoffs_survive_a_restart(self):
+        handoffs = InMemoryHandoffRepository()
+        new_shard(handoffs).receive_handoff(2, "bank-1", {})
+        
+        restarted = new_shard(handoffs)
+        
+        restarted.check(MOVED)
+        self.assertEqual(restarted.status()["awaitingHandoffFrom"], [])
+    
+    def test_missing_handoff_stops_blocking_after_the_deadline(self):
+        coordinator = new_shard(deadline=0.05)
+        with self.assertRaises(OverloadedException):
+            coordinator.check(MOVED)
+        
+        time.sleep(0.2)
+        
+        coordinator.check(MOVED)
+        self.assertEqual(coordinator.status()["awaitingHandoffFrom"], [])
\ No newline at end of file
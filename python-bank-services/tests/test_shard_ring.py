@@ -0,0 +1,75 @@
+import json
+import os
+import tempfile
+import unittest
+
+from shard_ring import HashRing, load_ring_file, parse_shards
+
+ACCOUNTS = [f"account-{i}" for i in range(2000)]
+
+def shards(*shard_ids: str) -> dict:
+    """Build the addresses of some shards."""
+    return {shard_id: f"{shard_id}:8480" for shard_id in shard_ids}
+
+class HashRingTest(unittest.TestCase):
+    """Tests of the assignment of accounts to shards."""
+    
+    def test_owner_does_not_depend_on_shard_order(self):
+        ring = HashRing(shards("bank-1", "bank-2", "bank-3"))
+        reordered = HashRing(shards("bank-3", "bank-1", "bank-2"))
+        
+        self.assertEqual([ring.owner(name) for name in ACCOUNTS], [reordered.owner(name) for name in ACCOUNTS])
+    
+    def test_accounts_spread_over_every_shard(self):
+        ring = HashRing(shards("bank-1", "bank-2", "bank-3"))
+        counts = {shard_id: 0 for shard_id in ring.shards}
+        for name in ACCOUNTS:
+            counts[ring.owner(name)] += 1
+        
+        for count in counts.values():
+            self.assertGreater(count, len(ACCOUNTS) / 6)
+    
+    def test_adding_a_shard_only_moves_accounts_to_it(self):
+        before = HashRing(shards("bank-1", "bank-2", "bank-3"))
+        after = HashRing(shards("bank-1", "bank-2", "bank-3", "bank-4"))
+        
+        moved = [name for name in ACCOUNTS if before.owner(name) != after.owner(name)]
+        self.assertTrue(moved)
+        self.assertTrue(all(after.owner(name) == "bank-4" for name in moved))
+        self.assertLess(len(moved), len(ACCOUNTS) / 2)
+    
+    def test_address_of_a_shard(self):
+        ring = HashRing(shards("bank-1"))
+        
+        self.assertEqual(ring.owner("Maria"), "bank-1")
+        self.assertEqual(ring.address("bank-1"), "bank-1:8480")
+    
+    def test_ring_needs_a_shard(self):
+        with self.assertRaises(ValueError):
+            HashRing({})
+
+class RingConfigurationTest(unittest.TestCase):
+    """Tests of reading the shard ring from the environment and from a file."""
+    
+    def test_parse_shards(self):
+        self.assertEqual(parse_shards(" bank-1=10.0.0.1:8480, bank-2=10.0.0.2:8480,"),
+                         {"bank-1": "10.0.0.1:8480", "bank-2": "10.0.0.2:8480"})
+    
+    def test_parse_shards_rejects_malformed_entries(self):
+        for spec in ("bank-1", "=10.0.0.1:8480", "bank-1="):
+            with self.assertRaises(ValueError):
+                parse_shards(spec)
+    
+    def test_load_ring_file_with_previous_ring(self):
+        document = {"version": 2, "virtualNodes": 16, "shards": shards("bank-1", "bank-2"),
+                    "previous": shards("bank-1")}
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as ring_file:
+            json.dump(document, ring_file)
+        self.addCleanup(os.remove, ring_file.name)
+        
+        config = load_ring_file(ring_file.name)
+        
+        self.assertEqual(config.version, 2)
+        self.assertEqual(config.ring.shards, shards("bank-1", "bank-2"))
+        self.assertEqual(config.ring.virtual_nodes, 16)
+        self.assertEqual(config.previous.shards, shards("bank-1"))
\ No newline at end of file
@@ -0,0 +1,28 @@
+# Media types understood by the bank API. Clients that send and accept
+# MSGPACK_MIMETYPE exchange compact binary messages; everyone else keeps
+# using query parameters and JSON responses.
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+# Media types of the transaction export
+NDJSON_MIMETYPE = "application/x-ndjson"
+CSV_MIMETYPE = "text/csv"
+
+# Response header naming the address ("host:port") of the shard that owns
+# the account, sent with WRONG_SHARD errors
+SHARD_OWNER_HEADER = "X-Bank-Shard-Owner"
+
+class ErrorCode:
+    """
+    Numeric error codes carried in the "code" field of error responses.
+    
+    Clients map these directly to exception types, so the values must stay
+    in sync with bankapi/wire_format.py in python-money-transfer.
+    """
+    INVALID_REQUEST = 1
+    NO_SUCH_BANK = 2
+    BANK_STOPPED = 3
+    INSUFFICIENT_FUNDS = 4
+    NOT_FOUND = 5
+    OVERLOADED = 6
+    WRONG_SHARD = 7
\ No newline at end of file
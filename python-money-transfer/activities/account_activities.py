@@ -1,13 +1,23 @@
 import logging
+import time
 from abc import ABC, abstractmethod
+from typing import Optional
 
 from temporalio import activity
 
-from exceptions import InsufficientFundsException
+from exceptions import BankOverloadedException, InsufficientFundsException
 from bankapi.banking_api_client import BankingApiClient
+from bankapi.shard_ring import ShardRing
+from bankapi.wire_format import WIRE_FORMAT_JSON
+from telemetry.transfer_metrics import BANK_CALL_LATENCY
 
 logger = logging.getLogger(__name__)
 
+# Longest an attempt waits, as the bank asked with Retry-After, before it
+# fails with BankOverloadedException and the retry policy takes over. The
+# wait is also kept under half the attempt's start-to-close timeout.
+MAX_OVERLOAD_WAIT_SECONDS = 5.0
+
 
 class AccountActivities(ABC):
     """
@@ -49,15 +59,25 @@ class AccountActivitiesImpl(AccountActivities):
     Implementation of account activities.
     """
     
-    def __init__(self, hostname: str = "localhost", port: int = 8480):
+    def __init__(self, hostname: str = "localhost", port: int = 8480, wire_format: str = WIRE_FORMAT_JSON,
+                 hedge_requests: bool = False, shard_ring: Optional[ShardRing] = None):
         """
         Initialize the activities with a bank API client.
         
         Args:
             hostname: The hostname of the bank API server
             port: The port number of the bank API server
+            wire_format: The wire format used to talk to the bank API
+            hedge_requests: Whether slow bank API calls are hedged
+            shard_ring: Routes each call to the bank-service shard owning the
+                account; without it, every call goes to hostname and port
         """
-        self.client = BankingApiClient(hostname, port)
+        self.client = BankingApiClient(hostname, port, wire_format, hedge_requests=hedge_requests,
+                                       shard_ring=shard_ring)
+    
+    def close(self) -> None:
+        """Release the resources of the bank API client."""
+        self.client.close()
     
     @activity.defn(name="deposit")
     def deposit(self, bank_name: str, amount: int, idempotency_key: str) -> str:
@@ -72,8 +92,23 @@ class AccountActivitiesImpl(AccountActivities):
         Returns:
             The transaction ID
         """
-        logger.info(f"Depositing {amount} into account {bank_name} with key {idempotency_key}")
-        return self.client.deposit(bank_name, amount, idempotency_key)
+        logger.info("Depositing %s into account %s with key %s", amount, bank_name, idempotency_key)
+        start = time.monotonic()
+        outcome = "failure"
+        overloaded: Optional[BankOverloadedException] = None
+        try:
+            tx_id = self.client.deposit(bank_name, amount, idempotency_key)
+            outcome = "success"
+            return tx_id
+        except BankOverloadedException as e:
+            overloaded = e
+            raise
+        finally:
+            self._record_bank_call("deposit", outcome, start)
+            # Only after the call is recorded, so the wait is not counted
+            # as bank latency
+            if overloaded is not None:
+                self._wait_before_retry(overloaded)
     
     @activity.defn(name="withdraw")
     def withdraw(self, bank_name: str, amount: int, idempotency_key: str) -> str:
@@ -88,10 +123,58 @@ class AccountActivitiesImpl(AccountActivities):
         Returns:
             The transaction ID
         """
-        logger.info(f"Withdrawing {amount} from account {bank_name} with key {idempotency_key}")
+        logger.info("Withdrawing %s from account %s with key %s", amount, bank_name, idempotency_key)
+        start = time.monotonic()
+        outcome = "failure"
+        overloaded: Optional[BankOverloadedException] = None
         try:
-            return self.client.withdraw(bank_name, amount, idempotency_key)
+            tx_id = self.client.withdraw(bank_name, amount, idempotency_key)
+            outcome = "success"
+            return tx_id
         except InsufficientFundsException as e:
             # Re-raise to maintain the exception type
-            logger.error(f"Insufficient funds: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error("Insufficient funds: %s", e)
+            raise
+        except BankOverloadedException as e:
+            overloaded = e
+            raise
+        finally:
+            self._record_bank_call("withdraw", outcome, start)
+            # Only after the call is recorded, so the wait is not counted
+            # as bank latency
+            if overloaded is not None:
+                self._wait_before_retry(overloaded)
+    
+    def _wait_before_retry(self, error: BankOverloadedException) -> None:
+        """
+        Wait as long as the overloaded bank asked before failing the attempt.
+        
+        The retry policy's first retry interval is shorter than a typical
+        Retry-After, so without the wait the next attempt would most likely
+        be turned away as well.
+        
+        Args:
+            error: The error raised for the bank's 429 response
+        """
+        if not error.retry_after:
+            return
+        wait = min(float(error.retry_after), MAX_OVERLOAD_WAIT_SECONDS)
+        start_to_close_timeout = activity.info().start_to_close_timeout
+        if start_to_close_timeout is not None:
+            wait = min(wait, start_to_close_timeout.total_seconds() / 2)
+        logger.info("Bank is overloaded, waiting %.1fs before the attempt fails", wait)
+        time.sleep(wait)
+    
+    def _record_bank_call(self, operation: str, outcome: str, start: float) -> None:
+        """
+        Record the latency of a bank API call made by the current activity.
+        
+        Args:
+            operation: The bank operation (deposit or withdraw)
+            outcome: "success" or "failure"
+            start: The time.monotonic() value when the call started
+        """
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        activity.metric_meter().create_histogram(
+            BANK_CALL_LATENCY, "Duration of bank API calls", "ms"
+        ).record(elapsed_ms, {"operation": operation, "outcome": outcome})
\ No newline at end of file
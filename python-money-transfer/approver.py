@@ -0,0 +1,134 @@
+import argparse
+import asyncio
+import logging
+import sys
+from typing import List, Optional
+
+from temporalio.client import Client
+
+from codec.data_converter import create_data_converter
+from workflows.money_transfer_workflow_impl import MoneyTransferWorkflowImpl
+from workflows.search_attributes import STATUS_AWAITING_APPROVAL
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+def build_query(min_amount: Optional[int], max_amount: Optional[int], sender: Optional[str]) -> str:
+    """
+    Build the visibility query that selects the held transfers to approve.
+    
+    Args:
+        min_amount: Only approve transfers of at least this amount
+        max_amount: Only approve transfers of at most this amount
+        sender: Only approve transfers from this sender
+    
+    Returns:
+        The visibility query
+    """
+    clauses = [
+        "ExecutionStatus = 'Running'",
+        f"TransferStatus = '{STATUS_AWAITING_APPROVAL}'"
+    ]
+    if min_amount is not None:
+        clauses.append(f"Amount >= {min_amount}")
+    if max_amount is not None:
+        clauses.append(f"Amount <= {max_amount}")
+    if sender is not None:
+        escaped_sender = sender.replace("'", "\\'")
+        clauses.append(f"Sender = '{escaped_sender}'")
+    return " AND ".join(clauses)
+
+async def approve_all(manager_name: str, query: str, parallelism: int, dry_run: bool = False) -> int:
+    """
+    Approve every held transfer that matches a query.
+    
+    The matching workflows are found with one indexed visibility query and
+    signalled concurrently, with at most `parallelism` signals in flight.
+    
+    Args:
+        manager_name: The name of the approving manager
+        query: The visibility query selecting the transfers
+        parallelism: The maximum number of concurrent signals
+        dry_run: List the matching transfers without approving them
+    
+    Returns:
+        The number of transfers that could not be approved
+    """
+    # Connect to the Temporal server
+    client = await Client.connect("localhost:7233", data_converter=create_data_converter())
+    
+    logger.info(f"Finding held transfers: {query}")
+    semaphore = asyncio.Semaphore(parallelism)
+    
+    async def approve(workflow_id: str, run_id: str) -> None:
+        async with semaphore:
+            handle = client.get_workflow_handle(workflow_id, run_id=run_id)
+            await handle.signal(MoneyTransferWorkflowImpl.approve, manager_name)
+    
+    workflow_ids: List[str] = []
+    tasks = []
+    async for execution in client.list_workflows(query):
+        workflow_ids.append(execution.id)
+        if not dry_run:
+            tasks.append(asyncio.create_task(approve(execution.id, execution.run_id)))
+    
+    if dry_run:
+        for workflow_id in workflow_ids:
+            logger.info(f"Would approve {workflow_id}")
+        logger.info(f"{len(workflow_ids)} transfer(s) awaiting approval")
+        return 0
+    
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    
+    failures = 0
+    for workflow_id, result in zip(workflow_ids, results):
+        if isinstance(result, Exception):
+            failures += 1
+            logger.error(f"Could not approve {workflow_id}: {result}")
+    
+    logger.info(f"Approved {len(workflow_ids) - failures} of {len(workflow_ids)} held transfer(s) "
+                f"as {manager_name}")
+    return failures
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Approve all held transfers that match the given filters.")
+    parser.add_argument("manager", help="name of the approving manager")
+    parser.add_argument("--min-amount", type=int, help="only approve transfers of at least this amount")
+    parser.add_argument("--max-amount", type=int, help="only approve transfers of at most this amount")
+    parser.add_argument("--sender", help="only approve transfers from this sender")
+    parser.add_argument("--parallelism", type=int, default=20, help="maximum number of concurrent signals")
+    parser.add_argument("--dry-run", action="store_true", help="list the matching transfers without approving")
+    return parser.parse_args()
+
+def main():
+    """Main entry point for the bulk approval command."""
+    args = parse_args()
+    if args.parallelism < 1:
+        print("Parallelism must be at least 1")
+        sys.exit(1)
+    
+    query = build_query(args.min_amount, args.max_amount, args.sender)
+    
+    try:
+        failures = asyncio.run(approve_all(args.manager, query, args.parallelism, args.dry_run))
+    except KeyboardInterrupt:
+        logger.info("Approver stopped by keyboard interrupt")
+        return
+    except Exception as e:
+        logger.error(f"Approver failed with error: {e}", exc_info=True)
+        sys.exit(1)
+    
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
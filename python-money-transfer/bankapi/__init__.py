@@ -1,5 +1,6 @@
 # Make the bankapi directory a Python package
 from .banking_api_client import BankingApiClient
 from .message_parser import MessageParser
+from .shard_ring import HashRing, ShardRing, parse_shards
 
-__all__ = ["BankingApiClient", "MessageParser"]
\ No newline at end of file
+__all__ = ["BankingApiClient", "HashRing", "MessageParser", "ShardRing", "parse_shards"]
\ No newline at end of file
@@ -1,28 +1,90 @@
 import logging
 import requests
+import threading
+import time
 import urllib.parse
-from typing import Any, Dict
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from typing import Any, Callable, Dict, Optional, Union
 
+import msgpack
+from opentelemetry import propagate, trace
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+from exceptions import BankUnavailableException
+from .circuit_breaker import CircuitBreaker
+from .latency_tracker import LatencyTracker
 from .message_parser import MessageParser
+from .shard_ring import ShardRing
+from .wire_format import (JSON_MIMETYPE, MSGPACK_MIMETYPE, SHARD_OWNER_HEADER, WIRE_FORMAT_JSON,
+                          WIRE_FORMAT_MSGPACK)
 
 logger = logging.getLogger(__name__)
 
+tracer = trace.get_tracer(__name__)
+
+# Hedged requests are never sent sooner than this, so that a fast bank does
+# not see duplicate traffic from ordinary jitter
+MINIMUM_HEDGE_DELAY = 0.05
+
+# HTTP status of a request sent to a shard that does not own the account
+MISDIRECTED_REQUEST = 421
+
 class BankingApiClient:
     """
     Client for interacting with the bank API.
+    
+    Every endpoint is protected by its own circuit breaker, so that calls fail
+    fast while the bank service is failing or slow instead of each waiting for
+    the full timeout. All calls made by this client are safe to repeat
+    (balance reads, and deposits and withdrawals carrying idempotency keys),
+    so they can optionally be hedged: if a call has not answered within the
+    95th percentile of recent latencies, a second identical request is sent.
+    The hedge's answer is only used if it is a success: an error from the
+    hedge may just mean that the first request is still being applied, so
+    the first request's own answer is waited for instead.
+    
+    With a shard ring, each call goes to the bank-service instance that owns
+    the account, and every instance has its own circuit breakers. A call
+    that reaches a shard the account has moved away from is sent once more
+    to the owner the shard names, and the ring is reloaded.
     """
     
-    def __init__(self, hostname: str, port_number: int):
+    def __init__(self, hostname: str, port_number: int, wire_format: str = WIRE_FORMAT_JSON,
+                 timeout: float = 10, hedge_requests: bool = False, shard_ring: Optional[ShardRing] = None):
         """
         Initialize the client.
         
         Args:
             hostname: The hostname of the bank API server
             port_number: The port number of the bank API server
+            wire_format: WIRE_FORMAT_JSON to send query parameters and accept
+                JSON, or WIRE_FORMAT_MSGPACK to exchange MessagePack bodies
+            timeout: The timeout in seconds for a single HTTP request
+            hedge_requests: Whether to send a hedged request when a call is
+                slower than the 95th percentile of recent calls
+            shard_ring: Routes each call to the shard that owns the account;
+                without it, every call goes to hostname and port_number
         """
+        if wire_format not in (WIRE_FORMAT_JSON, WIRE_FORMAT_MSGPACK):
+            raise ValueError(f"Unsupported wire format: {wire_format}")
+        
         self.hostname = hostname
         self.port_number = port_number
+        self.wire_format = wire_format
+        self.timeout = timeout
+        self.hedge_requests = hedge_requests
+        self.shard_ring = shard_ring
         self.parser = MessageParser()
+        
+        self._endpoints_lock = threading.Lock()
+        self._circuit_breakers: Dict[str, CircuitBreaker] = {}
+        self._latency_trackers: Dict[str, LatencyTracker] = {}
+        self._hedge_executor = ThreadPoolExecutor(max_workers=20) if hedge_requests else None
+    
+    def close(self) -> None:
+        """Stop the threads that send hedged requests, once the requests in flight finish."""
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=True, cancel_futures=True)
     
     def get_balance(self, bank_name: str) -> int:
         """
@@ -36,13 +98,12 @@ class BankingApiClient:
             
         Raises:
             NoSuchAccountException: If the account doesn't exist
+            BankUnavailableException: If the circuit for the endpoint is open
+            BankOverloadedException: If the bank asked to retry later because it is overloaded
             AccountOperationException: If the operation fails for another reason
             requests.RequestException: If the HTTP request fails
         """
-        encoded_name = urllib.parse.quote(bank_name)
-        url = f"http://{self.hostname}:{self.port_number}/api/balance?bankName={encoded_name}"
-        
-        response_body = self._call_service(url)
+        response_body = self._call_service("/api/balance", {"bankName": bank_name})
         balance = self.parser.parse_balance_response(response_body)
         
         return balance
@@ -61,16 +122,16 @@ class BankingApiClient:
             
         Raises:
             NoSuchAccountException: If the account doesn't exist
+            BankUnavailableException: If the circuit for the endpoint is open
+            BankOverloadedException: If the bank asked to retry later because it is overloaded
             AccountOperationException: If the operation fails for another reason
             requests.RequestException: If the HTTP request fails
         """
-        encoded_name = urllib.parse.quote(bank_name)
-        encoded_key = urllib.parse.quote(idempotency_key)
-        
-        url = f"http://{self.hostname}:{self.port_number}/api/deposit?bankName={encoded_name}" + \
-              f"&amount={amount}&idempotencyKey={encoded_key}"
-        
-        response_body = self._call_service(url)
+        response_body = self._call_service("/api/deposit", {
+            "bankName": bank_name,
+            "amount": amount,
+            "idempotencyKey": idempotency_key
+        })
         transaction_id = self.parser.parse_deposit_response(response_body)
         
         return transaction_id
@@ -90,36 +151,210 @@ class BankingApiClient:
         Raises:
             NoSuchAccountException: If the account doesn't exist
             InsufficientFundsException: If the account has insufficient funds
+            BankUnavailableException: If the circuit for the endpoint is open
+            BankOverloadedException: If the bank asked to retry later because it is overloaded
             AccountOperationException: If the operation fails for another reason
             requests.RequestException: If the HTTP request fails
         """
-        encoded_name = urllib.parse.quote(bank_name)
-        encoded_key = urllib.parse.quote(idempotency_key)
-        
-        url = f"http://{self.hostname}:{self.port_number}/api/withdraw?bankName={encoded_name}" + \
-              f"&amount={amount}&idempotencyKey={encoded_key}"
-        
-        response_body = self._call_service(url)
+        response_body = self._call_service("/api/withdraw", {
+            "bankName": bank_name,
+            "amount": amount,
+            "idempotencyKey": idempotency_key
+        })
         transaction_id = self.parser.parse_withdraw_response(response_body)
         
         return transaction_id
     
-    def _call_service(self, service_url: str) -> str:
+    def _call_service(self, path: str, params: Dict[str, Any]) -> Union[str, bytes]:
         """
         Make an HTTP request to the bank API.
         
+        The call is recorded as a client span, and the trace context is sent
+        in the request headers so that the bank service's spans join the
+        caller's trace.
+        
+        In JSON mode the parameters are sent as a query string on a GET
+        request. In MessagePack mode they are sent as a MessagePack body on a
+        POST request, and a MessagePack response is requested.
+        
         Args:
-            service_url: The URL to call
+            path: The API path to call
+            params: The request parameters
             
         Returns:
-            The response body as a string
+            The response body, as a string for JSON or bytes for MessagePack.
+            Error responses from the bank API are returned as well, so that
+            the parser can classify them by their error code.
             
         Raises:
+            BankUnavailableException: If the circuit for the endpoint is open
             requests.RequestException: If the HTTP request fails
         """
-        logger.debug(f"Making call to URL {service_url}")
+        with tracer.start_as_current_span(f"BankApi {path}", kind=SpanKind.CLIENT) as span:
+            address = self._address_for(params["bankName"])
+            response = self._call_service_in_span(path, params, address, span)
+            
+            owner = response.headers.get(SHARD_OWNER_HEADER)
+            if response.status_code == MISDIRECTED_REQUEST and owner:
+                # The account moved in a rebalance the ring has not caught up with
+                logger.info("Bank %s is served by %s, not %s", params["bankName"], owner, address)
+                span.add_event("wrong_shard", {"bank_api.shard": address, "bank_api.shard_owner": owner})
+                if self.shard_ring is not None:
+                    self.shard_ring.reload()
+                response = self._call_service_in_span(path, params, owner, span)
+            span.set_attribute("http.status_code", response.status_code)
+            if response.status_code >= 400:
+                span.set_status(Status(StatusCode.ERROR))
+        
+        if response.status_code >= 500:
+            response.raise_for_status()
         
-        response = requests.get(service_url, timeout=10)
-        response.raise_for_status()
+        content_type = response.headers.get("Content-Type", "")
+        if content_type.startswith(MSGPACK_MIMETYPE):
+            return response.content
+        if not content_type.startswith(JSON_MIMETYPE):
+            response.raise_for_status()
+        
+        return response.text
+    
+    def _address_for(self, bank_name: str) -> str:
+        """
+        Get the address of the bank-service instance that serves an account.
         
-        return response.text
\ No newline at end of file
+        Args:
+            bank_name: The name of the bank account
+            
+        Returns:
+            The address, as "host:port"
+        """
+        if self.shard_ring is None:
+            return f"{self.hostname}:{self.port_number}"
+        return self.shard_ring.address_for(bank_name)
+    
+    def _call_service_in_span(self, path: str, params: Dict[str, Any], address: str,
+                              span: trace.Span) -> requests.Response:
+        """
+        Send a request to the bank API through the endpoint's circuit breaker.
+        
+        Args:
+            path: The API path to call
+            params: The request parameters
+            address: The address ("host:port") of the bank service to call
+            span: The client span of the call
+            
+        Returns:
+            The response, whatever its status
+            
+        Raises:
+            BankUnavailableException: If the circuit for the endpoint is open
+            requests.RequestException: If the HTTP request fails
+        """
+        service_url = f"http://{address}{path}"
+        
+        # Inject the trace context once; hedged requests reuse the same headers
+        headers: Dict[str, str] = {}
+        propagate.inject(headers)
+        
+        if self.wire_format == WIRE_FORMAT_MSGPACK:
+            logger.debug("Making MessagePack call to URL %s", service_url)
+            body = msgpack.packb(params)
+            headers.update({"Content-Type": MSGPACK_MIMETYPE, "Accept": MSGPACK_MIMETYPE})
+            send = lambda: requests.post(service_url, data=body, headers=headers, timeout=self.timeout)
+            span.set_attribute("http.method", "POST")
+        else:
+            service_url += "?" + urllib.parse.urlencode(params, quote_via=urllib.parse.quote)
+            logger.debug("Making call to URL %s", service_url)
+            send = lambda: requests.get(service_url, headers=headers, timeout=self.timeout)
+            span.set_attribute("http.method", "GET")
+        span.set_attribute("http.url", f"http://{address}{path}")
+        
+        # Each shard has its own circuits, so that one failing instance does
+        # not fail fast the accounts of the others
+        endpoint = path if self.shard_ring is None else f"{address}{path}"
+        circuit_breaker, latency_tracker = self._endpoint(endpoint)
+        if not circuit_breaker.allow_request():
+            span.set_attribute("bank_api.circuit_state", circuit_breaker.state)
+            raise BankUnavailableException(f"Circuit for {endpoint} is open, failing fast")
+        
+        start = time.monotonic()
+        try:
+            response = self._send(send, latency_tracker)
+        except requests.RequestException:
+            circuit_breaker.record_failure(time.monotonic() - start)
+            raise
+        
+        duration = time.monotonic() - start
+        latency_tracker.record(duration)
+        
+        # A 429 means one account is busy, and a 421 that it has moved to
+        # another shard, not that the endpoint is failing, so neither counts
+        # against the circuit
+        if response.status_code >= 500:
+            circuit_breaker.record_failure(duration)
+        else:
+            circuit_breaker.record_success(duration)
+        return response
+    
+    def _send(self, send: Callable[[], requests.Response], latency_tracker: LatencyTracker) -> requests.Response:
+        """
+        Send a request, hedging it if enabled and the endpoint is slow.
+        
+        Args:
+            send: Sends the request and returns its response
+            latency_tracker: The latency history of the endpoint
+            
+        Returns:
+            The response of the first request, unless the hedge succeeds
+            first; the hedge's error response if the first request fails
+            
+        Raises:
+            requests.RequestException: If every attempt fails
+        """
+        hedge_delay = latency_tracker.percentile(95) if self.hedge_requests else None
+        if hedge_delay is None:
+            return send()
+        
+        primary = self._hedge_executor.submit(send)
+        done, _ = wait([primary], timeout=max(hedge_delay, MINIMUM_HEDGE_DELAY))
+        if done:
+            return primary.result()
+        
+        logger.debug("No response after %.3fs, sending hedged request", hedge_delay)
+        trace.get_current_span().add_event("hedged_request", {"hedge_delay": hedge_delay})
+        hedge = self._hedge_executor.submit(send)
+        
+        error = None
+        hedge_response = None
+        for future in as_completed([primary, hedge]):
+            try:
+                response = future.result()
+            except requests.RequestException as e:
+                error = e
+                continue
+            # A withdrawal hedged while the first request is being applied
+            # can be refused for insufficient funds, or the hedge can be
+            # turned away by admission control; only the first request's
+            # answer is authoritative then
+            if future is primary or response.status_code < 300:
+                return response
+            hedge_response = response
+        if hedge_response is not None:
+            return hedge_response
+        raise error
+    
+    def _endpoint(self, path: str):
+        """
+        Get the circuit breaker and latency tracker of an endpoint.
+        
+        Args:
+            path: The API path of the endpoint, prefixed with the shard
+                address in a sharded deployment
+            
+        Returns:
+            Tuple of (circuit breaker, latency tracker)
+        """
+        with self._endpoints_lock:
+            if path not in self._circuit_breakers:
+                self._circuit_breakers[path] = CircuitBreaker(path)
+                self._latency_trackers[path] = LatencyTracker()
+            return self._circuit_breakers[path], self._latency_trackers[path]
\ No newline at end of file
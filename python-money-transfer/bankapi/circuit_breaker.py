@@ -0,0 +1,138 @@
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+class CircuitBreaker:
+    """
+    Count-based circuit breaker for a single bank API endpoint.
+    
+    The breaker records the outcome of the most recent calls. Once enough
+    calls have been seen and either the share of failed calls or the share of
+    slow calls reaches its threshold, the circuit opens and calls are rejected
+    immediately. After the open duration a single trial call is let through
+    (half-open); if it succeeds the circuit closes, otherwise it opens again.
+    """
+    
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+    
+    def __init__(self, name: str, failure_rate_threshold: float = 0.5, slow_call_rate_threshold: float = 0.5,
+                 slow_call_duration: float = 2.0, minimum_calls: int = 10, window_size: int = 50,
+                 open_duration: float = 10.0):
+        """
+        Initialize the circuit breaker.
+        
+        Args:
+            name: The name of the protected endpoint, for logging
+            failure_rate_threshold: The share of failed calls that opens the circuit
+            slow_call_rate_threshold: The share of slow calls that opens the circuit
+            slow_call_duration: The duration in seconds above which a call is slow
+            minimum_calls: The number of calls needed before the rates are evaluated
+            window_size: The number of most recent calls that are evaluated
+            open_duration: How long in seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)  # (failed, slow) per call
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+    
+    @property
+    def state(self) -> str:
+        """Get the current state of the circuit."""
+        with self._lock:
+            return self._state
+    
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may be made.
+        
+        Returns:
+            True if the call may proceed, False if it should fail fast
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.open_duration:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            
+            # Half-open: let exactly one trial call through
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+    
+    def record_success(self, duration: float) -> None:
+        """
+        Record a call that completed.
+        
+        Args:
+            duration: The duration of the call in seconds
+        """
+        self._record(False, duration)
+    
+    def record_failure(self, duration: float) -> None:
+        """
+        Record a call that failed.
+        
+        Args:
+            duration: The duration of the call in seconds
+        """
+        self._record(True, duration)
+    
+    def _record(self, failed: bool, duration: float) -> None:
+        """
+        Record the outcome of a call and update the state of the circuit.
+        
+        Args:
+            failed: Whether the call failed
+            duration: The duration of the call in seconds
+        """
+        slow = duration >= self.slow_call_duration
+        
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    logger.info(f"Circuit for {self.name} closed after successful trial call")
+                    self._state = self.CLOSED
+                    self._outcomes.clear()
+                return
+            
+            if self._state == self.OPEN:
+                return
+            
+            self._outcomes.append((failed, slow))
+            calls = len(self._outcomes)
+            if calls < self.minimum_calls:
+                return
+            
+            failure_rate = sum(1 for f, _ in self._outcomes if f) / calls
+            slow_call_rate = sum(1 for _, s in self._outcomes if s) / calls
+            if failure_rate >= self.failure_rate_threshold or slow_call_rate >= self.slow_call_rate_threshold:
+                logger.warning(f"Circuit for {self.name} opened: failure rate {failure_rate:.0%}, "
+                               f"slow call rate {slow_call_rate:.0%}")
+                self._open()
+    
+    def _open(self) -> None:
+        """Open the circuit. The caller must hold the lock."""
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
\ No newline at end of file
@@ -0,0 +1,50 @@
+import threading
+from collections import deque
+from typing import Optional
+
+class LatencyTracker:
+    """
+    Keeps the durations of the most recent calls to an endpoint and reports
+    their percentiles.
+    """
+    
+    def __init__(self, window_size: int = 200, minimum_samples: int = 20):
+        """
+        Initialize the tracker.
+        
+        Args:
+            window_size: The number of most recent durations that are kept
+            minimum_samples: The number of durations needed before a percentile
+                is reported
+        """
+        self.minimum_samples = minimum_samples
+        self._lock = threading.Lock()
+        self._durations = deque(maxlen=window_size)
+    
+    def record(self, duration: float) -> None:
+        """
+        Record the duration of a call.
+        
+        Args:
+            duration: The duration of the call in seconds
+        """
+        with self._lock:
+            self._durations.append(duration)
+    
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Get a percentile of the recorded durations.
+        
+        Args:
+            percent: The percentile to compute, between 0 and 100
+        
+        Returns:
+            The duration in seconds, or None if too few calls were recorded
+        """
+        with self._lock:
+            if len(self._durations) < self.minimum_samples:
+                return None
+            durations = sorted(self._durations)
+        
+        index = min(len(durations) - 1, int(len(durations) * percent / 100))
+        return durations[index]
\ No newline at end of file
@@ -1,99 +1,132 @@
 import json
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Union
+
+import msgpack
+
+from exceptions import (AccountOperationException, BankOverloadedException, InsufficientFundsException,
+                        NoSuchAccountException)
+from .wire_format import ErrorCode
 
 logger = logging.getLogger(__name__)
 
+# Exception raised for each error code; any other code is reported as a
+# generic AccountOperationException
+EXCEPTIONS_BY_ERROR_CODE = {
+    ErrorCode.NO_SUCH_BANK: NoSuchAccountException,
+    ErrorCode.INSUFFICIENT_FUNDS: InsufficientFundsException,
+}
+
 class MessageParser:
     """
     Parser for bank API responses.
+    
+    Responses are either JSON text or MessagePack bytes. Errors are classified
+    by the numeric "code" field of the response.
     """
     
-    def parse_balance_response(self, response_body: str) -> int:
+    def parse_balance_response(self, response_body: Union[str, bytes]) -> int:
         """
         Parse the response from a balance request.
         
         Args:
-            response_body: The JSON response from the bank API
-            
+            response_body: The JSON or MessagePack response from the bank API
+        
         Returns:
             The account balance
-            
+        
         Raises:
-            ValueError: If the response is invalid or indicates an error
+            NoSuchAccountException: If the account doesn't exist
+            BankOverloadedException: If the bank rejected the request because it is overloaded
+            AccountOperationException: If the response indicates another error
         """
-        response = json.loads(response_body)
-        
-        if response.get("status") != "SUCCESS":
-            error_message = response.get("message", "Unknown error")
-            logger.error(f"Balance operation failed: {error_message}")
-            
-            if "No such bank" in error_message:
-                from exceptions import NoSuchAccountException
-                raise NoSuchAccountException(error_message)
-            
-            from exceptions import AccountOperationException
-            raise AccountOperationException(error_message)
-        
+        response = self._parse_response(response_body, "Balance")
         return response.get("balance", 0)
     
-    def parse_deposit_response(self, response_body: str) -> str:
+    def parse_deposit_response(self, response_body: Union[str, bytes]) -> str:
         """
         Parse the response from a deposit request.
         
         Args:
-            response_body: The JSON response from the bank API
-            
+            response_body: The JSON or MessagePack response from the bank API
+        
         Returns:
             The transaction ID
-            
+        
         Raises:
-            ValueError: If the response is invalid or indicates an error
+            NoSuchAccountException: If the account doesn't exist
+            BankOverloadedException: If the bank rejected the request because it is overloaded
+            AccountOperationException: If the response indicates another error
         """
-        response = json.loads(response_body)
-        
-        if response.get("status") != "SUCCESS":
-            error_message = response.get("message", "Unknown error")
-            logger.error(f"Deposit operation failed: {error_message}")
-            
-            if "No such bank" in error_message:
-                from exceptions import NoSuchAccountException
-                raise NoSuchAccountException(error_message)
-            
-            from exceptions import AccountOperationException
-            raise AccountOperationException(error_message)
-        
+        response = self._parse_response(response_body, "Deposit")
         return response.get("transaction-id", "")
     
-    def parse_withdraw_response(self, response_body: str) -> str:
+    def parse_withdraw_response(self, response_body: Union[str, bytes]) -> str:
         """
         Parse the response from a withdraw request.
         
         Args:
-            response_body: The JSON response from the bank API
-            
+            response_body: The JSON or MessagePack response from the bank API
+        
         Returns:
             The transaction ID
-            
+        
         Raises:
-            ValueError: If the response is invalid or indicates an error
+            NoSuchAccountException: If the account doesn't exist
             InsufficientFundsException: If the account has insufficient funds
+            BankOverloadedException: If the bank rejected the request because it is overloaded
+            AccountOperationException: If the response indicates another error
+        """
+        response = self._parse_response(response_body, "Withdrawal")
+        return response.get("transaction-id", "")
+    
+    def _parse_response(self, response_body: Union[str, bytes], operation: str) -> Dict[str, Any]:
         """
-        response = json.loads(response_body)
+        Decode a response and raise the matching exception if it is an error.
+        
+        Args:
+            response_body: The JSON or MessagePack response from the bank API
+            operation: The name of the operation, for logging
+        
+        Returns:
+            The decoded response
+        
+        Raises:
+            AccountOperationException: Or the subclass matching the error code
+        """
+        if isinstance(response_body, bytes):
+            response = msgpack.unpackb(response_body)
+        else:
+            response = json.loads(response_body)
         
         if response.get("status") != "SUCCESS":
             error_message = response.get("message", "Unknown error")
-            logger.error(f"Withdrawal operation failed: {error_message}")
+            logger.error("%s operation failed: %s", operation, error_message)
             
-            if "No such bank" in error_message:
-                from exceptions import NoSuchAccountException
-                raise NoSuchAccountException(error_message)
+            code = response.get("code")
+            if code is None:
+                code = self._classify_legacy_error(error_message)
             
-            if "Insufficient funds" in error_message:
-                from exceptions import InsufficientFundsException
-                raise InsufficientFundsException(error_message)
-            
-            from exceptions import AccountOperationException
-            raise AccountOperationException(error_message)
+            if code == ErrorCode.OVERLOADED:
+                raise BankOverloadedException(error_message, response.get("retryAfter"))
+            exception_type = EXCEPTIONS_BY_ERROR_CODE.get(code, AccountOperationException)
+            raise exception_type(error_message)
         
-        return response.get("transaction-id", "")
\ No newline at end of file
+        return response
+    
+    def _classify_legacy_error(self, error_message: str) -> int:
+        """
+        Derive an error code from the message of a bank service that predates
+        error codes.
+        
+        Args:
+            error_message: The error message
+        
+        Returns:
+            The matching ErrorCode
+        """
+        if "No such bank" in error_message:
+            return ErrorCode.NO_SUCH_BANK
+        if "Insufficient funds" in error_message:
+            return ErrorCode.INSUFFICIENT_FUNDS
+        return ErrorCode.INVALID_REQUEST
\ No newline at end of file
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Points each shard gets on the ring; more points spread the accounts more
+# evenly between shards
+DEFAULT_VIRTUAL_NODES = 128
+
+# Seconds between checks of a ring file for a new version
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+def ring_hash(value: str) -> int:
+    """
+    Hash a value to a position on the ring.
+    
+    MD5 is used rather than hash(), which is salted per process: every
+    bank-service instance and every client must agree on the owner of an
+    account. The function must stay in sync with shard_ring.py in
+    python-bank-services.
+    
+    Args:
+        value: The value to hash
+    
+    Returns:
+        The position, a 64-bit integer
+    """
+    return int.from_bytes(hashlib.md5(value.encode("utf-8")).digest()[:8], "big")
+
+class HashRing:
+    """
+    Assigns accounts to shards by consistent hashing of their name.
+    
+    Each shard is hashed to `virtual_nodes` points on the ring, and an
+    account belongs to the shard of the first point after the hash of its
+    name. Adding or removing a shard therefore only moves the accounts of
+    the ring segments it takes or gives up.
+    """
+    
+    def __init__(self, shards: Dict[str, str], virtual_nodes: int = DEFAULT_VIRTUAL_NODES):
+        """
+        Build the ring.
+        
+        Args:
+            shards: The address ("host:port") of each shard, by shard ID
+            virtual_nodes: The number of points of each shard
+        
+        Raises:
+            ValueError: If there are no shards
+        """
+        if not shards:
+            raise ValueError("A shard ring needs at least one shard")
+        
+        self.shards = dict(shards)
+        self.virtual_nodes = virtual_nodes
+        points = sorted((ring_hash(f"{shard_id}#{i}"), shard_id)
+                        for shard_id in self.shards for i in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [shard_id for _, shard_id in points]
+    
+    def owner(self, bank_name: str) -> str:
+        """
+        Get the shard that owns an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The shard ID
+        """
+        index = bisect(self._hashes, ring_hash(bank_name)) % len(self._hashes)
+        return self._owners[index]
+    
+    def address(self, shard_id: str) -> str:
+        """
+        Get the address of a shard.
+        
+        Args:
+            shard_id: The shard ID
+        
+        Returns:
+            The address, as "host:port"
+        """
+        return self.shards[shard_id]
+
+def parse_shards(spec: str) -> Dict[str, str]:
+    """
+    Parse a static list of shards.
+    
+    Args:
+        spec: Comma-separated "id=host:port" entries, such as
+            "bank-1=10.0.0.1:8480,bank-2=10.0.0.2:8480"
+    
+    Returns:
+        The address of each shard, by shard ID
+    
+    Raises:
+        ValueError: If an entry is malformed
+    """
+    shards = {}
+    for entry in spec.split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        shard_id, separator, address = entry.partition("=")
+        if not separator or not shard_id.strip() or not address.strip():
+            raise ValueError(f"Shard entries must look like id=host:port, got {entry!r}")
+        shards[shard_id.strip()] = address.strip()
+    return shards
+
+class ShardRing:
+    """
+    The shard ring a client routes calls by, optionally kept up to date from a file.
+    
+    The file is the one the bank services watch (see shard_ring.py in
+    python-bank-services). Its modification time is checked at most every
+    `reload_interval` seconds, and at once when a bank service reports that
+    an account has moved; the "previous" ring it may list is only used by
+    the bank services during a rebalance.
+    """
+    
+    def __init__(self, shards: Optional[Dict[str, str]] = None, path: Optional[str] = None,
+                 virtual_nodes: int = DEFAULT_VIRTUAL_NODES, reload_interval: float = DEFAULT_RELOAD_INTERVAL):
+        """
+        Initialize the ring from a static list of shards or from a file.
+        
+        Args:
+            shards: The address ("host:port") of each shard, by shard ID
+            path: The ring file, used instead of `shards`
+            virtual_nodes: The number of points of each shard in a static ring
+            reload_interval: The seconds between checks of the file
+        
+        Raises:
+            ValueError: If neither shards nor a file are given
+        """
+        if path is None and not shards:
+            raise ValueError("A shard ring needs a list of shards or a ring file")
+        
+        self.path = path
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.version = 0
+        if path is None:
+            self._ring = HashRing(shards, virtual_nodes)
+        else:
+            self.reload()
+    
+    def address_for(self, bank_name: str) -> str:
+        """
+        Get the address of the shard that owns an account.
+        
+        Args:
+            bank_name: The name of the bank account
+        
+        Returns:
+            The address, as "host:port"
+        """
+        if self.path is not None and time.monotonic() >= self._next_check:
+            self._check_file()
+        ring = self._ring
+        return ring.address(ring.owner(bank_name))
+    
+    def reload(self) -> None:
+        """Read the ring file again if it has changed; a static ring never changes."""
+        if self.path is None:
+            return
+        with self._lock:
+            self._next_check = time.monotonic() + self.reload_interval
+            mtime = os.path.getmtime(self.path)
+            if mtime == self._mtime:
+                return
+            with open(self.path, encoding="utf-8") as ring_file:
+                document = json.load(ring_file)
+            self._ring = HashRing(document.get("shards") or {},
+                                  int(document.get("virtualNodes", DEFAULT_VIRTUAL_NODES)))
+            self._mtime = mtime
+            self.version = int(document.get("version", 0))
+        logger.info("Loaded shard ring version %s with %d shard(s)", self.version, len(self._ring.shards))
+    
+    def _check_file(self) -> None:
+        """Reload the ring file, keeping the current ring if it cannot be read."""
+        try:
+            self.reload()
+        except (OSError, ValueError) as e:
+            logger.error("Error reloading the shard ring from %s: %s", self.path, e)
\ No newline at end of file
@@ -0,0 +1,25 @@
+# Wire formats supported by BankingApiClient
+WIRE_FORMAT_JSON = "json"
+WIRE_FORMAT_MSGPACK = "msgpack"
+
+# Media types understood by the bank API
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+
+# Response header naming the address ("host:port") of the shard that owns
+# the account, sent with WRONG_SHARD errors
+SHARD_OWNER_HEADER = "X-Bank-Shard-Owner"
+
+class ErrorCode:
+    """
+    Numeric error codes carried in the "code" field of bank API error responses.
+    
+    The values must stay in sync with wire_format.py in python-bank-services.
+    """
+    INVALID_REQUEST = 1
+    NO_SUCH_BANK = 2
+    BANK_STOPPED = 3
+    INSUFFICIENT_FUNDS = 4
+    NOT_FOUND = 5
+    OVERLOADED = 6
+    WRONG_SHARD = 7
\ No newline at end of file
@@ -0,0 +1 @@
+# Make the benchmarks directory a Python package
\ No newline at end of file
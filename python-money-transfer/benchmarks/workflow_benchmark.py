@@ -0,0 +1,311 @@
+"""
+Replay and throughput regression suite for the money transfer workflows.
+
+Runs transfers against Temporal's time-skipping test environment, with an
+in-memory stand-in for the bank API, and reports throughput and history size
+as JSON. Every history produced by the run, plus any recorded histories, is
+replayed against the current workflow code to catch nondeterminism.
+
+Run from the python-money-transfer directory:
+
+    python -m benchmarks.workflow_benchmark --transfers 200 --concurrency 20
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from temporalio import activity
+from temporalio.client import WorkflowHistory
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import Replayer, Worker
+
+from codec.data_converter import create_data_converter
+from exceptions import InsufficientFundsException, NoSuchAccountException
+from models.transfer_details import ACTIVITY_MODE_LOCAL, ACTIVITY_MODE_REGULAR, TransferDetails
+from workflows.money_transfer_workflow_impl import MoneyTransferWorkflowImpl
+from workflows.netting_workflow_impl import NettingWorkflowImpl
+
+logger = logging.getLogger(__name__)
+
+TASK_QUEUE_NAME = "MoneyTransferBenchmarkTaskQueue"
+
+# Workflows checked during replay
+WORKFLOWS = [MoneyTransferWorkflowImpl, NettingWorkflowImpl]
+
+class InMemoryBank:
+    """
+    Stand-in for the bank API, keeping balances in memory.
+    
+    It implements the same withdraw and deposit activities as
+    AccountActivitiesImpl, including idempotency, so the workflows behave as
+    they would against the real service, without its latency.
+    """
+    
+    def __init__(self, accounts: List[str], initial_balance: int):
+        """
+        Initialize the bank.
+        
+        Args:
+            accounts: The names of the accounts to create
+            initial_balance: The initial balance of every account
+        """
+        self.balances = {name: initial_balance for name in accounts}
+        self.requests: Dict[str, str] = {}
+        self.calls = 0
+    
+    @activity.defn(name="deposit")
+    async def deposit(self, bank_name: str, amount: int, idempotency_key: str) -> str:
+        """Deposit money into an in-memory account."""
+        return self._apply(bank_name, amount, idempotency_key, "D")
+    
+    @activity.defn(name="withdraw")
+    async def withdraw(self, bank_name: str, amount: int, idempotency_key: str) -> str:
+        """Withdraw money from an in-memory account."""
+        return self._apply(bank_name, -amount, idempotency_key, "W")
+    
+    def _apply(self, bank_name: str, delta: int, idempotency_key: str, prefix: str) -> str:
+        """
+        Apply a balance change once per idempotency key.
+        
+        Args:
+            bank_name: The name of the account
+            delta: The signed change to the balance
+            idempotency_key: A key to ensure idempotency of the operation
+            prefix: The transaction ID prefix
+        
+        Returns:
+            The transaction ID
+        """
+        self.calls += 1
+        if idempotency_key in self.requests:
+            return self.requests[idempotency_key]
+        if bank_name not in self.balances:
+            raise NoSuchAccountException(f"No such bank: {bank_name}")
+        if self.balances[bank_name] + delta < 0:
+            raise InsufficientFundsException(f"Insufficient funds: balance={self.balances[bank_name]}")
+        
+        self.balances[bank_name] += delta
+        tx_id = f"{prefix}{len(self.requests):010d}"
+        self.requests[idempotency_key] = tx_id
+        return tx_id
+
+async def run_transfer(env: WorkflowEnvironment, details: TransferDetails) -> WorkflowHistory:
+    """
+    Run one transfer to completion, approving it if it is held.
+    
+    Args:
+        env: The test environment
+        details: Details of the transfer
+    
+    Returns:
+        The history of the completed workflow
+    """
+    handle = await env.client.start_workflow(
+        MoneyTransferWorkflowImpl.transfer,
+        details,
+        id=f"benchmark-transfer-{details.reference_id}",
+        task_queue=TASK_QUEUE_NAME
+    )
+    if details.amount > 500:
+        await handle.signal(MoneyTransferWorkflowImpl.approve, "benchmark")
+    await handle.result()
+    return await handle.fetch_history()
+
+async def run_benchmark(transfers: int, concurrency: int, approval_ratio: float,
+                        activity_mode: str) -> Dict[str, Any]:
+    """
+    Run transfers at the given concurrency and measure throughput.
+    
+    Args:
+        transfers: The number of transfers to run
+        concurrency: The maximum number of transfers in flight
+        approval_ratio: The share of transfers above the approval threshold
+        activity_mode: How the workflows execute the bank activities
+    
+    Returns:
+        The results, including the histories of every transfer
+    """
+    accounts = [f"account-{i}" for i in range(max(2, concurrency))]
+    bank = InMemoryBank(accounts, initial_balance=transfers * 1000)
+    pairs = itertools.cycle(zip(accounts, accounts[1:] + accounts[:1]))
+    approval_every = round(1 / approval_ratio) if approval_ratio > 0 else 0
+    
+    details_list = []
+    for i in range(transfers):
+        sender, recipient = next(pairs)
+        amount = 600 if approval_every and i % approval_every == 0 else 100
+        details_list.append(TransferDetails(sender, recipient, amount, str(uuid.uuid4()), activity_mode))
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async with await WorkflowEnvironment.start_time_skipping(data_converter=create_data_converter()) as env:
+        async with Worker(
+            env.client,
+            task_queue=TASK_QUEUE_NAME,
+            workflows=WORKFLOWS,
+            activities=[bank.deposit, bank.withdraw]
+        ):
+            async def bounded(details: TransferDetails) -> WorkflowHistory:
+                async with semaphore:
+                    return await run_transfer(env, details)
+            
+            start = time.monotonic()
+            histories = await asyncio.gather(*[bounded(details) for details in details_list])
+            elapsed = time.monotonic() - start
+    
+    events = [len(history.events) for history in histories]
+    held = [len(h.events) for h, d in zip(histories, details_list) if d.amount > 500]
+    instant = [len(h.events) for h, d in zip(histories, details_list) if d.amount <= 500]
+    
+    return {
+        "transfers": transfers,
+        "concurrency": concurrency,
+        "activity_mode": activity_mode,
+        "elapsed_seconds": round(elapsed, 3),
+        "transfers_per_second": round(transfers / elapsed, 2),
+        "history_events_per_transfer": round(statistics.mean(events), 2),
+        "history_events_per_instant_transfer": round(statistics.mean(instant), 2) if instant else None,
+        "history_events_per_held_transfer": round(statistics.mean(held), 2) if held else None,
+        "bank_calls": bank.calls,
+        "histories": histories,
+    }
+
+def load_histories(directory: str) -> List[WorkflowHistory]:
+    """
+    Load recorded histories from a directory.
+    
+    Each file holds the JSON history of one workflow, as written by
+    --record-histories or by `temporal workflow show --output json`.
+    
+    Args:
+        directory: The directory to read
+    
+    Returns:
+        The histories
+    """
+    histories = []
+    for file_name in sorted(os.listdir(directory)):
+        if file_name.endswith(".json"):
+            with open(os.path.join(directory, file_name)) as f:
+                histories.append(WorkflowHistory.from_json(file_name[:-len(".json")], f.read()))
+    return histories
+
+def save_histories(directory: str, histories: List[WorkflowHistory]) -> None:
+    """
+    Save histories so that later runs can replay them.
+    
+    Args:
+        directory: The directory to write to
+        histories: The histories to save
+    """
+    os.makedirs(directory, exist_ok=True)
+    for history in histories:
+        with open(os.path.join(directory, f"{history.workflow_id}.json"), "w") as f:
+            f.write(history.to_json())
+
+async def replay(histories: List[WorkflowHistory]) -> Dict[str, Any]:
+    """
+    Replay histories against the current workflow code.
+    
+    Args:
+        histories: The histories to replay
+    
+    Returns:
+        The number of histories replayed and the failures, by workflow ID
+    """
+    replayer = Replayer(workflows=WORKFLOWS, data_converter=create_data_converter())
+    results = await replayer.replay_workflows(histories, raise_on_replay_failure=False)
+    failures = {
+        history.workflow_id: str(results.replay_failures[history.run_id])
+        for history in histories if history.run_id in results.replay_failures
+    }
+    return {"replayed": len(histories), "failures": failures}
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    Compare results with a baseline.
+    
+    Args:
+        results: The results of this run
+        baseline: The results of an earlier run
+        tolerance: The relative change accepted before reporting a regression
+    
+    Returns:
+        A description of every regression found
+    """
+    regressions = []
+    if results["transfers_per_second"] < baseline["transfers_per_second"] * (1 - tolerance):
+        regressions.append(f"throughput dropped from {baseline['transfers_per_second']} "
+                           f"to {results['transfers_per_second']} transfers/s")
+    for key in ("history_events_per_instant_transfer", "history_events_per_held_transfer"):
+        if results.get(key) and baseline.get(key) and results[key] > baseline[key]:
+            regressions.append(f"{key} grew from {baseline[key]} to {results[key]}")
+    return regressions
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transfers", type=int, default=100, help="number of transfers to run")
+    parser.add_argument("--concurrency", type=int, default=10, help="maximum transfers in flight")
+    parser.add_argument("--approval-ratio", type=float, default=0.1,
+                        help="share of transfers above 500 that wait for approval")
+    parser.add_argument("--local-activities", action="store_true", help="run the bank calls as local activities")
+    parser.add_argument("--histories", help="directory of recorded histories to replay")
+    parser.add_argument("--record-histories", help="directory to save the histories of this run to")
+    parser.add_argument("--baseline", help="results file of an earlier run to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1,
+                        help="relative throughput drop accepted against the baseline")
+    parser.add_argument("--output", help="file to write the results to, instead of stdout")
+    return parser.parse_args(argv)
+
+async def main_async(args: argparse.Namespace) -> int:
+    """
+    Run the suite.
+    
+    Args:
+        args: The command-line arguments
+    
+    Returns:
+        The exit code: 0 on success, 1 on replay failures or regressions
+    """
+    activity_mode = ACTIVITY_MODE_LOCAL if args.local_activities else ACTIVITY_MODE_REGULAR
+    results = await run_benchmark(args.transfers, args.concurrency, args.approval_ratio, activity_mode)
+    histories = results.pop("histories")
+    
+    if args.record_histories:
+        save_histories(args.record_histories, histories)
+    if args.histories:
+        histories = histories + load_histories(args.histories)
+    
+    results["replay"] = await replay(histories)
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    results["regressions"] = regressions
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    
+    return 1 if results["replay"]["failures"] or regressions else 0
+
+def main():
+    """Main entry point for the benchmark."""
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+    sys.exit(asyncio.run(main_async(parse_args())))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
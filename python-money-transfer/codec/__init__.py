@@ -0,0 +1,6 @@
+# Make the codec directory a Python package
+from .compression_codec import CompressionCodec
+from .data_converter import create_data_converter
+from .transfer_payload_converter import TextPayloadConverter, TransferDetailsPayloadConverter
+
+__all__ = ["CompressionCodec", "TextPayloadConverter", "TransferDetailsPayloadConverter", "create_data_converter"]
\ No newline at end of file
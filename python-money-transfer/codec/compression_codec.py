@@ -0,0 +1,68 @@
+import zlib
+from typing import List, Sequence
+
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import PayloadCodec
+
+# Payloads smaller than this are stored uncompressed, since compression
+# saves little on them and costs CPU on every encode and decode
+DEFAULT_COMPRESSION_THRESHOLD = 1024
+
+class CompressionCodec(PayloadCodec):
+    """
+    Payload codec that compresses large payloads with zlib.
+    
+    A compressed payload wraps the complete serialized original payload,
+    including its metadata, so decoding restores it exactly. Payloads below
+    the threshold, or that do not get smaller, pass through unchanged.
+    """
+    
+    ENCODING = b"binary/zlib"
+    
+    def __init__(self, threshold: int = DEFAULT_COMPRESSION_THRESHOLD, level: int = 6):
+        """
+        Initialize the codec.
+        
+        Args:
+            threshold: The serialized size in bytes from which payloads are compressed
+            level: The zlib compression level
+        """
+        self.threshold = threshold
+        self.level = level
+    
+    async def encode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        """
+        Compress the payloads that are above the threshold.
+        
+        Args:
+            payloads: The payloads to encode
+        
+        Returns:
+            The encoded payloads
+        """
+        result = []
+        for payload in payloads:
+            serialized = payload.SerializeToString()
+            if len(serialized) >= self.threshold:
+                compressed = zlib.compress(serialized, self.level)
+                if len(compressed) < len(serialized):
+                    payload = Payload(metadata={"encoding": self.ENCODING}, data=compressed)
+            result.append(payload)
+        return result
+    
+    async def decode(self, payloads: Sequence[Payload]) -> List[Payload]:
+        """
+        Decompress the payloads that were compressed by this codec.
+        
+        Args:
+            payloads: The payloads to decode
+        
+        Returns:
+            The decoded payloads
+        """
+        result = []
+        for payload in payloads:
+            if payload.metadata.get("encoding") == self.ENCODING:
+                payload = Payload.FromString(zlib.decompress(payload.data))
+            result.append(payload)
+        return result
\ No newline at end of file
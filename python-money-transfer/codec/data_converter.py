@@ -0,0 +1,53 @@
+import dataclasses
+import os
+
+import temporalio.converter
+from temporalio.converter import (
+    BinaryNullPayloadConverter,
+    CompositePayloadConverter,
+    DataConverter,
+    DefaultPayloadConverter
+)
+
+from .compression_codec import DEFAULT_COMPRESSION_THRESHOLD, CompressionCodec
+from .transfer_payload_converter import TextPayloadConverter, TransferDetailsPayloadConverter
+
+# Serialized payload size in bytes from which payloads are compressed
+COMPRESSION_THRESHOLD = int(os.getenv("PAYLOAD_COMPRESSION_THRESHOLD", DEFAULT_COMPRESSION_THRESHOLD))
+
+class MoneyTransferPayloadConverter(CompositePayloadConverter):
+    """
+    Payload converter for the money transfer application.
+    
+    TransferDetails and strings use the compact converters of this package;
+    every other value falls back to the default Temporal converters.
+    """
+    
+    def __init__(self):
+        """Initialize the converter."""
+        default_converters = [
+            converter for converter in DefaultPayloadConverter.default_encoding_payload_converters
+            if not isinstance(converter, BinaryNullPayloadConverter)
+        ]
+        super().__init__(
+            BinaryNullPayloadConverter(),
+            TransferDetailsPayloadConverter(),
+            TextPayloadConverter(),
+            *default_converters
+        )
+
+def create_data_converter() -> DataConverter:
+    """
+    Create the data converter shared by the worker and the starter.
+    
+    Both sides must use the same converter, since payloads written with one
+    cannot be read with the default Temporal converter.
+    
+    Returns:
+        The data converter
+    """
+    return dataclasses.replace(
+        temporalio.converter.default(),
+        payload_converter_class=MoneyTransferPayloadConverter,
+        payload_codec=CompressionCodec(COMPRESSION_THRESHOLD)
+    )
\ No newline at end of file
@@ -0,0 +1,101 @@
+import dataclasses
+from typing import Any, Optional, Type
+
+import msgpack
+from temporalio.api.common.v1 import Payload
+from temporalio.converter import EncodingPayloadConverter
+
+from models.transfer_details import TransferDetails
+
+class TransferDetailsPayloadConverter(EncodingPayloadConverter):
+    """
+    Payload converter that encodes TransferDetails as a MessagePack array.
+    
+    The fields are written positionally, in declaration order, so no field
+    names are stored in history. Fields added to the end of TransferDetails
+    with a default value stay readable from older payloads, which simply
+    carry fewer values.
+    """
+    
+    @property
+    def encoding(self) -> str:
+        """Get the encoding written to the payload metadata."""
+        return "binary/x-transfer-details"
+    
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        """
+        Encode a value if it is a TransferDetails.
+        
+        Args:
+            value: The value to encode
+        
+        Returns:
+            The payload, or None to let the next converter handle the value
+        """
+        if type(value) is not TransferDetails:
+            return None
+        
+        values = [getattr(value, field.name) for field in dataclasses.fields(TransferDetails)]
+        return Payload(
+            metadata={"encoding": self.encoding.encode()},
+            data=msgpack.packb(values)
+        )
+    
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        """
+        Decode a TransferDetails payload.
+        
+        Args:
+            payload: The payload to decode
+            type_hint: The expected type; workflows running in the sandbox
+                pass their own copy of the TransferDetails class
+        
+        Returns:
+            The decoded TransferDetails
+        """
+        cls = type_hint if dataclasses.is_dataclass(type_hint) else TransferDetails
+        return cls(*msgpack.unpackb(payload.data))
+
+class TextPayloadConverter(EncodingPayloadConverter):
+    """
+    Payload converter that stores strings as raw UTF-8.
+    
+    Workflow confirmations, account names and idempotency keys are all plain
+    strings, which this converter stores without JSON quoting or escaping.
+    """
+    
+    @property
+    def encoding(self) -> str:
+        """Get the encoding written to the payload metadata."""
+        return "text/plain"
+    
+    def to_payload(self, value: Any) -> Optional[Payload]:
+        """
+        Encode a value if it is a string.
+        
+        Args:
+            value: The value to encode
+        
+        Returns:
+            The payload, or None to let the next converter handle the value
+        """
+        if type(value) is not str:
+            return None
+        
+        return Payload(
+            metadata={"encoding": self.encoding.encode()},
+            data=value.encode("utf-8")
+        )
+    
+    def from_payload(self, payload: Payload, type_hint: Optional[Type] = None) -> Any:
+        """
+        Decode a string payload.
+        
+        Args:
+            payload: The payload to decode
+            type_hint: The expected type, unused
+        
+        Returns:
+            The decoded string
+        """
+        return payload.data.decode("utf-8")
\ No newline at end of file
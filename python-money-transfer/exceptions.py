@@ -1,3 +1,5 @@
+from typing import Optional
+
 class AccountOperationException(Exception):
     """Base exception for all account operation failures."""
     pass
@@ -8,4 +10,22 @@ class InsufficientFundsException(AccountOperationException):
 
 class NoSuchAccountException(AccountOperationException):
     """Exception raised when trying to operate on a non-existent account."""
-    pass
\ No newline at end of file
+    pass
+
+class BankUnavailableException(AccountOperationException):
+    """Exception raised when calls to the bank API fail fast because its circuit is open."""
+    pass
+
+class BankOverloadedException(AccountOperationException):
+    """Exception raised when the bank API rejects a request because it is overloaded; retrying later is safe."""
+    
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """
+        Initialize the exception.
+        
+        Args:
+            message: The error message from the bank API
+            retry_after: The number of seconds the bank API asked to wait before retrying
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
\ No newline at end of file
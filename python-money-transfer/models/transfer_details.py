@@ -1,5 +1,12 @@
 from dataclasses import dataclass
 
+# Run the bank calls as regular activities, dispatched through the task queue
+ACTIVITY_MODE_REGULAR = "regular"
+
+# Run the bank calls as local activities inside the workflow worker, falling
+# back to regular activities if the local attempts do not succeed
+ACTIVITY_MODE_LOCAL = "local"
+
 @dataclass
 class TransferDetails:
     """
@@ -10,8 +17,18 @@ class TransferDetails:
         recipient: The name of the recipient's bank account
         amount: The amount to transfer
         reference_id: A unique reference ID for the transfer
+        activity_mode: How the withdraw and deposit activities are executed
+            (ACTIVITY_MODE_REGULAR or ACTIVITY_MODE_LOCAL)
+        account_partitions: The number of account partitions the activities
+            are routed across, or 0 to run them on the workflow's task queue
+        priority: The priority lane the transfer runs on ("interactive" or
+            "bulk"), which its partitioned activities run on as well; ""
+            stands for the interactive lane
     """
     sender: str
     recipient: str
     amount: int
-    reference_id: str
\ No newline at end of file
+    reference_id: str
+    activity_mode: str = ACTIVITY_MODE_REGULAR
+    account_partitions: int = 0
+    priority: str = ""
\ No newline at end of file
@@ -0,0 +1,4 @@
+# Make the netting directory a Python package
+from .netting_engine import NettingEngine
+
+__all__ = ["NettingEngine"]
\ No newline at end of file
@@ -0,0 +1,103 @@
+from typing import Dict, List, Optional
+
+from models.transfer_details import TransferDetails
+
+
+class NettingEngine:
+    """
+    Collapses a batch of transfers into one net position per account.
+    
+    Each transfer debits its sender and credits its recipient. Summing those
+    movements per account leaves a single net debit or credit for every
+    account, so a batch of N transfers needs at most one bank operation per
+    distinct account rather than 2 * N.
+    """
+    
+    def __init__(self):
+        """Initialize an empty batch."""
+        self.transfers: List[TransferDetails] = []
+        self.positions: Dict[str, int] = {}
+        self._reference_ids = set()
+    
+    def add(self, details: TransferDetails) -> bool:
+        """
+        Add a transfer to the batch.
+        
+        Args:
+            details: Details of the transfer
+        
+        Returns:
+            True if the transfer was added, False if its reference ID was
+            already part of the batch
+        
+        Raises:
+            ValueError: If the amount is less than 1
+        """
+        if details.amount < 1:
+            raise ValueError(f"Invalid transfer amount: {details.amount}")
+        
+        if details.reference_id in self._reference_ids:
+            return False
+        
+        self._reference_ids.add(details.reference_id)
+        self.transfers.append(details)
+        self.positions[details.sender] = self.positions.get(details.sender, 0) - details.amount
+        self.positions[details.recipient] = self.positions.get(details.recipient, 0) + details.amount
+        return True
+    
+    def net_debits(self) -> Dict[str, int]:
+        """
+        Get the accounts that end the batch with a net outflow.
+        
+        Returns:
+            A mapping of account name to the (positive) amount to withdraw,
+            ordered by account name
+        """
+        return {name: -position for name, position in sorted(self.positions.items()) if position < 0}
+    
+    def net_credits(self) -> Dict[str, int]:
+        """
+        Get the accounts that end the batch with a net inflow.
+        
+        Returns:
+            A mapping of account name to the amount to deposit, ordered by
+            account name
+        """
+        return {name: position for name, position in sorted(self.positions.items()) if position > 0}
+    
+    def gross_operation_count(self) -> int:
+        """Get the number of bank operations the batch would need without netting."""
+        return 2 * len(self.transfers)
+    
+    def net_operation_count(self) -> int:
+        """Get the number of bank operations the batch needs after netting."""
+        return sum(1 for position in self.positions.values() if position != 0)
+    
+    def confirmations(self, transaction_ids: Dict[str, str], batch_id: str,
+                      failed_credits: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Map every transfer in the batch back to the netted transactions.
+        
+        Args:
+            transaction_ids: The transaction ID of the net operation for each
+                account; accounts whose position netted to zero are omitted
+            batch_id: The identifier of the netting batch
+            failed_credits: The error of each net deposit that failed, by
+                account; the transfers to those accounts are reported as
+                failed, naming the withdrawal already taken for them
+        
+        Returns:
+            A mapping of transfer reference ID to its confirmation string
+        """
+        failed_credits = failed_credits or {}
+        result = {}
+        for details in self.transfers:
+            withdrawal = transaction_ids.get(details.sender, "netted")
+            if details.recipient in failed_credits:
+                result[details.reference_id] = (f"failed: deposit to {details.recipient} not applied, "
+                                                f"withdrawal={withdrawal}, batch={batch_id}, "
+                                                f"{failed_credits[details.recipient]}")
+                continue
+            deposit = transaction_ids.get(details.recipient, "netted")
+            result[details.reference_id] = f"withdrawal={withdrawal}, deposit={deposit}, batch={batch_id}"
+        return result
\ No newline at end of file
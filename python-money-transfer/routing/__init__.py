@@ -0,0 +1,16 @@
+# Make the routing directory a Python package
+from .account_partitioning import (parse_partitions, partition_for_account, partition_task_queue,
+                                   partitions_for_process, task_queue_for_account)
+from .priority_lanes import PRIORITY_BULK, PRIORITY_INTERACTIVE, PriorityLane, select_priority
+
+__all__ = [
+    "PRIORITY_BULK",
+    "PRIORITY_INTERACTIVE",
+    "PriorityLane",
+    "parse_partitions",
+    "partition_for_account",
+    "partition_task_queue",
+    "partitions_for_process",
+    "select_priority",
+    "task_queue_for_account"
+]
\ No newline at end of file
@@ -0,0 +1,110 @@
+import zlib
+from typing import List, Optional
+
+from .priority_lanes import PRIORITY_INTERACTIVE
+
+# Prefix of the task queues that carry the activities of one partition of
+# the accounts
+PARTITION_TASK_QUEUE_PREFIX = "MoneyTransferAccountPartition"
+
+def partition_for_account(account: str, partitions: int) -> int:
+    """
+    Get the partition an account belongs to.
+    
+    CRC-32 is used rather than hash(), which is salted per process: the
+    starter, every workflow and every worker must agree on the partition.
+    
+    Args:
+        account: The name of the bank account
+        partitions: The total number of partitions
+    
+    Returns:
+        The partition, between 0 and partitions - 1
+    """
+    return zlib.crc32(account.encode("utf-8")) % partitions
+
+def partition_task_queue(partition: int, priority: str = PRIORITY_INTERACTIVE) -> str:
+    """
+    Get the task queue of a partition in a priority lane.
+    
+    Every lane has its own queue for each partition, so that a backlog of
+    bulk operations on a partition does not hold up interactive ones.
+    
+    Args:
+        partition: The partition
+        priority: The priority lane; "" stands for the interactive lane
+    
+    Returns:
+        The name of the task queue
+    """
+    if not priority or priority == PRIORITY_INTERACTIVE:
+        return f"{PARTITION_TASK_QUEUE_PREFIX}-{partition}"
+    return f"{PARTITION_TASK_QUEUE_PREFIX}-{priority}-{partition}"
+
+def task_queue_for_account(account: str, partitions: int, priority: str = PRIORITY_INTERACTIVE) -> Optional[str]:
+    """
+    Get the task queue for activities that operate on an account.
+    
+    Args:
+        account: The name of the bank account
+        partitions: The total number of partitions, or 0 if routing is off
+        priority: The priority lane of the operation
+    
+    Returns:
+        The partition task queue, or None to use the workflow's task queue
+    """
+    if partitions <= 0:
+        return None
+    return partition_task_queue(partition_for_account(account, partitions), priority)
+
+def partitions_for_process(partitions: List[int], process_index: int, process_count: int) -> List[int]:
+    """
+    Get the partitions one process of a worker fleet polls.
+    
+    The partitions are dealt out to the processes in turn, so that each is
+    polled by exactly one process and its operations stay serialized.
+    
+    Args:
+        partitions: The partitions the fleet polls
+        process_index: The index of the process, from 0 to process_count - 1
+        process_count: The number of processes in the fleet
+    
+    Returns:
+        The partitions of the process; empty if the fleet has more
+        processes than partitions
+    """
+    return partitions[process_index::process_count]
+
+def parse_partitions(spec: str, partitions: int) -> List[int]:
+    """
+    Parse the partitions a worker subscribes to.
+    
+    Args:
+        spec: "all", or a comma-separated list of partitions and inclusive
+            ranges, such as "0-3,8"
+        partitions: The total number of partitions
+    
+    Returns:
+        The sorted partitions
+    
+    Raises:
+        ValueError: If the spec is malformed or names a partition out of range
+    """
+    if spec.strip().lower() == "all":
+        return list(range(partitions))
+    
+    selected = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            first, last = part.split("-", 1)
+            selected.update(range(int(first), int(last) + 1))
+        else:
+            selected.add(int(part))
+    
+    out_of_range = [partition for partition in selected if not 0 <= partition < partitions]
+    if out_of_range:
+        raise ValueError(f"Partitions {sorted(out_of_range)} are outside 0-{partitions - 1}")
+    return sorted(selected)
\ No newline at end of file
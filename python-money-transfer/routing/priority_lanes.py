@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+from typing import Optional
+
+# Latency-sensitive transfers, such as a customer paying from an app
+PRIORITY_INTERACTIVE = "interactive"
+
+# Transfers where throughput matters more than latency, such as payroll
+PRIORITY_BULK = "bulk"
+
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BULK)
+
+@dataclass
+class PriorityLane:
+    """
+    A task queue and the worker slots reserved for one priority.
+    
+    Attributes:
+        priority: The priority served by the lane
+        task_queue: The task queue the lane's workflows and activities run on
+        max_concurrent_workflow_tasks: The workflow task slots of a worker
+            polling the lane
+        max_concurrent_activities: The activity slots of a worker polling
+            the lane
+    """
+    priority: str
+    task_queue: str
+    max_concurrent_workflow_tasks: int
+    max_concurrent_activities: int
+
+def select_priority(amount: int, priority: Optional[str], bulk_amount_threshold: int) -> str:
+    """
+    Choose the priority of a transfer.
+    
+    Args:
+        amount: The amount to transfer
+        priority: The priority requested by the caller, or None or "" to
+            choose by amount
+        bulk_amount_threshold: Transfers of more than this amount are bulk
+    
+    Returns:
+        PRIORITY_INTERACTIVE or PRIORITY_BULK
+    
+    Raises:
+        ValueError: If the requested priority is unknown
+    """
+    if priority:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority} (expected one of {', '.join(PRIORITIES)})")
+        return priority
+    return PRIORITY_BULK if amount > bulk_amount_threshold else PRIORITY_INTERACTIVE
\ No newline at end of file
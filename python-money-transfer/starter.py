@@ -3,11 +3,16 @@ import logging
 import sys
 import uuid
 
+from opentelemetry import trace
 from temporalio.client import Client
 
-from models.transfer_details import TransferDetails
+from codec.data_converter import create_data_converter
+from models.transfer_details import ACTIVITY_MODE_LOCAL, ACTIVITY_MODE_REGULAR, TransferDetails
 from workflows.money_transfer_workflow_impl import MoneyTransferWorkflowImpl
-from workers import TASK_QUEUE_NAME
+from workflows.netting_workflow_impl import NettingWorkflowImpl
+from routing.priority_lanes import select_priority
+from telemetry.tracing import configure_tracing, shutdown_tracing, tracing_interceptors
+from workers import ACCOUNT_PARTITIONS, BULK_AMOUNT_THRESHOLD, PRIORITY_LANES, TASK_QUEUE_NAME
 
 # Configure logging
 logging.basicConfig(
@@ -20,7 +25,15 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-async def start_workflow(sender: str, recipient: str, amount: int):
+# Workflow ID shared by all transfers submitted for netting, so that they
+# join the batch that is currently collecting
+NETTING_WORKFLOW_ID = "transfer-netting"
+
+# How long a netting batch collects transfers before settling
+NETTING_WINDOW_SECONDS = 30
+
+async def start_workflow(sender: str, recipient: str, amount: int,
+                         activity_mode: str = ACTIVITY_MODE_REGULAR, priority: str = ""):
     """
     Start the money transfer workflow.
     
@@ -28,33 +41,89 @@ async def start_workflow(sender: str, recipient: str, amount: int):
         sender: The name of the sender's bank account
         recipient: The name of the recipient's bank account
         amount: The amount to transfer
+        activity_mode: How the workflow executes the bank activities
+        priority: The priority lane to run the transfer on, or "" to choose
+            the lane by amount
     """
     # Generate a unique reference ID
     reference_id = str(uuid.uuid4())
     
-    # Create transfer details
-    details = TransferDetails(sender, recipient, amount, reference_id)
+    lane = PRIORITY_LANES[select_priority(amount, priority, BULK_AMOUNT_THRESHOLD)]
     
-    logger.info(f"Will transfer {amount} from {sender} to {recipient}")
+    # Create transfer details; the bank activities are routed by account and
+    # lane if ACCOUNT_PARTITIONS is set
+    details = TransferDetails(sender, recipient, amount, reference_id, activity_mode, ACCOUNT_PARTITIONS,
+                              lane.priority)
+    
+    logger.info(f"Will transfer {amount} from {sender} to {recipient} on the {lane.priority} lane")
     
     # Create a workflow ID
     workflow_id = f"transfer-{amount}-{sender}-to-{recipient}".lower()
     
     # Connect to the Temporal server
-    client = await Client.connect("localhost:7233")
+    client = await Client.connect("localhost:7233", data_converter=create_data_converter(),
+                                  interceptors=tracing_interceptors())
+    
+    # The root span covers the whole transfer, as the caller sees it
+    with trace.get_tracer(__name__).start_as_current_span("MoneyTransfer", attributes={
+        "transfer.reference_id": reference_id,
+        "transfer.amount": amount,
+        "transfer.priority": lane.priority
+    }):
+        # Start the workflow
+        handle = await client.start_workflow(
+            MoneyTransferWorkflowImpl.transfer,
+            details,
+            id=workflow_id,
+            task_queue=lane.task_queue
+        )
+        
+        # Wait for the workflow to complete
+        confirmation = await handle.result()
+    
+    logger.info(f"Money Transfer complete. Confirmation: {confirmation}")
+    return confirmation
+
+async def submit_for_netting(sender: str, recipient: str, amount: int):
+    """
+    Submit a money transfer to the netting workflow.
+    
+    The transfer is added to the batch that is currently collecting, or
+    starts a new batch if none is running, and settles together with every
+    other transfer in that batch.
     
-    # Start the workflow
+    Args:
+        sender: The name of the sender's bank account
+        recipient: The name of the recipient's bank account
+        amount: The amount to transfer
+    """
+    # Generate a unique reference ID
+    reference_id = str(uuid.uuid4())
+    
+    # Create transfer details
+    details = TransferDetails(sender, recipient, amount, reference_id)
+    
+    logger.info(f"Will submit transfer of {amount} from {sender} to {recipient} for netting")
+    
+    # Connect to the Temporal server
+    client = await Client.connect("localhost:7233", data_converter=create_data_converter(),
+                                  interceptors=tracing_interceptors())
+    
+    # Signal the running batch, or start one if there is none
     handle = await client.start_workflow(
-        MoneyTransferWorkflowImpl.transfer,
-        details,
-        id=workflow_id,
-        task_queue=TASK_QUEUE_NAME
+        NettingWorkflowImpl.run,
+        NETTING_WINDOW_SECONDS,
+        id=NETTING_WORKFLOW_ID,
+        task_queue=TASK_QUEUE_NAME,
+        start_signal="submit",
+        start_signal_args=[details]
     )
     
-    # Wait for the workflow to complete
-    confirmation = await handle.result()
+    # Wait for the batch to settle
+    confirmations = await handle.result()
+    confirmation = confirmations.get(reference_id)
     
-    logger.info(f"Money Transfer complete. Confirmation: {confirmation}")
+    logger.info(f"Netted Money Transfer complete. Confirmation: {confirmation}")
     return confirmation
 
 def validate_args():
@@ -64,25 +133,26 @@ def validate_args():
     Returns:
         Tuple of (sender, recipient, amount) if valid, None otherwise
     """
-    if len(sys.argv) != 4:
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    if len(args) != 3:
         print("Incorrect number of arguments specified.")
-        print("Format: SENDER RECIPIENT AMOUNT")
+        print("Format: SENDER RECIPIENT AMOUNT [--net | --local-activities] [--priority=interactive|bulk]")
         return None
     
-    sender = sys.argv[1]
+    sender = args[0]
     if not sender or not sender.strip():
         print("Sender name must not be empty")
         return None
     
-    recipient = sys.argv[2]
+    recipient = args[1]
     if not recipient or not recipient.strip():
         print("Recipient name must not be empty")
         return None
     
     try:
-        amount = int(sys.argv[3])
+        amount = int(args[2])
     except ValueError:
-        print(f"Could not parse specified amount: {sys.argv[3]}")
+        print(f"Could not parse specified amount: {args[2]}")
         return None
     
     return sender, recipient, amount
@@ -95,14 +165,34 @@ def main():
     
     sender, recipient, amount = args
     
+    # The caller may pin the priority lane, otherwise it is chosen by amount
+    priority = ""
+    for arg in sys.argv[1:]:
+        if arg.startswith("--priority="):
+            priority = arg[len("--priority="):]
+    try:
+        select_priority(amount, priority, BULK_AMOUNT_THRESHOLD)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    
+    configure_tracing("money-transfer-starter")
+    
     try:
-        # Run the workflow
-        asyncio.run(start_workflow(sender, recipient, amount))
+        if "--net" in sys.argv:
+            # Settle the transfer as part of a netting batch
+            asyncio.run(submit_for_netting(sender, recipient, amount))
+        else:
+            # Run the workflow, optionally with local activities for the bank calls
+            activity_mode = ACTIVITY_MODE_LOCAL if "--local-activities" in sys.argv else ACTIVITY_MODE_REGULAR
+            asyncio.run(start_workflow(sender, recipient, amount, activity_mode, priority))
     except KeyboardInterrupt:
         logger.info("Starter stopped by keyboard interrupt")
     except Exception as e:
         logger.error(f"Starter failed with error: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        shutdown_tracing()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
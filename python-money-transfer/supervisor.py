@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(processName)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+# Number of worker processes; defaults to the number of CPU cores
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "0")) or os.cpu_count() or 1
+
+# File the supervisor writes the fleet summary to, if set
+WORKER_STATUS_FILE = os.getenv("WORKER_STATUS_FILE")
+
+# How often, in seconds, the fleet summary is logged
+SUMMARY_INTERVAL = 30
+
+# How long, in seconds, workers get to finish in-flight tasks on shutdown
+SHUTDOWN_GRACE_PERIOD = 30
+
+# Restart backoff, in seconds, for a worker that keeps crashing
+MINIMUM_RESTART_DELAY = 1
+MAXIMUM_RESTART_DELAY = 60
+
+# A worker that ran at least this long, in seconds, is considered healthy
+# again and its restart backoff is reset
+STABLE_UPTIME = 60
+
+def run_worker_process(process_index: int, process_count: int, stats_queue: Any) -> None:
+    """
+    Entry point of a worker process.
+    
+    Args:
+        process_index: The index of this process in the fleet
+        process_count: The number of processes in the fleet
+        stats_queue: The queue to report WorkerStats snapshots to
+    """
+    # Imported here so that the supervisor itself never loads the Temporal SDK
+    from workers import run_worker
+    
+    try:
+        asyncio.run(run_worker(process_index, stats_queue, process_count))
+    except KeyboardInterrupt:
+        pass
+    except ValueError as e:
+        logger.error(f"Invalid configuration of worker process {process_index}: {e}")
+        sys.exit(1)
+
+class WorkerSlot:
+    """
+    One supervised worker process and its restart state.
+    """
+    
+    def __init__(self, index: int):
+        """
+        Initialize the slot.
+        
+        Args:
+            index: The index of the worker process
+        """
+        self.index = index
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.started = 0.0
+        self.restarts = 0
+        self.restart_delay = MINIMUM_RESTART_DELAY
+        self.restart_at: Optional[float] = None
+        self.stats: Dict[str, Any] = {}
+
+class Supervisor:
+    """
+    Runs a fleet of worker processes against the same task queue.
+    
+    The account partitions the fleet polls are divided between the
+    processes, so that each partition still has a single poller.
+    
+    Each process runs its own event loop and activity thread pool, so
+    workflow task processing, which is CPU-bound Python, can use every core.
+    Crashed processes are restarted with exponential backoff, SIGTERM and
+    SIGINT are forwarded to every worker, and the stats each worker reports
+    are combined into a per-process health and throughput summary.
+    """
+    
+    def __init__(self, processes: int, status_file: Optional[str] = None):
+        """
+        Initialize the supervisor.
+        
+        Args:
+            processes: The number of worker processes to run
+            status_file: A file to write the fleet summary to as JSON
+        """
+        self.status_file = status_file
+        # Spawn rather than fork: the Temporal SDK runtime must not be
+        # inherited across a fork
+        self.context = multiprocessing.get_context("spawn")
+        self.stats_queue = self.context.Queue()
+        self.slots = [WorkerSlot(index) for index in range(processes)]
+        self.shutdown_requested = False
+    
+    def handle_signal(self, signum, frame):
+        """Stop restarting workers and forward the signal to every one of them."""
+        logger.info(f"Received signal {signum}, stopping {len(self.slots)} worker(s)")
+        self.shutdown_requested = True
+        for slot in self.slots:
+            if slot.process is not None and slot.process.is_alive():
+                os.kill(slot.process.pid, signal.SIGTERM)
+    
+    def run(self) -> None:
+        """Start the workers and supervise them until shutdown."""
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, self.handle_signal)
+        
+        for slot in self.slots:
+            self._start(slot)
+        
+        next_summary = time.monotonic() + SUMMARY_INTERVAL
+        while not self.shutdown_requested:
+            self._drain_stats(timeout=1)
+            self._check_workers()
+            if time.monotonic() >= next_summary:
+                self._report()
+                next_summary = time.monotonic() + SUMMARY_INTERVAL
+        
+        self._stop()
+        self._report()
+    
+    def _start(self, slot: WorkerSlot) -> None:
+        """
+        Start the worker process of a slot.
+        
+        Args:
+            slot: The slot to start
+        """
+        slot.process = self.context.Process(
+            target=run_worker_process,
+            args=(slot.index, len(self.slots), self.stats_queue),
+            name=f"worker-{slot.index}"
+        )
+        slot.process.start()
+        slot.started = time.monotonic()
+        slot.restart_at = None
+        logger.info(f"Started worker {slot.index} with pid {slot.process.pid}")
+    
+    def _check_workers(self) -> None:
+        """Schedule restarts for crashed workers and start those that are due."""
+        now = time.monotonic()
+        for slot in self.slots:
+            if slot.restart_at is not None:
+                if now >= slot.restart_at and not self.shutdown_requested:
+                    slot.restarts += 1
+                    self._start(slot)
+                continue
+            
+            if slot.process.is_alive():
+                continue
+            
+            if now - slot.started >= STABLE_UPTIME:
+                slot.restart_delay = MINIMUM_RESTART_DELAY
+            logger.warning(f"Worker {slot.index} (pid {slot.process.pid}) exited with code "
+                           f"{slot.process.exitcode}, restarting in {slot.restart_delay}s")
+            slot.restart_at = now + slot.restart_delay
+            slot.restart_delay = min(slot.restart_delay * 2, MAXIMUM_RESTART_DELAY)
+    
+    def _drain_stats(self, timeout: float) -> None:
+        """
+        Collect the stats reported by the workers.
+        
+        Args:
+            timeout: How long to wait for the first report
+        """
+        try:
+            snapshot = self.stats_queue.get(timeout=timeout)
+            while True:
+                self.slots[snapshot["process_index"]].stats = snapshot
+                snapshot = self.stats_queue.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def _stop(self) -> None:
+        """Wait for the workers to finish, killing those that exceed the grace period."""
+        deadline = time.monotonic() + SHUTDOWN_GRACE_PERIOD
+        running = [slot for slot in self.slots if slot.process is not None and slot.process.is_alive()]
+        # Keep draining the queue while waiting: a process cannot exit while
+        # its final report is still buffered
+        while running and time.monotonic() < deadline:
+            self._drain_stats(timeout=0.5)
+            running = [slot for slot in running if slot.process.is_alive()]
+        
+        for slot in running:
+            logger.warning(f"Worker {slot.index} (pid {slot.process.pid}) did not stop in time, killing it")
+            slot.process.kill()
+            slot.process.join()
+        self._drain_stats(timeout=0)
+    
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Get the health and throughput of every worker process.
+        
+        Returns:
+            One entry per worker process
+        """
+        return [
+            {
+                "process_index": slot.index,
+                "pid": slot.process.pid if slot.process is not None else None,
+                "alive": slot.process is not None and slot.process.is_alive(),
+                "restarts": slot.restarts,
+                "activities_completed": slot.stats.get("activities_completed", 0),
+                "activities_failed": slot.stats.get("activities_failed", 0),
+                "activities_per_second": slot.stats.get("activities_per_second", 0.0)
+            }
+            for slot in self.slots
+        ]
+    
+    def _report(self) -> None:
+        """Log the fleet summary and write it to the status file."""
+        summary = self.summary()
+        for entry in summary:
+            logger.info(f"Worker {entry['process_index']}: pid={entry['pid']} alive={entry['alive']} "
+                        f"restarts={entry['restarts']} completed={entry['activities_completed']} "
+                        f"failed={entry['activities_failed']} rate={entry['activities_per_second']}/s")
+        total = sum(entry["activities_per_second"] for entry in summary)
+        logger.info(f"Fleet: {sum(entry['alive'] for entry in summary)}/{len(summary)} worker(s) alive, "
+                    f"{total:.2f} activities/s")
+        
+        if self.status_file:
+            with open(self.status_file, "w") as f:
+                json.dump(summary, f, indent=2)
+
+def parse_args() -> argparse.Namespace:
+    """Parse the command-line arguments."""
+    parser = argparse.ArgumentParser(description="Run a supervised fleet of money transfer worker processes.")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES,
+                        help="number of worker processes (default: number of CPU cores)")
+    parser.add_argument("--status-file", default=WORKER_STATUS_FILE,
+                        help="file to write the per-process summary to as JSON")
+    return parser.parse_args()
+
+def main():
+    """Main entry point for the worker supervisor."""
+    args = parse_args()
+    if args.processes < 1:
+        print("Processes must be at least 1")
+        sys.exit(1)
+    
+    logger.info(f"Starting {args.processes} worker process(es)")
+    Supervisor(args.processes, args.status_file).run()
+    logger.info("Supervisor shutdown complete")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
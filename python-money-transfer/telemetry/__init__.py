@@ -0,0 +1,6 @@
+# Make the telemetry directory a Python package
+from .runtime import create_runtime
+from .transfer_metrics import amount_bucket
+from .worker_stats import WorkerStats, WorkerStatsInterceptor
+
+__all__ = ["WorkerStats", "WorkerStatsInterceptor", "amount_bucket", "create_runtime"]
\ No newline at end of file
@@ -0,0 +1,40 @@
+import logging
+import os
+from typing import Optional
+
+from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
+
+logger = logging.getLogger(__name__)
+
+# Address on which the worker serves Prometheus metrics, for example
+# "0.0.0.0:9464". Metrics are not exported if this is not set.
+METRICS_BIND_ADDRESS_ENV_VARNAME = "TEMPORAL_METRICS_BIND_ADDRESS"
+
+def create_runtime(bind_address: Optional[str] = None, port_offset: int = 0) -> Optional[Runtime]:
+    """
+    Create a Temporal runtime that exports SDK and custom metrics.
+    
+    The Prometheus endpoint includes the SDK's own metrics (activity
+    schedule-to-start latency, task slot usage, workflow task latency and
+    so on) as well as the metrics defined in telemetry/transfer_metrics.py.
+    
+    Args:
+        bind_address: The address to serve metrics on; defaults to the value
+            of the TEMPORAL_METRICS_BIND_ADDRESS environment variable
+        port_offset: Added to the port, so that several worker processes on
+            one host each serve their own endpoint
+    
+    Returns:
+        The runtime to pass to Client.connect, or None to use the default
+        runtime if no address is configured
+    """
+    bind_address = bind_address or os.getenv(METRICS_BIND_ADDRESS_ENV_VARNAME)
+    if not bind_address:
+        return None
+    
+    if port_offset:
+        host, port = bind_address.rsplit(":", 1)
+        bind_address = f"{host}:{int(port) + port_offset}"
+    
+    logger.info(f"Serving Prometheus metrics on {bind_address}")
+    return Runtime(telemetry=TelemetryConfig(metrics=PrometheusConfig(bind_address=bind_address)))
\ No newline at end of file
@@ -0,0 +1,114 @@
+import json
+import logging
+import os
+import threading
+from typing import List, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+from temporalio.contrib.opentelemetry import TracingInterceptor
+
+logger = logging.getLogger(__name__)
+
+# Where spans are exported: "none" (the default), "file", or "otlp"
+TRACING_EXPORTER_ENV_VARNAME = "TRACING_EXPORTER"
+
+# File that the "file" exporter appends spans to, one JSON object per line
+TRACING_FILE_ENV_VARNAME = "TRACING_FILE"
+DEFAULT_TRACING_FILE = "traces.jsonl"
+
+# Collector endpoint for the "otlp" exporter
+OTLP_ENDPOINT_ENV_VARNAME = "OTEL_EXPORTER_OTLP_TRACES_ENDPOINT"
+DEFAULT_OTLP_ENDPOINT = "http://localhost:4318/v1/traces"
+
+# Whether configure_tracing enabled tracing in this process
+_tracing_enabled = False
+
+class JsonLinesSpanExporter(SpanExporter):
+    """
+    Appends finished spans to a file as JSON lines.
+    
+    This stands in for a collector during local runs: the files written by
+    the starter, the workers and the bank service can be concatenated and
+    grouped by trace ID.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Initialize the exporter.
+        
+        Args:
+            path: The file to append to
+        """
+        self.path = path
+        self._lock = threading.Lock()
+    
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """Append a batch of spans to the file."""
+        lines = [json.dumps(json.loads(span.to_json())) + "\n" for span in spans]
+        with self._lock:
+            with open(self.path, "a") as f:
+                f.writelines(lines)
+        return SpanExportResult.SUCCESS
+    
+    def shutdown(self) -> None:
+        """Nothing to release; the file is opened per batch."""
+        pass
+
+def configure_tracing(service_name: str, exporter: Optional[str] = None) -> bool:
+    """
+    Install a global tracer provider that exports spans.
+    
+    Args:
+        service_name: The service name recorded on every span
+        exporter: "none", "file" or "otlp"; defaults to the value of the
+            TRACING_EXPORTER environment variable
+    
+    Returns:
+        True if tracing was enabled
+    """
+    exporter = (exporter or os.getenv(TRACING_EXPORTER_ENV_VARNAME, "none")).lower()
+    if exporter == "none":
+        return False
+    
+    if exporter == "file":
+        path = os.getenv(TRACING_FILE_ENV_VARNAME, DEFAULT_TRACING_FILE)
+        span_exporter = JsonLinesSpanExporter(path)
+        logger.info(f"Writing traces to {path}")
+    elif exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        
+        endpoint = os.getenv(OTLP_ENDPOINT_ENV_VARNAME, DEFAULT_OTLP_ENDPOINT)
+        span_exporter = OTLPSpanExporter(endpoint=endpoint)
+        logger.info(f"Sending traces to {endpoint}")
+    else:
+        raise ValueError(f"Unsupported tracing exporter: {exporter}")
+    
+    global _tracing_enabled
+    provider = TracerProvider(resource=Resource.create({SERVICE_NAME: service_name}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    _tracing_enabled = True
+    return True
+
+def tracing_interceptors() -> List[TracingInterceptor]:
+    """
+    Get the Temporal interceptors that trace workflows and activities.
+    
+    Passed to Client.connect, the interceptor adds spans for starting and
+    signalling workflows, and workers created from the client add spans for
+    workflow runs and activity executions. The trace context travels in the
+    Temporal headers, so every span joins the starter's trace.
+    
+    Returns:
+        The interceptors to use, or none if tracing is not enabled
+    """
+    return [TracingInterceptor()] if _tracing_enabled else []
+
+def shutdown_tracing() -> None:
+    """Export any spans still buffered. Call before the process exits."""
+    provider = trace.get_tracer_provider()
+    if isinstance(provider, TracerProvider):
+        provider.shutdown()
\ No newline at end of file
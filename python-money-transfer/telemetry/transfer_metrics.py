@@ -0,0 +1,32 @@
+# Names of the custom metrics emitted by the money transfer application. The
+# Prometheus exporter prefixes every metric with "temporal_".
+
+# Counter of transfers started, with an "amount_bucket" attribute
+TRANSFERS_STARTED = "money_transfer_started"
+
+# Histogram of the time in milliseconds that held transfers wait for approval
+APPROVAL_WAIT = "money_transfer_approval_wait"
+
+# Histogram of the duration in milliseconds of each bank API call, with
+# "operation" and "outcome" attributes
+BANK_CALL_LATENCY = "money_transfer_bank_call_latency"
+
+# Upper bounds of the transfer amount buckets
+AMOUNT_BUCKET_BOUNDS = [10, 100, 500, 1000, 10000]
+
+def amount_bucket(amount: int) -> str:
+    """
+    Get the name of the bucket a transfer amount falls into.
+    
+    Args:
+        amount: The amount of the transfer
+    
+    Returns:
+        The bucket name, such as "100-500" or "10000+"
+    """
+    lower = 0
+    for upper in AMOUNT_BUCKET_BOUNDS:
+        if amount <= upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
\ No newline at end of file
@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+from typing import Any, Dict
+
+from temporalio.worker import ActivityInboundInterceptor, ExecuteActivityInput, Interceptor
+
+class WorkerStats:
+    """
+    Throughput counters for the worker in the current process.
+    """
+    
+    def __init__(self):
+        """Initialize the counters."""
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+        self.activities_completed = 0
+        self.activities_failed = 0
+    
+    def record_activity(self, succeeded: bool) -> None:
+        """
+        Record the end of an activity attempt.
+        
+        Args:
+            succeeded: Whether the attempt succeeded
+        """
+        with self._lock:
+            if succeeded:
+                self.activities_completed += 1
+            else:
+                self.activities_failed += 1
+    
+    def snapshot(self, process_index: int = 0) -> Dict[str, Any]:
+        """
+        Get the current values of the counters.
+        
+        Args:
+            process_index: The index of this worker process in the fleet
+        
+        Returns:
+            A summary of the health and throughput of this process
+        """
+        with self._lock:
+            completed = self.activities_completed
+            failed = self.activities_failed
+        uptime = time.monotonic() - self.started
+        
+        return {
+            "process_index": process_index,
+            "pid": os.getpid(),
+            "uptime_seconds": round(uptime, 1),
+            "activities_completed": completed,
+            "activities_failed": failed,
+            "activities_per_second": round(completed / uptime, 2) if uptime > 0 else 0.0
+        }
+
+class WorkerStatsInterceptor(Interceptor):
+    """
+    Worker interceptor that counts activity attempts in WorkerStats.
+    """
+    
+    def __init__(self, stats: WorkerStats):
+        """
+        Initialize the interceptor.
+        
+        Args:
+            stats: The counters to update
+        """
+        self.stats = stats
+    
+    def intercept_activity(self, next: ActivityInboundInterceptor) -> ActivityInboundInterceptor:
+        """Wrap the activity inbound interceptor chain."""
+        return _StatsActivityInboundInterceptor(next, self.stats)
+
+class _StatsActivityInboundInterceptor(ActivityInboundInterceptor):
+    """
+    Counts the outcome of every activity attempt.
+    
+    The inbound chain always runs on the worker's event loop, for synchronous
+    activities too: the SDK's innermost interceptor is a coroutine that hands
+    a synchronous activity to the activity executor and awaits its result.
+    The outcome is therefore only known once that coroutine has been awaited.
+    """
+    
+    def __init__(self, next: ActivityInboundInterceptor, stats: WorkerStats):
+        super().__init__(next)
+        self.stats = stats
+    
+    async def execute_activity(self, input: ExecuteActivityInput) -> Any:
+        try:
+            result = await self.next.execute_activity(input)
+        except BaseException:
+            self.stats.record_activity(False)
+            raise
+        self.stats.record_activity(True)
+        return result
\ No newline at end of file
@@ -0,0 +1,88 @@
+import unittest
+
+from models.transfer_details import TransferDetails
+from netting.netting_engine import NettingEngine
+
+def transfer(sender: str, recipient: str, amount: int, reference_id: str) -> TransferDetails:
+    """Build the details of a transfer with the default execution options."""
+    return TransferDetails(sender, recipient, amount, reference_id)
+
+class NettingEngineTest(unittest.TestCase):
+    """Tests of the reduction of a batch of transfers to net positions."""
+    
+    def test_opposite_transfers_net_to_one_debit_and_one_credit(self):
+        engine = NettingEngine()
+        engine.add(transfer("Maria", "David", 100, "t1"))
+        engine.add(transfer("David", "Maria", 80, "t2"))
+        
+        self.assertEqual(engine.net_debits(), {"Maria": 20})
+        self.assertEqual(engine.net_credits(), {"David": 20})
+        self.assertEqual(engine.gross_operation_count(), 4)
+        self.assertEqual(engine.net_operation_count(), 2)
+    
+    def test_positions_that_cancel_out_need_no_operation(self):
+        engine = NettingEngine()
+        engine.add(transfer("A", "B", 50, "t1"))
+        engine.add(transfer("B", "C", 50, "t2"))
+        engine.add(transfer("C", "A", 50, "t3"))
+        
+        self.assertEqual(engine.net_debits(), {})
+        self.assertEqual(engine.net_credits(), {})
+        self.assertEqual(engine.net_operation_count(), 0)
+    
+    def test_debits_and_credits_sum_to_zero(self):
+        engine = NettingEngine()
+        for i, (sender, recipient, amount) in enumerate([("A", "B", 30), ("A", "C", 45), ("C", "B", 10),
+                                                         ("D", "A", 5)]):
+            engine.add(transfer(sender, recipient, amount, f"t{i}"))
+        
+        self.assertEqual(sum(engine.net_debits().values()), sum(engine.net_credits().values()))
+        self.assertEqual(list(engine.net_debits()), sorted(engine.net_debits()))
+    
+    def test_duplicate_reference_id_is_ignored(self):
+        engine = NettingEngine()
+        self.assertTrue(engine.add(transfer("A", "B", 10, "t1")))
+        self.assertFalse(engine.add(transfer("A", "B", 10, "t1")))
+        
+        self.assertEqual(engine.net_debits(), {"A": 10})
+        self.assertEqual(len(engine.transfers), 1)
+    
+    def test_invalid_amount_is_rejected(self):
+        engine = NettingEngine()
+        with self.assertRaises(ValueError):
+            engine.add(transfer("A", "B", 0, "t1"))
+        self.assertEqual(engine.positions, {})
+    
+    def test_confirmations_name_the_net_transactions(self):
+        engine = NettingEngine()
+        engine.add(transfer("Maria", "David", 100, "t1"))
+        engine.add(transfer("David", "Maria", 80, "t2"))
+        
+        confirmations = engine.confirmations({"Maria": "W1", "David": "D1"}, "batch-1")
+        
+        self.assertEqual(confirmations["t1"], "withdrawal=W1, deposit=D1, batch=batch-1")
+        self.assertEqual(confirmations["t2"], "withdrawal=D1, deposit=W1, batch=batch-1")
+    
+    def test_confirmations_report_netted_accounts(self):
+        engine = NettingEngine()
+        engine.add(transfer("A", "B", 50, "t1"))
+        engine.add(transfer("B", "C", 50, "t2"))
+        
+        confirmations = engine.confirmations({"A": "W1", "C": "D1"}, "batch-1")
+        
+        self.assertEqual(confirmations["t1"], "withdrawal=W1, deposit=netted, batch=batch-1")
+        self.assertEqual(confirmations["t2"], "withdrawal=netted, deposit=D1, batch=batch-1")
+    
+    def test_confirmations_report_failed_credits_per_transfer(self):
+        engine = NettingEngine()
+        engine.add(transfer("A", "B", 50, "t1"))
+        engine.add(transfer("A", "C", 20, "t2"))
+        
+        confirmations = engine.confirmations({"A": "W1", "C": "D2"}, "batch-1", {"B": "B: bank unavailable"})
+        
+        self.assertTrue(confirmations["t1"].startswith("failed: deposit to B not applied, withdrawal=W1"))
+        self.assertIn("B: bank unavailable", confirmations["t1"])
+        self.assertEqual(confirmations["t2"], "withdrawal=W1, deposit=D2, batch=batch-1")
+
+if __name__ == "__main__":
+    unittest.main()
\ No newline at end of file
@@ -1,15 +1,28 @@
 import asyncio
+import contextlib
 import logging
+import os
 import signal
 import sys
 from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 from temporalio.client import Client
 from temporalio.worker import Worker
 from temporalio import activity
 
 from activities.account_activities import AccountActivitiesImpl
+from bankapi.shard_ring import ShardRing, parse_shards
+from bankapi.wire_format import WIRE_FORMAT_JSON
+from codec.data_converter import create_data_converter
+from routing.account_partitioning import parse_partitions, partition_task_queue, partitions_for_process
+from routing.priority_lanes import PRIORITIES, PRIORITY_BULK, PRIORITY_INTERACTIVE, PriorityLane
+from telemetry.logging_setup import configure_logging
+from telemetry.runtime import create_runtime
+from telemetry.tracing import configure_tracing, shutdown_tracing, tracing_interceptors
+from telemetry.worker_stats import WorkerStats, WorkerStatsInterceptor
 from workflows.money_transfer_workflow_impl import MoneyTransferWorkflowImpl
+from workflows.netting_workflow_impl import NettingWorkflowImpl
 
 # Configure logging
 logging.basicConfig(
@@ -25,53 +38,224 @@ logger = logging.getLogger(__name__)
 # Task queue name
 TASK_QUEUE_NAME = "MoneyTransferTaskQueue"
 
-# Shutdown flag
-shutdown = False
+# Task queue of the bulk priority lane; the interactive lane uses TASK_QUEUE_NAME
+BULK_TASK_QUEUE_NAME = "MoneyTransferBulkTaskQueue"
 
-# Signal handler for graceful shutdown
-def handle_signal(signum, frame):
-    global shutdown
-    logger.info(f"Received signal {signum}, initiating shutdown")
-    shutdown = True
+# Wire format for calls to the bank API ("json" or "msgpack")
+BANK_API_WIRE_FORMAT = os.getenv("BANK_API_WIRE_FORMAT", WIRE_FORMAT_JSON)
 
-async def run_worker():
-    """Start and run the worker."""
-    # Connect to the Temporal server
-    client = await Client.connect("localhost:7233")
+# Whether bank API calls slower than their recent 95th percentile are hedged
+BANK_API_HEDGE_REQUESTS = os.getenv("BANK_API_HEDGE_REQUESTS", "false").lower() == "true"
+
+# Sharded bank services: the ring file they watch, or a static list of
+# "id=host:port" entries; unset to call the single bank service on localhost
+BANK_API_SHARD_RING_FILE = os.getenv("BANK_API_SHARD_RING_FILE")
+BANK_API_SHARDS = os.getenv("BANK_API_SHARDS")
+
+# Threads in the activity executor of each worker process
+ACTIVITY_THREADS = int(os.getenv("WORKER_ACTIVITY_THREADS", "10"))
+
+# Transfers of more than this amount go to the bulk lane unless the caller
+# chooses a priority
+BULK_AMOUNT_THRESHOLD = int(os.getenv("BULK_AMOUNT_THRESHOLD", "500"))
+
+# Task queue and worker slots of each priority lane
+PRIORITY_LANES = {
+    PRIORITY_INTERACTIVE: PriorityLane(
+        PRIORITY_INTERACTIVE,
+        TASK_QUEUE_NAME,
+        max_concurrent_workflow_tasks=int(os.getenv("INTERACTIVE_LANE_WORKFLOW_TASK_SLOTS", "100")),
+        max_concurrent_activities=int(os.getenv("INTERACTIVE_LANE_ACTIVITY_SLOTS", str(ACTIVITY_THREADS)))
+    ),
+    PRIORITY_BULK: PriorityLane(
+        PRIORITY_BULK,
+        BULK_TASK_QUEUE_NAME,
+        max_concurrent_workflow_tasks=int(os.getenv("BULK_LANE_WORKFLOW_TASK_SLOTS", "10")),
+        max_concurrent_activities=int(os.getenv("BULK_LANE_ACTIVITY_SLOTS", "5"))
+    )
+}
+
+# Priority lanes this worker polls, comma-separated
+WORKER_PRIORITY_LANES = os.getenv("WORKER_PRIORITY_LANES", ",".join(PRIORITIES))
+
+# Number of account partitions that bank activities are routed across; 0
+# runs every activity on TASK_QUEUE_NAME
+ACCOUNT_PARTITIONS = int(os.getenv("ACCOUNT_PARTITIONS", "0"))
+
+# Partitions this worker polls, such as "all" or "0-3,8"; a supervised fleet
+# divides them between its processes
+WORKER_ACCOUNT_PARTITIONS = os.getenv("WORKER_ACCOUNT_PARTITIONS", "all")
+
+# Activities a worker runs at once for each partition and lane it polls.
+# With 1, and each partition polled by a single process, operations on the
+# accounts of a partition run one after another within each lane.
+PARTITION_ACTIVITY_CONCURRENCY = int(os.getenv("PARTITION_ACTIVITY_CONCURRENCY", "1"))
+
+# How often, in seconds, a supervised worker reports its stats
+STATS_REPORT_INTERVAL = 5
+
+def select_task_queues(process_index: int = 0, process_count: int = 1) -> Tuple[List[PriorityLane], List[int]]:
+    """
+    Get the priority lanes and account partitions a worker process polls.
     
-    # Create an instance of the AccountActivitiesImpl class
-    account_activities = AccountActivitiesImpl(hostname="localhost", port=8480)
+    Args:
+        process_index: The index of this process when run by the supervisor
+        process_count: The number of processes run by the supervisor
     
-    # Create a thread pool executor for synchronous activities
-    activity_executor = ThreadPoolExecutor(max_workers=10)
+    Returns:
+        The priority lanes and the account partitions
     
-    # Create a worker that hosts the workflow implementation and activities
-    worker = Worker(
-        client,
-        task_queue=TASK_QUEUE_NAME,
-        workflows=[MoneyTransferWorkflowImpl],
-        # Register the activities
-        activities=[
-            account_activities.deposit,
-            account_activities.withdraw
-        ],
-        activity_executor=activity_executor
-    )
+    Raises:
+        ValueError: If WORKER_PRIORITY_LANES names an unknown lane, or the
+            process would poll no task queue at all
+    """
+    lanes = []
+    for priority in WORKER_PRIORITY_LANES.split(","):
+        priority = priority.strip()
+        if not priority:
+            continue
+        if priority not in PRIORITY_LANES:
+            raise ValueError(f"Unknown priority lane {priority!r} in WORKER_PRIORITY_LANES, "
+                             f"expected one of {', '.join(PRIORITIES)}")
+        lanes.append(PRIORITY_LANES[priority])
+    
+    partitions = []
+    if ACCOUNT_PARTITIONS > 0:
+        partitions = partitions_for_process(parse_partitions(WORKER_ACCOUNT_PARTITIONS, ACCOUNT_PARTITIONS),
+                                           process_index, process_count)
     
-    # Start the worker
-    logger.info(f"Starting worker, connecting to task queue '{TASK_QUEUE_NAME}'")
+    if not lanes and not partitions:
+        raise ValueError(f"Worker process {process_index} would poll no task queue: WORKER_PRIORITY_LANES is "
+                         f"empty and no account partition is left for it; run fewer processes or list lanes")
+    return lanes, partitions
+
+async def run_worker(process_index: int = 0, stats_queue: Optional[object] = None, process_count: int = 1):
+    """
+    Start and run the worker.
+    
+    Args:
+        process_index: The index of this process when run by the supervisor
+        stats_queue: A multiprocessing queue to report WorkerStats snapshots
+            to the supervisor, or None when running standalone
+        process_count: The number of processes run by the supervisor
     
-    # Register signal handlers
-    for sig in (signal.SIGTERM, signal.SIGINT):
-        signal.signal(sig, handle_signal)
+    Raises:
+        ValueError: If the worker's task queues are misconfigured
+    """
+    lanes, partitions = select_task_queues(process_index, process_count)
     
-    # Start the worker
-    async with worker:
-        # Keep the worker running until shutdown is requested
-        while not shutdown:
-            await asyncio.sleep(0.5)
+    # Log through a background thread, so activities never wait on stdout
+    log_listener = configure_logging("money-transfer-worker")
     
-    logger.info("Worker shutdown complete")
+    try:
+        # Set when SIGTERM or SIGINT is received
+        shutdown_requested = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        
+        def handle_signal(signum, frame):
+            logger.info(f"Received signal {signum}, initiating shutdown")
+            loop.call_soon_threadsafe(shutdown_requested.set)
+        
+        # Register signal handlers
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, handle_signal)
+        
+        configure_tracing("money-transfer-worker")
+        
+        # Connect to the Temporal server
+        client = await Client.connect("localhost:7233", data_converter=create_data_converter(),
+                                      runtime=create_runtime(port_offset=process_index),
+                                      interceptors=tracing_interceptors())
+        
+        shard_ring: Optional[ShardRing] = None
+        if BANK_API_SHARD_RING_FILE:
+            shard_ring = ShardRing(path=BANK_API_SHARD_RING_FILE)
+        elif BANK_API_SHARDS:
+            shard_ring = ShardRing(parse_shards(BANK_API_SHARDS))
+        
+        # Create an instance of the AccountActivitiesImpl class
+        account_activities = AccountActivitiesImpl(hostname="localhost", port=8480,
+                                                   wire_format=BANK_API_WIRE_FORMAT,
+                                                   hedge_requests=BANK_API_HEDGE_REQUESTS,
+                                                   shard_ring=shard_ring)
+        
+        # Create a thread pool executor for synchronous activities, with a thread
+        # for every activity slot of every worker in this process
+        activity_executor = ThreadPoolExecutor(
+            max_workers=sum(lane.max_concurrent_activities for lane in lanes)
+                        + len(partitions) * len(PRIORITIES) * PARTITION_ACTIVITY_CONCURRENCY
+        )
+        
+        stats = WorkerStats()
+        
+        # Create a worker for each priority lane that hosts the workflow
+        # implementation and activities, with the lane's own slots, so that a
+        # backlog in one lane does not take slots from the other
+        lane_workers = []
+        for lane in lanes:
+            lane_workers.append(Worker(
+                client,
+                task_queue=lane.task_queue,
+                workflows=[MoneyTransferWorkflowImpl, NettingWorkflowImpl],
+                # Register the activities
+                activities=[
+                    account_activities.deposit,
+                    account_activities.withdraw
+                ],
+                activity_executor=activity_executor,
+                max_concurrent_workflow_tasks=lane.max_concurrent_workflow_tasks,
+                max_concurrent_activities=lane.max_concurrent_activities,
+                interceptors=[WorkerStatsInterceptor(stats)]
+            ))
+        
+        # Activity-only workers for the account partitions this process polls.
+        # Each partition has a queue per lane, all polled here whatever lanes
+        # this process serves, as no other process polls the partition
+        partition_workers = []
+        for partition in partitions:
+            for priority in PRIORITIES:
+                partition_workers.append(Worker(
+                    client,
+                    task_queue=partition_task_queue(partition, priority),
+                    activities=[
+                        account_activities.deposit,
+                        account_activities.withdraw
+                    ],
+                    activity_executor=activity_executor,
+                    max_concurrent_activities=PARTITION_ACTIVITY_CONCURRENCY,
+                    interceptors=[WorkerStatsInterceptor(stats)]
+                ))
+        if partitions:
+            logger.info(f"Polling {len(partitions)} of {ACCOUNT_PARTITIONS} account partition(s) "
+                        f"in {len(PRIORITIES)} lane(s)")
+        
+        # Start the worker
+        task_queues = ", ".join(f"'{lane.task_queue}'" for lane in lanes)
+        logger.info(f"Starting worker, connecting to task queue(s) {task_queues}")
+        
+        # Start the worker
+        async with contextlib.AsyncExitStack() as stack:
+            for running_worker in lane_workers + partition_workers:
+                await stack.enter_async_context(running_worker)
+            
+            # Keep the worker running until shutdown is requested
+            while not shutdown_requested.is_set():
+                try:
+                    await asyncio.wait_for(shutdown_requested.wait(), timeout=STATS_REPORT_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                if stats_queue is not None:
+                    stats_queue.put(stats.snapshot(process_index))
+        
+        # Every worker has stopped, so no activity uses the threads any more
+        account_activities.close()
+        activity_executor.shutdown()
+        shutdown_tracing()
+        logger.info(f"Worker shutdown complete: {stats.snapshot(process_index)}")
+    finally:
+        # Stop the listener even if the worker failed, so the records queued
+        # before the failure are still written
+        log_listener.stop()
 
 def main():
     """Main entry point for the worker application."""
@@ -80,6 +264,9 @@ def main():
         asyncio.run(run_worker())
     except KeyboardInterrupt:
         logger.info("Worker stopped by keyboard interrupt")
+    except ValueError as e:
+        logger.error(f"Invalid worker configuration: {e}")
+        sys.exit(1)
     except Exception as e:
         logger.error(f"Worker failed with error: {e}", exc_info=True)
         sys.exit(1)
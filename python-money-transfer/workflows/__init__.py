@@ -1,5 +1,7 @@
 # Make the workflows directory a Python package
 from .money_transfer_workflow import MoneyTransferWorkflow
 from .money_transfer_workflow_impl import MoneyTransferWorkflowImpl
+from .netting_workflow import NettingWorkflow
+from .netting_workflow_impl import NettingWorkflowImpl
 
-__all__ = ["MoneyTransferWorkflow", "MoneyTransferWorkflowImpl"]
\ No newline at end of file
+__all__ = ["MoneyTransferWorkflow", "MoneyTransferWorkflowImpl", "NettingWorkflow", "NettingWorkflowImpl"]
\ No newline at end of file
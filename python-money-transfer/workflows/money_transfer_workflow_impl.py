@@ -1,18 +1,42 @@
 import logging
 import time
 from datetime import timedelta
+from typing import Optional
 
 from temporalio import activity, workflow
 from temporalio.common import RetryPolicy
-from temporalio.exceptions import ApplicationError
+from temporalio.exceptions import ActivityError, ApplicationError
 
-from models.transfer_details import TransferDetails
+from models.transfer_details import ACTIVITY_MODE_LOCAL, TransferDetails
 # Only import interface, not implementation
 from workflows.money_transfer_workflow import MoneyTransferWorkflow
 from exceptions import InsufficientFundsException
+from routing.account_partitioning import task_queue_for_account
+from telemetry.transfer_metrics import APPROVAL_WAIT, TRANSFERS_STARTED, amount_bucket
+from workflows.search_attributes import (
+    AMOUNT,
+    SENDER,
+    STATUS_APPROVED,
+    STATUS_AWAITING_APPROVAL,
+    TRANSFER_STATUS
+)
 
 logger = logging.getLogger(__name__)
 
+# Local activity attempts are kept short: a healthy bank answers within
+# milliseconds, and anything slower is handed over to a regular activity
+LOCAL_ACTIVITY_TIMEOUT = timedelta(seconds=2)
+LOCAL_ACTIVITY_MAXIMUM_ATTEMPTS = 3
+
+# Each attempt of a bank activity must finish within BANK_ACTIVITY_TIMEOUT
+# once a worker has picked it up. Time spent waiting in a busy partition's
+# task queue only counts against the overall BANK_ACTIVITY_DEADLINE
+BANK_ACTIVITY_TIMEOUT = timedelta(seconds=10)
+BANK_ACTIVITY_DEADLINE = timedelta(minutes=5)
+
+# Patch ID of the search attributes set on held transfers
+TRANSFER_STATUS_PATCH = "transfer-status-search-attribute"
+
 @workflow.defn
 class MoneyTransferWorkflowImpl(MoneyTransferWorkflow):
     """
@@ -36,13 +60,37 @@ class MoneyTransferWorkflowImpl(MoneyTransferWorkflow):
         """
         logger.info("Starting Money Transfer Workflow")
         
+        metric_meter = workflow.metric_meter()
+        metric_meter.create_counter(TRANSFERS_STARTED, "Transfers started, by amount bucket").add(
+            1, {"amount_bucket": amount_bucket(input_details.amount)}
+        )
+        
         # Large transfers must be explicitly approved by a manager
         if input_details.amount > 500:
             logger.warning("This transfer is on hold awaiting manager approval")
             self.has_manager_approval = False
         
         # The workflow blocks here awaiting approval, if that was required
-        await workflow.wait_condition(lambda: self.has_manager_approval)
+        if not self.has_manager_approval:
+            # Make the held transfer findable for bulk approval. Transfers
+            # held before the search attributes were added keep running
+            # without them, so that their histories still replay
+            track_status = workflow.patched(TRANSFER_STATUS_PATCH)
+            if track_status:
+                workflow.upsert_search_attributes([
+                    TRANSFER_STATUS.value_set(STATUS_AWAITING_APPROVAL),
+                    AMOUNT.value_set(input_details.amount),
+                    SENDER.value_set(input_details.sender)
+                ])
+            
+            held_at = workflow.now()
+            await workflow.wait_condition(lambda: self.has_manager_approval)
+            if track_status:
+                workflow.upsert_search_attributes([TRANSFER_STATUS.value_set(STATUS_APPROVED)])
+            waited = workflow.now() - held_at
+            metric_meter.create_histogram(APPROVAL_WAIT, "Time held transfers wait for approval", "ms").record(
+                int(waited.total_seconds() * 1000)
+            )
         
         # Set up retry options, similar to Java implementation
         retry_policy = RetryPolicy(
@@ -54,7 +102,8 @@ class MoneyTransferWorkflowImpl(MoneyTransferWorkflow):
         
         # Define activity options
         activity_options = {
-            "schedule_to_close_timeout": timedelta(seconds=10),
+            "start_to_close_timeout": BANK_ACTIVITY_TIMEOUT,
+            "schedule_to_close_timeout": BANK_ACTIVITY_DEADLINE,
             "retry_policy": retry_policy
         }
         
@@ -63,11 +112,13 @@ class MoneyTransferWorkflowImpl(MoneyTransferWorkflow):
         withdraw_key = f"withdrawal-for-{input_details.reference_id}"
         
         try:
-            # Use string activity name instead of class reference
-            withdraw_result = await workflow.execute_activity(
-                "withdraw",  # Activity name as string
-                args=[input_details.sender, input_details.amount, withdraw_key],
-                **activity_options
+            withdraw_result = await self._execute_bank_activity(
+                "withdraw",
+                [input_details.sender, input_details.amount, withdraw_key],
+                input_details.activity_mode,
+                activity_options,
+                task_queue_for_account(input_details.sender, input_details.account_partitions,
+                                       input_details.priority)
             )
         except ApplicationError as e:
             if "InsufficientFundsException" in str(e):
@@ -79,11 +130,13 @@ class MoneyTransferWorkflowImpl(MoneyTransferWorkflow):
         logger.info("Starting deposit operation")
         deposit_key = f"deposit-for-{input_details.reference_id}"
         
-        # Use string activity name instead of class reference
-        deposit_result = await workflow.execute_activity(
-            "deposit",  # Activity name as string
-            args=[input_details.recipient, input_details.amount, deposit_key],
-            **activity_options
+        deposit_result = await self._execute_bank_activity(
+            "deposit",
+            [input_details.recipient, input_details.amount, deposit_key],
+            input_details.activity_mode,
+            activity_options,
+            task_queue_for_account(input_details.recipient, input_details.account_partitions,
+                                   input_details.priority)
         )
         
         confirmation = f"withdrawal={withdraw_result}, deposit={deposit_result}"
@@ -91,6 +144,67 @@ class MoneyTransferWorkflowImpl(MoneyTransferWorkflow):
         logger.info(f"Money Transfer Workflow now complete. Confirmation: {confirmation}")
         return confirmation
     
+    async def _execute_bank_activity(self, activity_name: str, args: list, activity_mode: str,
+                                     activity_options: dict, task_queue: Optional[str] = None) -> str:
+        """
+        Execute a bank activity in the requested mode.
+        
+        In local mode the activity first runs as a local activity, with a
+        short timeout and a small number of attempts. If those attempts fail
+        for any reason other than a non-retryable business error (the bank is
+        slow, throttled or unavailable), the same call is scheduled as a
+        regular activity with the full retry policy. The idempotency key in
+        the arguments is unchanged, so a local attempt that reached the bank
+        is not applied twice.
+        
+        Regular activities are scheduled on the given task queue, so that
+        all operations on one account in the transfer's lane are handled by
+        the worker subscribed to that account's partition.
+        
+        Args:
+            activity_name: The name of the activity (withdraw or deposit)
+            args: The activity arguments
+            activity_mode: ACTIVITY_MODE_REGULAR or ACTIVITY_MODE_LOCAL
+            activity_options: The options for the regular activity
+            task_queue: The task queue for the regular activity, or None for
+                the workflow's task queue
+            
+        Returns:
+            The transaction ID
+        """
+        if activity_mode == ACTIVITY_MODE_LOCAL:
+            retry_policy = activity_options["retry_policy"]
+            local_retry_policy = RetryPolicy(
+                initial_interval=timedelta(milliseconds=100),
+                maximum_interval=timedelta(seconds=1),
+                backoff_coefficient=2.0,
+                maximum_attempts=LOCAL_ACTIVITY_MAXIMUM_ATTEMPTS,
+                non_retryable_error_types=retry_policy.non_retryable_error_types
+            )
+            
+            try:
+                return await workflow.execute_local_activity(
+                    activity_name,
+                    args=args,
+                    start_to_close_timeout=LOCAL_ACTIVITY_TIMEOUT,
+                    retry_policy=local_retry_policy
+                )
+            except ActivityError as e:
+                cause = e.cause
+                if isinstance(cause, ApplicationError) and (
+                        cause.non_retryable or cause.type == "InsufficientFundsException"):
+                    raise
+                logger.warning(f"Local {activity_name} did not complete ({cause}), "
+                               f"falling back to a regular activity")
+        
+        # Use string activity name instead of class reference
+        return await workflow.execute_activity(
+            activity_name,  # Activity name as string
+            args=args,
+            task_queue=task_queue,
+            **activity_options
+        )
+    
     @workflow.signal
     def approve(self, manager_name: str) -> None:
         """
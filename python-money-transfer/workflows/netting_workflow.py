@@ -0,0 +1,45 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+from models.transfer_details import TransferDetails
+
+class NettingWorkflow(ABC):
+    """
+    Interface for the transfer netting workflow.
+    """
+    
+    @abstractmethod
+    def run(self, window_seconds: int) -> Dict[str, str]:
+        """
+        Collect transfers for a window and settle them as net operations.
+        
+        Args:
+            window_seconds: How long to collect transfers before settling
+        
+        Returns:
+            A mapping of transfer reference ID to its confirmation string
+        """
+        pass
+    
+    @abstractmethod
+    def submit(self, details: TransferDetails) -> None:
+        """
+        Add a transfer to the pending batch.
+        
+        Args:
+            details: Details of the transfer
+        """
+        pass
+    
+    @abstractmethod
+    def get_confirmation(self, reference_id: str) -> Optional[str]:
+        """
+        Get the confirmation for a settled transfer.
+        
+        Args:
+            reference_id: The reference ID of the transfer
+        
+        Returns:
+            The confirmation string, or None if the transfer is not settled yet
+        """
+        pass
\ No newline at end of file
@@ -0,0 +1,227 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from temporalio import workflow
+from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
+
+from models.transfer_details import TransferDetails
+from netting.netting_engine import NettingEngine
+from routing.account_partitioning import task_queue_for_account
+# Only import interface, not implementation
+from workflows.netting_workflow import NettingWorkflow
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on the transfers settled in one round, which keeps the
+# history of a single run bounded
+MAX_BATCH_SIZE = 1000
+
+# Each attempt of a net operation must finish within BANK_ACTIVITY_TIMEOUT
+# once a worker has picked it up; time spent waiting in a partition's task
+# queue only counts against BANK_ACTIVITY_DEADLINE. Deposits have no
+# deadline: once the debits are taken, the money must reach its recipients
+# or go back to its senders, however long the bank is unavailable
+BANK_ACTIVITY_TIMEOUT = timedelta(seconds=10)
+BANK_ACTIVITY_DEADLINE = timedelta(minutes=5)
+
+@workflow.defn
+class NettingWorkflowImpl(NettingWorkflow):
+    """
+    Implementation of the transfer netting workflow.
+    
+    Transfers are submitted by signal (typically with signal-with-start) and
+    collected until the window closes or the batch is full. The batch is then
+    reduced to net positions, and only the net debits and net credits are
+    executed as withdraw and deposit activities. Transfers that arrive while a
+    batch is settling are settled in a following round of the same run.
+    """
+    
+    def __init__(self):
+        """Initialize the workflow."""
+        self.pending: List[TransferDetails] = []
+        self.confirmations: Dict[str, str] = {}
+        self.rounds = 0
+    
+    @workflow.run
+    async def run(self, window_seconds: int) -> Dict[str, str]:
+        """
+        Collect transfers for a window and settle them as net operations.
+        
+        Args:
+            window_seconds: How long to collect transfers before settling
+        
+        Returns:
+            A mapping of transfer reference ID to its confirmation string
+        """
+        logger.info(f"Starting Netting Workflow with a {window_seconds}s window")
+        
+        try:
+            await workflow.wait_condition(
+                lambda: len(self.pending) >= MAX_BATCH_SIZE,
+                timeout=timedelta(seconds=window_seconds)
+            )
+        except asyncio.TimeoutError:
+            pass
+        
+        while self.pending:
+            batch = self.pending[:MAX_BATCH_SIZE]
+            self.pending = self.pending[MAX_BATCH_SIZE:]
+            await self._settle(batch)
+        
+        logger.info(f"Netting Workflow complete after {self.rounds} round(s), "
+                    f"{len(self.confirmations)} transfer(s) settled")
+        return self.confirmations
+    
+    @workflow.signal
+    def submit(self, details: TransferDetails) -> None:
+        """
+        Add a transfer to the pending batch.
+        
+        Args:
+            details: Details of the transfer
+        """
+        if details.reference_id in self.confirmations:
+            return
+        self.pending.append(details)
+    
+    @workflow.query
+    def get_confirmation(self, reference_id: str) -> Optional[str]:
+        """
+        Get the confirmation for a settled transfer.
+        
+        Args:
+            reference_id: The reference ID of the transfer
+        
+        Returns:
+            The confirmation string, or None if the transfer is not settled yet
+        """
+        return self.confirmations.get(reference_id)
+    
+    async def _settle(self, batch: List[TransferDetails]) -> None:
+        """
+        Settle one batch of transfers as net operations.
+        
+        Net debits run before net credits so that money is never deposited
+        before it has been collected. If any net debit fails, the debits that
+        succeeded are reversed and every transfer in the batch is marked failed.
+        Net credits and reversals are deposits, which are retried until they
+        succeed, so money that was collected is never left undelivered. Only
+        a deposit rejected with a non-retryable error marks the transfers to
+        that account failed; the other transfers are confirmed as usual.
+        Failed operations are recorded in the confirmations rather than
+        failing the workflow, so every submitter gets an answer.
+        
+        Args:
+            batch: The transfers to settle
+        """
+        self.rounds += 1
+        batch_id = f"{workflow.info().workflow_id}-{workflow.info().run_id}-{self.rounds}"
+        # Net operations are routed like the transfers' own operations;
+        # every starter uses the same number of partitions
+        partitions = batch[0].account_partitions
+        
+        engine = NettingEngine()
+        for details in batch:
+            try:
+                engine.add(details)
+            except ValueError as e:
+                self.confirmations[details.reference_id] = f"failed: {e}"
+        
+        logger.info(f"Netting batch {batch_id}: {engine.gross_operation_count()} operations "
+                    f"reduced to {engine.net_operation_count()}")
+        
+        debits = engine.net_debits()
+        debit_results = await asyncio.gather(
+            *[self._execute("withdraw", name, amount, f"net-withdrawal-for-{batch_id}-{name}", partitions)
+              for name, amount in debits.items()],
+            return_exceptions=True
+        )
+        
+        transaction_ids, failures = self._collect(debits, debit_results)
+        
+        if failures:
+            logger.error(f"Netting batch {batch_id} failed, reversing {len(transaction_ids)} debit(s)")
+            reversal_results = await asyncio.gather(
+                *[self._execute("deposit", name, debits[name], f"net-reversal-for-{batch_id}-{name}", partitions)
+                  for name in transaction_ids],
+                return_exceptions=True
+            )
+            _, reversal_failures = self._collect(transaction_ids, reversal_results)
+            reasons = "; ".join(failures.values())
+            if reversal_failures:
+                logger.error(f"Netting batch {batch_id}: {len(reversal_failures)} reversal(s) failed: "
+                             f"{'; '.join(reversal_failures.values())}")
+                reasons += f"; reversal failed for {'; '.join(reversal_failures.values())}"
+            for details in engine.transfers:
+                self.confirmations[details.reference_id] = f"failed: batch={batch_id}, {reasons}"
+            return
+        
+        credits = engine.net_credits()
+        credit_results = await asyncio.gather(
+            *[self._execute("deposit", name, amount, f"net-deposit-for-{batch_id}-{name}", partitions)
+              for name, amount in credits.items()],
+            return_exceptions=True
+        )
+        credit_ids, failed_credits = self._collect(credits, credit_results)
+        transaction_ids.update(credit_ids)
+        if failed_credits:
+            logger.error(f"Netting batch {batch_id}: {len(failed_credits)} net deposit(s) failed: "
+                         f"{'; '.join(failed_credits.values())}")
+        
+        self.confirmations.update(engine.confirmations(transaction_ids, batch_id, failed_credits))
+    
+    def _collect(self, names: Iterable[str], results: List) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        Split the results of gathered operations into successes and failures.
+        
+        Args:
+            names: The account of each operation, in the order gathered
+            results: The results of asyncio.gather with return_exceptions=True
+        
+        Returns:
+            Tuple of (transaction ID by account, error by account)
+        """
+        transaction_ids: Dict[str, str] = {}
+        failures: Dict[str, str] = {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                cause = result.cause if isinstance(result, ActivityError) and result.cause else result
+                failures[name] = f"{name}: {cause}"
+            else:
+                transaction_ids[name] = result
+        return transaction_ids, failures
+    
+    async def _execute(self, operation: str, bank_name: str, amount: int, idempotency_key: str,
+                       partitions: int = 0) -> str:
+        """
+        Execute a single net bank operation as an activity.
+        
+        Args:
+            operation: The activity name (withdraw or deposit)
+            bank_name: The name of the bank account
+            amount: The net amount
+            idempotency_key: A key to ensure idempotency of the operation
+            partitions: The number of account partitions, or 0 to run the
+                activity on the workflow's task queue
+        
+        Returns:
+            The transaction ID
+        """
+        retry_policy = RetryPolicy(
+            initial_interval=timedelta(seconds=1),
+            maximum_interval=timedelta(seconds=60),
+            backoff_coefficient=2.0,
+            non_retryable_error_types=["exceptions.InsufficientFundsException"]
+        )
+        
+        return await workflow.execute_activity(
+            operation,
+            args=[bank_name, amount, idempotency_key],
+            task_queue=task_queue_for_account(bank_name, partitions),
+            start_to_close_timeout=BANK_ACTIVITY_TIMEOUT,
+            schedule_to_close_timeout=BANK_ACTIVITY_DEADLINE if operation == "withdraw" else None,
+            retry_policy=retry_policy
+        )
\ No newline at end of file
@@ -0,0 +1,12 @@
+from temporalio.common import SearchAttributeKey
+
+# Custom search attributes set by MoneyTransferWorkflowImpl on transfers that
+# are held for approval. They must be registered with the Temporal Service
+# before use, see the README.
+TRANSFER_STATUS = SearchAttributeKey.for_keyword("TransferStatus")
+AMOUNT = SearchAttributeKey.for_int("Amount")
+SENDER = SearchAttributeKey.for_keyword("Sender")
+
+# Values of the TransferStatus search attribute
+STATUS_AWAITING_APPROVAL = "AWAITING_APPROVAL"
+STATUS_APPROVED = "APPROVED"
\ No newline at end of file